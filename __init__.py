@@ -1,6 +1,6 @@
 from .board import Board
 from .game import Game
-from .game_settings import GameSettings
+from .game_settings import SETTINGS, GameSettings, SettingsRegistry
 from .manager import Manager
 from .player import Player
 from .types.event_types import INVERTED_EVENTS, Event
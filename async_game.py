@@ -0,0 +1,136 @@
+import asyncio
+from time import perf_counter
+from typing import Any, Awaitable, Coroutine, Dict, Optional, Tuple
+
+from sh_game.game import Decision, Game
+from sh_game.instrumentation import EVENT
+from sh_game.player import Player
+from sh_game.types.event_types import Event
+
+VOTE_OPTIONS = ["ja", "nein"]
+
+
+class AsyncGame(Game):
+    """
+    Game that awaits Player.aperform_action and Manager.aget_next_action.
+
+    All PERSONAL_VOTE decisions of a voting round are requested concurrently. With
+    prefetch_messages, every living player is asked for a chat message while the
+    manager decides who speaks next. Prefetched messages are dropped as soon as a new
+    event is broadcast, as they were written without knowing about it.
+
+    decision_limiter, if set, is entered around every awaited player or manager call
+    to cap the number of decisions in flight (see GameHost).
+    """
+
+    def __init__(self, *args, prefetch_messages: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prefetch_messages = prefetch_messages
+        self._prefetched: Dict[int, asyncio.Task] = {}
+        self.decision_limiter: Optional[asyncio.Semaphore] = None
+        # Awaited calls, and the part of them that got past the decision_limiter
+        self.num_waiting = 0
+        self.num_in_flight = 0
+
+    async def _limited(self, call: Coroutine):
+        self.num_waiting += 1
+        try:
+            if self.decision_limiter is not None:
+                try:
+                    await self.decision_limiter.acquire()
+                except asyncio.CancelledError:
+                    call.close()
+                    raise
+            self.num_in_flight += 1
+            try:
+                return await call
+            finally:
+                self.num_in_flight -= 1
+                if self.decision_limiter is not None:
+                    self.decision_limiter.release()
+        finally:
+            self.num_waiting -= 1
+
+    async def arun_game(self):
+        decision = self.reset()
+        try:
+            while decision is not None:
+                if decision.event == Event.PERSONAL_VOTE:
+                    decision = await self._voting_round(decision)
+                else:
+                    decision = self.step(*(await self.adecide(decision)))
+        finally:
+            self._drop_prefetched()
+
+    async def adecide(self, decision: Decision) -> Tuple[Any, Optional[dict]]:
+        started = perf_counter() if self._timed else 0.0
+        if decision.pid is None:
+            if self.prefetch_messages:
+                self._prefetch_messages()
+            answer = await self._limited(
+                self._deadline(decision, self._manager_answer())
+            )
+        elif decision.event == Event.MESSAGE and decision.pid in self._prefetched:
+            answer = await self._deadline(decision, self._prefetched.pop(decision.pid))
+        else:
+            player = self.board.players[decision.pid]
+            answer = await self._limited(
+                self._deadline(
+                    decision, player.aperform_action(decision.event, **decision.kwargs)
+                )
+            )
+        if self._timed:
+            self._record(decision.event.value, started, EVENT)
+        return answer
+
+    async def _manager_answer(self) -> Tuple[Any, None]:
+        return await self.manager.aget_next_action(), None
+
+    def _deadline(self, decision: Decision, call: Awaitable) -> Awaitable:
+        if self.deadlines is None:
+            return call
+        return self.deadlines.adecide(self, decision, call)
+
+    async def _voting_round(self, decision: Decision) -> Optional[Decision]:
+        # Game.voting asks the living players in seat order, votes are independent
+        voters = [p for p in self.board.players if not p.is_dead]
+        assert voters[0].pid == decision.pid
+        self.bus.flush()
+        started = perf_counter() if self._timed else 0.0
+        answers = await asyncio.gather(
+            *(
+                self._limited(
+                    self._deadline(
+                        Decision(p.pid, Event.PERSONAL_VOTE, VOTE_OPTIONS, {}),
+                        p.aperform_action(Event.PERSONAL_VOTE),
+                    )
+                )
+                for p in voters
+            )
+        )
+        if self._timed:
+            self._record("concurrent_votes", started)
+        for voter, answer in zip(voters, answers):
+            assert decision.event == Event.PERSONAL_VOTE and decision.pid == voter.pid
+            decision = self.step(*answer)
+        return decision
+
+    def _prefetch_messages(self):
+        for player in self.board.players:
+            if not player.is_dead and player.pid not in self._prefetched:
+                self.bus.flush(player)
+                self._prefetched[player.pid] = asyncio.ensure_future(
+                    self._prefetch_message(player)
+                )
+
+    async def _prefetch_message(self, player: Player):
+        return await self._limited(player.aperform_action(Event.MESSAGE))
+
+    def _drop_prefetched(self):
+        for task in self._prefetched.values():
+            task.cancel()
+        self._prefetched.clear()
+
+    def broadcast(self, event_type: Event, **kwargs):
+        self._drop_prefetched()
+        super().broadcast(event_type, **kwargs)
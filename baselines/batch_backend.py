@@ -0,0 +1,22 @@
+import random
+from typing import Any, List, Optional
+
+from sh_game.batching_player import PendingDecision
+
+
+class BaselineBackend:
+    """
+    Local stand-in for a model backend of BatchingPlayers: answers every decision of a
+    batch with a uniformly random legal option, like BaselinePlayer.
+    """
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = random.Random() if rng is None else rng
+        self.num_calls = 0
+
+    def __call__(self, batch: List[PendingDecision]) -> List[Any]:
+        self.num_calls += 1
+        return [
+            self.rng.choice(request.options) if request.options else "I will win"
+            for request in batch
+        ]
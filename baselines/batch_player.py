@@ -0,0 +1,30 @@
+import numpy as np
+
+from sh_game.batch_player import BatchDecision, BatchPlayer
+from sh_game.types.event_types import Event
+
+
+class BaselineBatchPlayer(BatchPlayer):
+    """
+    Vectorized version of BaselinePlayer: every decision is uniformly random among the
+    legal options. A single instance can be seated on all seats of a VectorGame.
+    """
+
+    def act(self, decision: BatchDecision, game) -> np.ndarray:
+        rng = game.rng
+        num = len(decision.games)
+        if decision.legal is not None:
+            keys = rng.random(decision.legal.shape)
+            keys[~decision.legal] = -1.0
+            return np.argmax(keys, axis=1)
+        if decision.event == Event.DISCARD:
+            return rng.integers(0, 3, num)
+        if decision.event == Event.PLAY_CARD:
+            return rng.integers(0, 2, num)
+        if decision.event in (
+            Event.PERSONAL_VOTE,
+            Event.CHANCELLOR_VETO,
+            Event.PRESIDENT_VETO,
+        ):
+            return rng.random(num) < 0.5
+        raise ValueError("Unknown batch decision", decision.event)
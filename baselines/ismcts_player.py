@@ -0,0 +1,336 @@
+import copy
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from sh_game.baselines.player import BaselinePlayer
+from sh_game.board_state import BoardState
+from sh_game.deck_tracker import DeckTracker
+from sh_game.forward_model import (
+    FASCIST_TEAM,
+    LIBERAL_TEAM,
+    Playout,
+    RolloutPolicy,
+    Stage,
+    deal,
+)
+from sh_game.role_tracker import RoleTracker, claim_conflict_likelihood
+from sh_game.types.event_types import Event
+from sh_game.types.int_codes import CARD_CODES, FASCIST, NO_SEAT
+
+# The playouts do not model what an investigation reveals, it has its own heuristic
+POWER_EVENTS = (Event.EXECUTE_ACTION, Event.SPECIAL_ELECT_ACTION)
+
+
+class Root(NamedTuple):
+    """
+    Start of the playouts of one decision, forced holds the playout action of every
+    legal option, see Playout.run for the other fields
+    """
+
+    stage: Stage
+    forced: list
+    forced_seat: int
+    hand: Optional[Tuple[int, ...]]
+    card: Optional[int]
+
+
+class Determinizer:
+    """
+    Samples full BoardStates consistent with what a seat knows: role assignments with
+    their posterior weights and the number of fascists in the deck, from which the
+    composition of the discard pile follows. Picklable, to be sent to workers.
+    """
+
+    def __init__(
+        self,
+        state: BoardState,
+        roles: np.ndarray,
+        role_weights: np.ndarray,
+        deck_probs: np.ndarray,
+        fascists_outside: int,
+        in_play_fascists: int,
+    ):
+        self.state = state
+        keep = np.flatnonzero(role_weights)
+        self.roles = [bytes(row) for row in roles[keep]]
+        self.role_weights = list(np.cumsum(role_weights[keep]))
+        # (fascists in the deck, fascists in the discard pile)
+        num_discards = state.discard_lib + state.discard_fasc
+        self.piles = []
+        pile_weights = []
+        for deck_fasc in range(len(state.deck) + 1):
+            discard_fasc = fascists_outside - deck_fasc - in_play_fascists
+            if 0 <= discard_fasc <= num_discards and deck_fasc < len(deck_probs):
+                self.piles.append((deck_fasc, discard_fasc))
+                pile_weights.append(deck_probs[deck_fasc])
+        if not self.piles:
+            raise ValueError("No deck composition is consistent with the game")
+        if not any(pile_weights):
+            pile_weights = [1.0] * len(self.piles)
+        self.pile_weights = list(np.cumsum(pile_weights))
+
+    def sample(self, rng: random.Random) -> BoardState:
+        roles = rng.choices(self.roles, cum_weights=self.role_weights)[0]
+        deck_fasc, discard_fasc = rng.choices(
+            self.piles, cum_weights=self.pile_weights
+        )[0]
+        return deal(self.state, roles, deck_fasc, discard_fasc, rng)
+
+
+def search(
+    determinizer: Determinizer,
+    root: Root,
+    team: int,
+    iterations: Optional[int],
+    time_limit: Optional[float],
+    seed: int,
+    policy: RolloutPolicy,
+    exploration: float,
+) -> Tuple[List[int], List[float]]:
+    """
+    UCB1 over the options of root, every iteration plays out a new determinization.
+    The k-th playout of every option uses the same determinization and random
+    numbers, the k-th number of the stream seeded with seed, so that the options are
+    compared on equal worlds.
+    Returns the visits and wins of team per option.
+    """
+    assert iterations is not None or time_limit is not None
+    num = len(root.forced)
+    visits, wins = [0] * num, [0.0] * num
+    deadline = None if time_limit is None else perf_counter() + time_limit
+    stream = random.Random(seed)
+    playout_seeds: List[int] = []
+    it = 0
+    while (iterations is None or it < iterations) and (
+        deadline is None or perf_counter() < deadline
+    ):
+        if it < num:
+            idx = it
+        else:
+            log_it = math.log(it)
+            idx = max(
+                range(num),
+                key=lambda i: wins[i] / visits[i]
+                + exploration * math.sqrt(log_it / visits[i]),
+            )
+        if visits[idx] == len(playout_seeds):
+            playout_seeds.append(stream.getrandbits(64))
+        rng = random.Random(playout_seeds[visits[idx]])
+        state = determinizer.sample(rng)
+        winner = Playout(state, rng, policy).run(
+            root.stage,
+            forced=root.forced[idx],
+            forced_seat=root.forced_seat,
+            hand=root.hand,
+            card=root.card,
+        )
+        visits[idx] += 1
+        wins[idx] += winner == team
+        it += 1
+    return visits, wins
+
+
+def _codes(hand: Sequence[str]) -> Tuple[int, ...]:
+    return tuple(CARD_CODES[card] for card in hand)
+
+
+class ISMCTSPlayer(BaselinePlayer):
+    """
+    Determinized information set search. Every game decision (nomination, vote,
+    legislation, veto, presidential power) is searched with UCB1 over the legal
+    options: each iteration samples roles from a RoleTracker and the deck from a
+    DeckTracker and plays the game out with a RolloutPolicy on a BoardState.
+    Investigations go to the seat whose party is least certain. Chat and claims are
+    left to BaselinePlayer.
+
+    The budget is iterations per decision and/or time_limit seconds. With workers > 1
+    the search runs root parallel in a process pool, call close() when done.
+    """
+
+    event_records = True
+
+    def __init__(
+        self,
+        pid,
+        name,
+        iterations: Optional[int] = 200,
+        time_limit: Optional[float] = None,
+        workers: int = 1,
+        exploration: float = 0.7,
+        policy: Optional[RolloutPolicy] = None,
+        claim_trust: float = 0.5,
+        **kwargs,
+    ):
+        super().__init__(pid, name, **kwargs)
+        assert iterations is not None or time_limit is not None
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.workers = workers
+        self.exploration = exploration
+        self.policy = RolloutPolicy() if policy is None else policy
+        conflicts = claim_conflict_likelihood()
+        self.roles = RoleTracker(
+            pid,
+            likelihoods={
+                Event.PRESIDENT_CLAIM: conflicts,
+                Event.CHANCELLOR_CLAIM: conflicts,
+            },
+        )
+        self.deck = DeckTracker(pid, claim_trust=claim_trust)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Own cards of the current government, for the veto decisions
+        self._drawn: Optional[Tuple[str, ...]] = None
+        self._dropped: Optional[str] = None
+        self._enacted: Optional[str] = None
+
+    def inform_record(self, event: Event, record: NamedTuple):
+        if event == Event.GAME_SETTINGS:
+            self.roles.pid = self.deck.pid = self.pid
+            self.roles.board = self.board
+        self.roles.inform_record(event, record)
+        self.deck.inform_record(event, record)
+
+    def personal_record(self, event: Event, record: NamedTuple):
+        if event == Event.DRAW:
+            self._drawn, self._dropped = record.hand, None
+        elif event == Event.DISCARD:
+            self._dropped = record.dropped_card
+        elif event == Event.PLAY_CARD:
+            self._enacted = record.card
+        self.roles.personal_record(event, self.pid, record)
+        self.deck.personal_record(event, self.pid, record)
+
+    def perform_action(
+        self, event_type: Event, hand: Optional[List[str]] = None, **kwargs
+    ) -> tuple[Any, dict]:
+        options = self.board.get_legal_options(event_type, hand=hand)
+        if event_type == Event.INVESTIGATION_ACTION:
+            return self.investigation_target(options), {}
+        root = self._root(event_type, options, hand)
+        if root is None or len(options) < 2:
+            return self.choose_action(event_type, hand), {}
+        visits, wins = self._search(root)
+        best = max(range(len(options)), key=lambda i: (visits[i], wins[i]))
+        return options[best], {}
+
+    def _root(self, event: Event, options: list, hand) -> Optional[Root]:
+        if event == Event.NOMINATION or event in POWER_EVENTS:
+            stage = Stage.NOMINATION if event == Event.NOMINATION else Stage.POWER
+            return Root(stage, [p.pid for p in options], NO_SEAT, None, None)
+        if event == Event.PERSONAL_VOTE:
+            return Root(Stage.VOTE, [o == "ja" for o in options], self.pid, None, None)
+        if event == Event.DISCARD:
+            forced = [hand.index(discarded) for _kept, discarded in options]
+            return Root(Stage.DISCARD, forced, NO_SEAT, _codes(hand), None)
+        if event == Event.PLAY_CARD:
+            forced = [hand.index(enacted) for enacted, _discarded in options]
+            return Root(Stage.PLAY_CARD, forced, NO_SEAT, _codes(hand), None)
+        if event == Event.CHANCELLOR_VETO and self._enacted is not None:
+            card = CARD_CODES[self._enacted]
+            return Root(Stage.CHANCELLOR_VETO, list(options), NO_SEAT, None, card)
+        if event == Event.PRESIDENT_VETO and self._dropped is not None:
+            kept = list(self._drawn)
+            kept.remove(self._dropped)
+            return Root(
+                Stage.PRESIDENT_VETO, list(options), NO_SEAT, _codes(kept), None
+            )
+        return None
+
+    def investigation_target(self, options: list):
+        """
+        The option whose party the RoleTracker is least sure of, ties broken at random
+        """
+        p_fascist = self.roles.p_fascist_team()
+        uncertainty = [-abs(p_fascist[p.pid] - 0.5) for p in options]
+        best = max(uncertainty)
+        return self.rng.choice(
+            [p for p, u in zip(options, uncertainty) if u >= best - 1e-9]
+        )
+
+    def determinizer(self, root: Root) -> Determinizer:
+        """
+        Sampler of the states consistent with the own information at root
+        """
+        state = BoardState.from_board(self.board)
+        in_play = () if root.hand is None else root.hand
+        if root.stage == Stage.PRESIDENT_VETO:
+            # The playout discards one of the kept cards again
+            state.discard_lib += state.discard_fasc - 1
+            state.discard_fasc = 0
+        elif root.stage == Stage.CHANCELLOR_VETO:
+            in_play = (root.card,)
+        deck = self.deck
+        if deck.deck_size == len(state.deck) + 3:
+            # The tracker only sees the draw of a government when the policy is enacted
+            deck = copy.copy(deck)
+            deck.draw()
+        deck_probs = (
+            deck.deck_distribution()
+            if deck.deck_size == len(state.deck)
+            else np.ones(len(state.deck) + 1)
+        )
+        return Determinizer(
+            state,
+            self.roles.table.roles,
+            self.roles.weights,
+            deck_probs,
+            deck.shuffled_fascists - deck.enacted_fascists,
+            sum(card == FASCIST for card in in_play),
+        )
+
+    def _search(self, root: Root) -> Tuple[List[int], List[float]]:
+        determinizer = self.determinizer(root)
+        team = LIBERAL_TEAM if self.role == "liberal" else FASCIST_TEAM
+        seed = self.rng.getrandbits(64)
+        if self.workers <= 1:
+            return search(
+                determinizer,
+                root,
+                team,
+                self.iterations,
+                self.time_limit,
+                seed,
+                self.policy,
+                self.exploration,
+            )
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers)
+        per_worker = (
+            None if self.iterations is None else -(-self.iterations // self.workers)
+        )
+        # Independent streams, so that the workers play out different worlds
+        worker_seeds = [
+            int(child.generate_state(1)[0])
+            for child in np.random.SeedSequence(seed).spawn(self.workers)
+        ]
+        futures = [
+            self._pool.submit(
+                search,
+                determinizer,
+                root,
+                team,
+                per_worker,
+                self.time_limit,
+                worker_seed,
+                self.policy,
+                self.exploration,
+            )
+            for worker_seed in worker_seeds
+        ]
+        visits, wins = [0] * len(root.forced), [0.0] * len(root.forced)
+        for future in futures:
+            worker_visits, worker_wins = future.result()
+            for i in range(len(visits)):
+                visits[i] += worker_visits[i]
+                wins[i] += worker_wins[i]
+        return visits, wins
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -1,4 +1,3 @@
-import random
 from typing import Tuple
 
 from sh_game.manager import Manager
@@ -7,18 +6,26 @@ from sh_game.types.event_types import Event
 
 
 class BaselineManager(Manager):
+    def __init__(self, verbose: bool = True):
+        super().__init__()
+        self.verbose = verbose
+
     def personal_event(self, event: Event, player: Player = None, **kwargs):
+        if not self.verbose:
+            return
         self.history.append(
             f"Player {player.pid} got message {event._name_} with arguments {kwargs}"
         )
         print(self.history[-1])
 
     def inform_event(self, event: Event, **kwargs):
+        if not self.verbose:
+            return
         self.history.append(f"Action {event._name_} happened with arguments {kwargs}")
         print(self.history[-1])
 
     def get_next_action(self) -> Tuple[Event, int]:
         legals = self.board.get_legal_actions()
-        action_type = random.choice(list(legals.keys()))
-        pid = random.choice(legals[action_type])
+        action_type = self.rng.choice(list(legals.keys()))
+        pid = self.rng.choice(legals[action_type])
         return action_type, pid
@@ -0,0 +1,41 @@
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+import numpy as np
+
+from sh_game.types.event_types import Event
+
+if TYPE_CHECKING:
+    from sh_game.vector_game import VectorGame
+
+
+class BatchDecision(NamedTuple):
+    """
+    One decision that has to be taken in many games at once.
+
+    Row i of every array belongs to game ``games[i]`` where seat ``seats[i]`` acts.
+    ``legal`` is a (rows, num_players) bool mask for decisions that target a seat,
+    ``hands`` holds the int coded cards (0 liberal, 1 fascist) of DISCARD/PLAY_CARD.
+    """
+
+    event: Event
+    games: np.ndarray
+    seats: np.ndarray
+    legal: Optional[np.ndarray] = None
+    hands: Optional[np.ndarray] = None
+
+
+class BatchPlayer(ABC):
+    """
+    A player that decides for a batch of games of a VectorGame at once.
+
+    The return value of act is an array with one entry per row of the decision:
+    NOMINATION, INVESTIGATION/EXECUTE/SPECIAL_ELECT_ACTION -> target seat
+    PERSONAL_VOTE, CHANCELLOR_VETO, PRESIDENT_VETO -> bool (True for ja / veto)
+    DISCARD -> index of the card in the hand that is discarded
+    PLAY_CARD -> index of the card in the hand that is enacted
+    """
+
+    @abstractmethod
+    def act(self, decision: BatchDecision, game: "VectorGame") -> np.ndarray:
+        pass
@@ -0,0 +1,133 @@
+import asyncio
+import inspect
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, List, NamedTuple, Optional, Union
+
+from sh_game.histogram import Histogram
+from sh_game.player import Player
+from sh_game.types.event_types import Event
+
+
+class PendingDecision(NamedTuple):
+    pid: int
+    event: Event
+    observation: Any
+    options: Any
+    kwargs: dict
+
+
+# Gets a batch of decisions and returns one action per decision, sync or async
+BatchBackend = Callable[[List[PendingDecision]], Union[List[Any], Awaitable[List[Any]]]]
+
+
+class DecisionBatcher:
+    """
+    Collects decisions of many players, possibly of many games, and sends them to the
+    backend in one call. A batch is flushed once it has max_batch_size decisions or
+    when its oldest decision waited max_wait seconds.
+    """
+
+    def __init__(
+        self, backend: BatchBackend, max_batch_size: int = 64, max_wait: float = 0.01
+    ):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: List[tuple[PendingDecision, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: set[asyncio.Task] = set()
+        self.batch_sizes = Counter()
+        self.queue_latency = Histogram()
+
+    async def submit(self, request: PendingDecision) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((request, future, time.perf_counter()))
+        if len(self._queue) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self.flush)
+        return await future
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._queue:
+            return
+        batch, self._queue = self._queue, []
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _run_batch(self, batch: list):
+        now = time.perf_counter()
+        self.batch_sizes[len(batch)] += 1
+        for _request, _future, queued_at in batch:
+            self.queue_latency.add(now - queued_at)
+        try:
+            actions = self.backend([request for request, _, _ in batch])
+            if inspect.isawaitable(actions):
+                actions = await actions
+            assert len(actions) == len(batch)
+        except Exception as e:
+            for _request, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_request, future, _), action in zip(batch, actions):
+            if not future.done():
+                future.set_result(action)
+
+    def decide_now(self, request: PendingDecision) -> Any:
+        """
+        Ask the backend for a single decision without batching, for use outside of an
+        event loop.
+        """
+        actions = self.backend([request])
+        if inspect.isawaitable(actions):
+            actions = asyncio.run(_await(actions))
+        return actions[0]
+
+
+async def _await(awaitable: Awaitable):
+    return await awaitable
+
+
+class BatchingPlayer(Player):
+    """
+    Player that forwards its decisions to a DecisionBatcher, usually shared by all
+    seats of all games that an AsyncGame/GameHost runs. The observation sent along is
+    the event history of the player, override observation() to send something else.
+    """
+
+    def __init__(self, pid, name, batcher: DecisionBatcher, **kwargs):
+        super().__init__(pid, name, **kwargs)
+        self.batcher = batcher
+
+    def inform_event(self, event: Event, **kwargs):
+        self.history.append((event, kwargs))
+
+    def personal_event(self, event: Event, **kwargs):
+        self.history.append((event, kwargs))
+
+    def observation(self) -> Any:
+        return tuple(self.history)
+
+    def pending_decision(self, event_type: Event, **kwargs) -> PendingDecision:
+        return PendingDecision(
+            self.pid,
+            event_type,
+            self.observation(),
+            self.board.get_legal_options(event_type, **kwargs),
+            kwargs,
+        )
+
+    def perform_action(self, event_type: Event, **kwargs) -> tuple[Any, dict]:
+        request = self.pending_decision(event_type, **kwargs)
+        return self.batcher.decide_now(request), {}
+
+    async def aperform_action(self, event_type: Event, **kwargs) -> tuple[Any, dict]:
+        request = self.pending_decision(event_type, **kwargs)
+        return await self.batcher.submit(request), {}
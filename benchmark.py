@@ -0,0 +1,237 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import tracemalloc
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sh_game.baselines.manager import BaselineManager
+from sh_game.baselines.player import BaselinePlayer
+from sh_game.game import Decision, Game
+from sh_game.manager import Manager
+from sh_game.player import Player
+from sh_game.types.event_types import Event
+
+# Metric -> True if larger values are better, used by compare
+METRICS = {
+    "games_per_sec": True,
+    "decisions_per_sec": True,
+    "engine_us_per_decision": False,
+    "agent_us_per_decision": False,
+    "peak_memory_per_game": False,
+}
+
+
+class StubPlayer(Player):
+    """
+    Player that receives no events. The benchmark answers its decisions directly
+    from the legal options, so almost all measured time is spent in the engine.
+    """
+
+    subscribed_events = frozenset()
+
+    def inform_event(self, event: Event, **kwargs):
+        pass
+
+    def personal_event(self, event: Event, **kwargs):
+        pass
+
+    def perform_action(self, event_type: Event, **kwargs):
+        # Only reached outside the benchmark loop, e.g. when the game is run directly
+        options = self.board.get_legal_options(event_type, **kwargs)
+        return ("" if options is None else self.rng.choice(options)), {}
+
+
+class StubManager(Manager):
+    subscribed_events = frozenset()
+
+    def inform_event(self, event: Event, **kwargs):
+        pass
+
+    def personal_event(self, event: Event, player: Player = None, **kwargs):
+        pass
+
+    def get_next_action(self):
+        legals = self.board.get_legal_actions()
+        event = self.rng.choice(list(legals))
+        return event, self.rng.choice(legals[event])
+
+
+def stub_answer(game: Game, decision: Decision) -> Tuple[Any, Optional[dict]]:
+    """
+    Uniformly random legal answer, read from the options of the decision
+    """
+    options, rng = decision.options, game.rng
+    if decision.pid is None:
+        event = rng.choice(list(options))
+        return (event, rng.choice(options[event])), None
+    if options is None:
+        return "", None
+    return options[rng.randrange(len(options))], None
+
+
+def _make_game(agent: str, num_players: int, rng: random.Random) -> Game:
+    if agent == "stub":
+        players = [StubPlayer(pid, "stub") for pid in range(num_players)]
+        return Game(StubManager(), players, rng=rng)
+    players = [BaselinePlayer(pid, "baseline") for pid in range(num_players)]
+    return Game(BaselineManager(verbose=False), players, rng=rng)
+
+
+def _answer_fn(agent: str) -> Callable[[Game, Decision], Tuple[Any, Optional[dict]]]:
+    if agent == "stub":
+        return stub_answer
+    return lambda game, decision: game.decide(decision)
+
+
+def _play(game: Game, answer) -> Tuple[int, float]:
+    """
+    Play one game, returns the number of decisions and the time spent answering them
+    """
+    decisions, agent_time = 0, 0.0
+    decision = game.reset()
+    while decision is not None:
+        started = perf_counter()
+        action, hint = answer(game, decision)
+        agent_time += perf_counter() - started
+        decisions += 1
+        decision = game.step(action, hint)
+    return decisions, agent_time
+
+
+def measure(
+    agent: str, num_players: int, num_games: int, seed: int, memory_games: int = 20
+) -> Dict[str, float]:
+    game = _make_game(agent, num_players, random.Random(seed))
+    answer = _answer_fn(agent)
+    for _ in range(min(10, num_games)):
+        _play(game, answer)
+
+    decisions, agent_time = 0, 0.0
+    started = perf_counter()
+    for _ in range(num_games):
+        num, spent = _play(game, answer)
+        decisions += num
+        agent_time += spent
+    total = perf_counter() - started
+
+    # tracemalloc slows the engine down, so memory is measured in a separate run
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(memory_games):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            _play(game, answer)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "games": num_games,
+        "decisions": decisions,
+        "games_per_sec": num_games / total,
+        "decisions_per_sec": decisions / total,
+        "engine_us_per_decision": (total - agent_time) / decisions * 1e6,
+        "agent_us_per_decision": agent_time / decisions * 1e6,
+        "peak_memory_per_game": max(peaks, default=0),
+    }
+
+
+def run_benchmark(
+    agents: Sequence[str] = ("stub", "baseline"),
+    seat_counts: Sequence[int] = (5, 6, 7, 8, 9, 10),
+    num_games: int = 1000,
+    seed: int = 0,
+    memory_games: int = 20,
+) -> dict:
+    results = {
+        agent: {
+            str(n): measure(agent, n, num_games, seed + n, memory_games)
+            for n in seat_counts
+        }
+        for agent in agents
+    }
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    baseline: dict, current: dict, tolerance: float = 0.1
+) -> List[Tuple[str, str, str, float, float]]:
+    """
+    Regressions of current against baseline by more than tolerance (relative), as
+    (agent, num_players, metric, baseline value, current value) tuples
+    """
+    regressions = []
+    for agent, by_players in current["results"].items():
+        for num_players, metrics in by_players.items():
+            old = baseline["results"].get(agent, {}).get(num_players)
+            if old is None:
+                continue
+            for metric, higher_is_better in METRICS.items():
+                if metric not in old or not old[metric]:
+                    continue
+                change = metrics[metric] / old[metric] - 1
+                if (-change if higher_is_better else change) > tolerance:
+                    regressions.append(
+                        (agent, num_players, metric, old[metric], metrics[metric])
+                    )
+    return regressions
+
+
+def _print_results(result: dict):
+    print(
+        f"{'agent':<9}{'players':>8}{'games/s':>10}{'decisions/s':>13}"
+        f"{'engine us':>11}{'agent us':>10}{'peak KiB':>10}"
+    )
+    for agent, by_players in result["results"].items():
+        for num_players, m in by_players.items():
+            print(
+                f"{agent:<9}{num_players:>8}{m['games_per_sec']:>10.1f}"
+                f"{m['decisions_per_sec']:>13.0f}{m['engine_us_per_decision']:>11.2f}"
+                f"{m['agent_us_per_decision']:>10.2f}"
+                f"{m['peak_memory_per_game'] / 1024:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Engine throughput benchmark")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seats", type=int, nargs="+", default=[5, 6, 7, 8, 9, 10])
+    parser.add_argument(
+        "--agents",
+        nargs="+",
+        default=["stub", "baseline"],
+        choices=["stub", "baseline"],
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory-games", type=int, default=20)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    result = run_benchmark(
+        args.agents, args.seats, args.games, args.seed, args.memory_games
+    )
+    _print_results(result)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), result, args.tolerance)
+        for agent, num_players, metric, old, new in regressions:
+            print(f"REGRESSION {agent} {num_players}p {metric}: {old:.3g} -> {new:.3g}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
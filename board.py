@@ -1,29 +1,79 @@
+import random
 import uuid
-from random import shuffle
-from typing import Dict, List
+from itertools import product
+from typing import Dict, List, Optional
+
+import numpy as np
 
 from sh_game.game_settings import GameSettings
 from sh_game.player import Player
+from sh_game.policy_deck import PolicyDeck
 from sh_game.types.event_types import Event
 
+CLAIMS = {
+    num: [list(hand) for hand in product(("fascist", "liberal"), repeat=num)]
+    for num in (2, 3)
+}
+
+
+# Events the manager can choose, in the row order of Board.legal_action_mask
+MANAGER_EVENTS = (
+    Event.MESSAGE,
+    Event.VOTES,
+    Event.NOMINATION,
+    Event.PRESIDENT_CLAIM,
+    Event.CHANCELLOR_CLAIM,
+    Event.INVESTIGATION_ACTION,
+    Event.INVESTIGATION_CLAIM,
+    Event.PEEK_CLAIM,
+    Event.EXECUTE_ACTION,
+    Event.SPECIAL_ELECT_ACTION,
+)
+MANAGER_EVENT_IDX = {event: idx for idx, event in enumerate(MANAGER_EVENTS)}
+
+
+def _unique(options):
+    unique = []
+    for option in options:
+        if option not in unique:
+            unique.append(option)
+    return unique
+
 
 class Board:
-    def __init__(self, settings: GameSettings, players: List[Player]):
+    def __init__(
+        self,
+        settings: GameSettings,
+        players: List[Player],
+        rng: Optional[random.Random] = None,
+    ):
+        self._legal_actions: Optional[Dict[Event, List[int]]] = None
+        self._next_president: Optional[Player] = None
+        self._mask_of: Optional[Dict[Event, List[int]]] = None
         self.settings = settings
         self.shuffle_callback = None
+        self.rng = random.Random() if rng is None else rng
 
         self.players: List[Player] = players
         for player in self.players:
             player.board = self
+            player.rng = self.rng
+        self._mask = np.zeros((len(MANAGER_EVENTS), len(players)), dtype=bool)
+        self.policies = PolicyDeck(
+            settings.num_liberal_cards + settings.num_fascist_cards
+        )
         self.setup_new_game()
 
     def setup_new_game(self):
-        self.policies = ["liberal"] * self.settings.num_liberal_cards + [
+        policies = ["liberal"] * self.settings.num_liberal_cards + [
             "fascist"
         ] * self.settings.num_fascist_cards
-        shuffle(self.policies)
-        shuffle(self.players)
-        game_id = uuid.uuid4()
+        self.rng.shuffle(policies)
+        if len(self.policies.cards) != len(policies):
+            self.policies = PolicyDeck(len(policies))
+        self.policies.set(policies)
+        self.rng.shuffle(self.players)
+        game_id = uuid.UUID(int=self.rng.getrandbits(128), version=4)
         for i, p in enumerate(self.players):
             p.reset(i)
             p.game_id = game_id
@@ -34,9 +84,11 @@ class Board:
             + ["hitler"]
         )
         assert len(roles) == len(self.players)
-        shuffle(roles)
+        self.rng.shuffle(roles)
         for p, r in zip(self.players, roles):
             p.role = r
+        self.hitler: Player = next(p for p in self.players if p.role == "hitler")
+        self.num_alive = len(self.players)
 
         self.liberal_track = 0
         self.fascist_track = self.settings.fascist_pre_enact
@@ -61,12 +113,15 @@ class Board:
         self.action_done: bool = False
         self.phase: int = 0
         self.round_number: int = 0
+        self.invalidate()
 
-    @property
-    def hitler(self):
-        for p in self.players:
-            if p.role == "hitler":
-                return p
+    def invalidate(self):
+        """
+        Drop the cached legal actions and next president. The Board methods that
+        change the state call it, code that assigns board fields directly must too.
+        """
+        self._legal_actions = None
+        self._next_president = None
 
     @property
     def tracks(self):
@@ -78,27 +133,35 @@ class Board:
 
     @property
     def alive_players(self):
-        return sum(not x.is_dead for x in self.players)
+        return self.num_alive
 
-    def draw_policy(self, num) -> str:
-        drawn = self.peek_policy(num)
-        self.policies = self.policies[num:]
-        return drawn
+    def kill(self, player: Player):
+        assert not player.is_dead
+        player.is_dead = True
+        self.num_alive -= 1
+        self.invalidate()
 
-    def peek_policy(self, num) -> str:
-        if len(self.policies) >= num:
-            return self.policies[:num]
-        else:
-            # The discarded policies and the remaining policies are shuffled together
-            self.policies = self.policies + self.discards
-            shuffle(self.policies)
-            if self.shuffle_callback is not None:
-                self.shuffle_callback()
-            self.discards = []
-            assert len(self.policies) > num
-            return self.peek_policy(num)
+    def draw_policy(self, num) -> List[str]:
+        if len(self.policies) < num:
+            self._reshuffle()
+        return self.policies.draw(num)
+
+    def peek_policy(self, num) -> List[str]:
+        if len(self.policies) < num:
+            self._reshuffle()
+        return self.policies.peek(num)
+
+    def _reshuffle(self):
+        # The discarded policies and the remaining policies are shuffled together
+        policies = list(self.policies) + self.discards
+        self.rng.shuffle(policies)
+        self.policies.set(policies)
+        if self.shuffle_callback is not None:
+            self.shuffle_callback()
+        self.discards = []
 
     def enact_policy(self, policy):
+        self.invalidate()
         if policy == "liberal":
             self.liberal_track += 1
             if self.liberal_track == self.settings.liberal_track_length:
@@ -114,13 +177,16 @@ class Board:
         self.ex_chancellor = self.chancellor
         self.chancellor = chancellor
         self.phase = 1
+        self.invalidate()
 
     def on_vote(self):
         self.action_type = None
         self.action_done = False
         self.phase = 2
+        self.invalidate()
 
     def vote_failed(self):
+        self.invalidate()
         # Nothing to claim if vote failed
         self.discard_claimed = True
         self.action_claimed = True
@@ -142,8 +208,14 @@ class Board:
         self.term_blocked = [self.chancellor]
         if self.alive_players > 5:
             self.term_blocked.append(self.president)
+        self.invalidate()
 
     def compute_next_president(self) -> Player:
+        if self._next_president is None:
+            self._next_president = self._compute_next_president()
+        return self._next_president
+
+    def _compute_next_president(self) -> Player:
         assert self.president is not None
         if self.special_elect_choice is not None:
             return self.special_elect_choice
@@ -165,6 +237,7 @@ class Board:
         if self.special_elect_choice is not None:
             self.special_elect_return_president = return_pres
         self.special_elect_choice = None
+        self.invalidate()
 
     def get_legal_nominations(self):
         return [
@@ -178,7 +251,65 @@ class Board:
     def get_legal_to_act_on(self):
         return [x for x in self.players if (not x.is_dead and not x is self.president)]
 
+    def get_legal_options(self, event: Event, hand: Optional[List[str]] = None, **_):
+        """
+        Legal answers of a player to perform_action(event, hand=hand).
+        None means the answer is not restricted (chat messages).
+        """
+        if event == Event.NOMINATION:
+            return self.get_legal_nominations()
+        elif event in (
+            Event.INVESTIGATION_ACTION,
+            Event.EXECUTE_ACTION,
+            Event.SPECIAL_ELECT_ACTION,
+        ):
+            return self.get_legal_to_act_on()
+        elif event == Event.PERSONAL_VOTE:
+            return ["ja", "nein"]
+        elif event in (Event.CHANCELLOR_VETO, Event.PRESIDENT_VETO):
+            return [True, False]
+        elif event == Event.DISCARD:
+            # (kept cards, discarded card)
+            return _unique(
+                (hand[:i] + hand[i + 1 :], hand[i]) for i in range(len(hand))
+            )
+        elif event == Event.PLAY_CARD:
+            # (enacted card, discarded card)
+            return _unique((hand[i], hand[1 - i]) for i in range(2))
+        elif event in (Event.PRESIDENT_CLAIM, Event.PEEK_CLAIM):
+            return CLAIMS[3]
+        elif event == Event.CHANCELLOR_CLAIM:
+            return CLAIMS[2]
+        elif event == Event.INVESTIGATION_CLAIM:
+            return ["fascist", "liberal"]
+        return None
+
     def get_legal_actions(self) -> Dict[Event, List[int]]:
+        """
+        Legal manager actions as {event: [pid, ...]}. The result is cached until the
+        board changes and shared between callers, it must not be modified.
+        """
+        if self._legal_actions is None:
+            self._legal_actions = self._compute_legal_actions()
+        return self._legal_actions
+
+    def legal_action_mask(self) -> np.ndarray:
+        """
+        get_legal_actions as a read-only (len(MANAGER_EVENTS), num_players) bool array.
+        The same array is refilled in place whenever the legal actions change.
+        """
+        legals = self.get_legal_actions()
+        if self._mask_of is not legals:
+            mask = self._mask
+            mask.flags.writeable = True
+            mask[:] = False
+            for event, pids in legals.items():
+                mask[MANAGER_EVENT_IDX[event], pids] = True
+            mask.flags.writeable = False
+            self._mask_of = legals
+        return self._mask
+
+    def _compute_legal_actions(self) -> Dict[Event, List[int]]:
         if self.phase == 1:
             legals = {
                 Event.VOTES: [0],
@@ -0,0 +1,192 @@
+from typing import TYPE_CHECKING, Optional
+
+from sh_game.types.int_codes import (
+    FASCIST,
+    HITLER,
+    NO_SEAT,
+    ROLE_CODES,
+    ROLE_NAMES,
+)
+
+if TYPE_CHECKING:
+    from sh_game.board import Board
+    from sh_game.player import Player
+
+
+def _seat(player: Optional["Player"]) -> int:
+    return NO_SEAT if player is None else player.pid
+
+
+class BoardState:
+    """
+    Compact copy of the state of a Board.
+
+    Seats are integer indices into Board.players, sets of seats are bitmasks and the
+    remaining deck is a bytes object of card codes with the top card first. Immutable
+    members are shared between clones, so clone() only copies a handful of ints.
+    """
+
+    __slots__ = (
+        "settings",
+        "num_players",
+        "roles",
+        "hitler",
+        "alive",
+        "term_blocked",
+        "president",
+        "chancellor",
+        "ex_president",
+        "ex_chancellor",
+        "special_elect_return_president",
+        "special_elect_choice",
+        "inv_target",
+        "deck",
+        "discard_lib",
+        "discard_fasc",
+        "liberal_track",
+        "fascist_track",
+        "failed_election_tracker",
+        "discard_claimed",
+        "play_card_claimed",
+        "action_claimed",
+        "action_type",
+        "action_done",
+        "phase",
+        "round_number",
+    )
+
+    def clone(self) -> "BoardState":
+        state = BoardState.__new__(BoardState)
+        for name in BoardState.__slots__:
+            setattr(state, name, getattr(self, name))
+        return state
+
+    @classmethod
+    def from_board(cls, board: "Board") -> "BoardState":
+        state = cls.__new__(cls)
+        state.settings = board.settings
+        state.num_players = len(board.players)
+        state.roles = bytes(ROLE_CODES[p.role] for p in board.players)
+        state.hitler = board.hitler.pid
+        state.alive = 0
+        for p in board.players:
+            if not p.is_dead:
+                state.alive |= 1 << p.pid
+        state.term_blocked = 0
+        for p in board.term_blocked:
+            state.term_blocked |= 1 << p.pid
+        state.president = _seat(board.president)
+        state.chancellor = _seat(board.chancellor)
+        state.ex_president = _seat(board.ex_president)
+        state.ex_chancellor = _seat(board.ex_chancellor)
+        state.special_elect_return_president = _seat(
+            board.special_elect_return_president
+        )
+        state.special_elect_choice = _seat(board.special_elect_choice)
+        state.inv_target = _seat(board.inv_target)
+        state.deck = board.policies.codes()
+        state.discard_fasc = board.discards.count("fascist")
+        state.discard_lib = len(board.discards) - state.discard_fasc
+        state.liberal_track = board.liberal_track
+        state.fascist_track = board.fascist_track
+        state.failed_election_tracker = board.failed_election_tracker
+        state.discard_claimed = board.discard_claimed
+        state.play_card_claimed = board.play_card_claimed
+        state.action_claimed = board.action_claimed
+        state.action_type = board.action_type
+        state.action_done = board.action_done
+        state.phase = board.phase
+        state.round_number = board.round_number
+        return state
+
+    def to_board(self, board: "Board"):
+        """
+        Write this state into a Board that seats the same number of players.
+        """
+        players = board.players
+        assert len(players) == self.num_players
+
+        def player(seat: int) -> Optional["Player"]:
+            return None if seat == NO_SEAT else players[seat]
+
+        for seat, p in enumerate(players):
+            p.pid = seat
+            p.role = ROLE_NAMES[self.roles[seat]]
+            p.is_dead = not self.is_alive(seat)
+        board.hitler = players[self.hitler]
+        board.num_alive = self.num_alive
+        board.term_blocked = [p for p in players if self.term_blocked >> p.pid & 1]
+        board.president = player(self.president)
+        board.chancellor = player(self.chancellor)
+        board.ex_president = player(self.ex_president)
+        board.ex_chancellor = player(self.ex_chancellor)
+        board.special_elect_return_president = player(
+            self.special_elect_return_president
+        )
+        board.special_elect_choice = player(self.special_elect_choice)
+        board.inv_target = player(self.inv_target)
+        board.policies.set_codes(self.deck)
+        board.discards = ["liberal"] * self.discard_lib + [
+            "fascist"
+        ] * self.discard_fasc
+        board.liberal_track = self.liberal_track
+        board.fascist_track = self.fascist_track
+        board.failed_election_tracker = self.failed_election_tracker
+        board.discard_claimed = self.discard_claimed
+        board.play_card_claimed = self.play_card_claimed
+        board.action_claimed = self.action_claimed
+        board.action_type = self.action_type
+        board.action_done = self.action_done
+        board.phase = self.phase
+        board.round_number = self.round_number
+        board.invalidate()
+
+    @property
+    def num_alive(self) -> int:
+        return self.alive.bit_count()
+
+    @property
+    def all_seats(self) -> int:
+        return (1 << self.num_players) - 1
+
+    def is_alive(self, seat: int) -> bool:
+        return bool(self.alive >> seat & 1)
+
+    def is_fascist_team(self, seat: int) -> bool:
+        return self.roles[seat] in (FASCIST, HITLER)
+
+    @property
+    def deck_fasc(self) -> int:
+        return sum(self.deck)
+
+    @property
+    def deck_lib(self) -> int:
+        return len(self.deck) - self.deck_fasc
+
+    @property
+    def can_veto(self) -> bool:
+        return self.settings.fascist_track_length - self.fascist_track == 1
+
+    def legal_nominations(self) -> int:
+        return self.alive & ~self.term_blocked & ~(1 << self.president)
+
+    def legal_to_act_on(self) -> int:
+        return self.alive & ~(1 << self.president)
+
+    def __repr__(self):
+        return (
+            f"BoardState(lib:{self.liberal_track}, fasc:{self.fascist_track}, "
+            f"pres:{self.president}, chanc:{self.chancellor}, "
+            f"alive:{self.alive:0{self.num_players}b})"
+        )
+
+
+def seats_of(mask: int) -> list[int]:
+    seats = []
+    seat = 0
+    while mask:
+        if mask & 1:
+            seats.append(seat)
+        mask >>= 1
+        seat += 1
+    return seats
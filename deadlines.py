@@ -0,0 +1,248 @@
+import asyncio
+import copy
+import queue
+import random
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sh_game.histogram import Histogram
+from sh_game.types.event_types import Event
+from sh_game.types.int_codes import NO_SEAT
+
+if TYPE_CHECKING:
+    from sh_game.board import Board
+    from sh_game.game import Decision, Game
+
+Answer = Tuple[Any, Optional[dict]]
+
+
+def fallback_answer(
+    game: "Game", decision: "Decision", default_vote: str = "ja"
+) -> Answer:
+    """
+    Legal answer to decision that needs no agent: a random legal nomination or power
+    target, default_vote, no veto, an empty chat message, a random legal claim or
+    policy. The manager moves the game on if it can instead of letting someone chat.
+    """
+    options = decision.options
+    if decision.pid is None:
+        events = [event for event in options if event != Event.MESSAGE]
+        event = events[0] if events else Event.MESSAGE
+        return (event, game.rng.choice(options[event])), None
+    if decision.event == Event.PERSONAL_VOTE:
+        return default_vote, {}
+    if decision.event in (Event.CHANCELLOR_VETO, Event.PRESIDENT_VETO):
+        return False, {}
+    if options is None:
+        return "", {}
+    return game.rng.choice(options), {}
+
+
+def board_snapshot(board: "Board", rng: random.Random) -> "Board":
+    """
+    Copy of board with its own containers and rng, which the engine does not touch.
+    The Player objects, and with them deaths and roles, are still shared.
+    """
+    snapshot = copy.copy(board)
+    snapshot.__dict__.update(
+        players=list(board.players),
+        discards=list(board.discards),
+        term_blocked=list(board.term_blocked),
+        policies=copy.deepcopy(board.policies),
+        _mask=board._mask.copy(),
+        rng=rng,
+    )
+    return snapshot
+
+
+class _AgentThread:
+    # Daemon thread that runs the limited calls of one agent, a hung agent does not
+    # keep the interpreter from exiting
+    def __init__(self):
+        self.calls: queue.SimpleQueue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            item = self.calls.get()
+            if item is None:
+                return
+            future, call = item
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(call())
+                except BaseException as exc:
+                    future.set_exception(exc)
+
+    def submit(self, call: Callable[[], Answer]) -> Future:
+        future: Future = Future()
+        self.calls.put((future, call))
+        return future
+
+    def stop(self):
+        self.calls.put(None)
+
+
+class Deadlines:
+    """
+    Time limits for the decisions of a Game, in seconds per Event (Event.NOOP for the
+    manager) or default for all others, None for no limit.
+
+    A limited decision runs in a daemon thread of its agent, on a board_snapshot and
+    with a private Random seeded from the game's rng, so a late call neither sees the
+    engine move on nor changes the random numbers of a seeded game. If it is not
+    answered in time, the game goes on with fallback_answer and broadcasts
+    Event.TIMEOUT. The late answer is dropped, and until the call returns the agent
+    misses all its decisions (limit 0 in the TIMEOUT of unlimited ones) instead of
+    queueing them; its events still arrive meanwhile. AsyncGame cancels late
+    coroutines instead, which only interrupts agents that await.
+    Per seat (None for the manager) it keeps latency histograms of all decisions and
+    the number of missed deadlines per Event.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[Event, float]] = None,
+        default: Optional[float] = None,
+        default_vote: str = "ja",
+    ):
+        self.limits = dict(limits or {})
+        self.default = default
+        self.default_vote = default_vote
+        self.latency: Dict[Optional[int], Histogram] = defaultdict(Histogram)
+        self.misses: Dict[Optional[int], Dict[Event, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        self._threads: Dict[int, _AgentThread] = {}
+        # Late calls by agent and how to give the agent the live board back
+        self._late: Dict[int, Tuple[Future, Callable[[], None]]] = {}
+        self._swap_lock = threading.Lock()
+
+    def limit(self, event: Event) -> Optional[float]:
+        return self.limits.get(event, self.default)
+
+    def _thread(self, agent: Any) -> _AgentThread:
+        thread = self._threads.get(id(agent))
+        if thread is None:
+            thread = self._threads[id(agent)] = _AgentThread()
+        return thread
+
+    def decide(
+        self, game: "Game", decision: "Decision", call: Callable[[], Answer]
+    ) -> Answer:
+        """
+        call() within the limit of decision, else the fallback answer
+        """
+        limit = self.limit(decision.event)
+        started = perf_counter()
+        if decision.pid is None:
+            agent = game.manager
+        else:
+            agent = game.board.players[decision.pid]
+        if not self._settle(agent):
+            # Still busy with a late call, 0 stands for decisions without a limit
+            answer = self.missed(game, decision, 0.0 if limit is None else limit)
+        elif limit is None:
+            answer = call()
+        else:
+            answer = self._limited(game, decision, call, agent, limit)
+        self.latency[decision.pid].add(perf_counter() - started)
+        return answer
+
+    def _settle(self, agent: Any) -> bool:
+        """
+        Whether the late call of agent, if any, has returned, the agent is then back
+        on the live board
+        """
+        late = self._late.get(id(agent))
+        if late is None:
+            return True
+        future, restore = late
+        if not future.done():
+            return False
+        restore()
+        del self._late[id(agent)]
+        return True
+
+    def _limited(
+        self,
+        game: "Game",
+        decision: "Decision",
+        call: Callable[[], Answer],
+        agent: Any,
+        limit: float,
+    ) -> Answer:
+        board = game.board
+        rng = random.Random(game.rng.getrandbits(64))
+        snapshot = board_snapshot(board, rng)
+        with self._swap_lock:
+            agent.board, agent.rng = snapshot, rng
+
+        def restore(_future: Optional[Future] = None):
+            with self._swap_lock:
+                if agent.board is snapshot:
+                    agent.board, agent.rng = board, board.rng
+
+        future = self._thread(agent).submit(call)
+        try:
+            answer = future.result(timeout=limit)
+        except FutureTimeout:
+            self._late[id(agent)] = (future, restore)
+            # Back on the live board as soon as the late call returns
+            future.add_done_callback(restore)
+            return self.missed(game, decision, limit)
+        finally:
+            if future.done():
+                restore()
+        return answer
+
+    async def adecide(
+        self, game: "Game", decision: "Decision", call: Awaitable[Answer]
+    ) -> Answer:
+        limit = self.limit(decision.event)
+        started = perf_counter()
+        if limit is None:
+            answer = await call
+        else:
+            try:
+                answer = await asyncio.wait_for(call, limit)
+            except asyncio.TimeoutError:
+                answer = self.missed(game, decision, limit)
+        self.latency[decision.pid].add(perf_counter() - started)
+        return answer
+
+    def missed(self, game: "Game", decision: "Decision", limit: float) -> Answer:
+        self.misses[decision.pid][decision.event] += 1
+        game.broadcast(
+            Event.TIMEOUT,
+            player=NO_SEAT if decision.pid is None else decision.pid,
+            decision=decision.event,
+            limit=limit,
+        )
+        return fallback_answer(game, decision, self.default_vote)
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Latency summary and missed deadlines by seat ("manager" for the manager)
+        """
+        seats = sorted(
+            set(self.latency) | set(self.misses), key=lambda s: -1 if s is None else s
+        )
+        return {
+            "manager" if seat is None else str(seat): {
+                **self.latency[seat].summary(),
+                "misses": {e.value: n for e, n in self.misses[seat].items()},
+            }
+            for seat in seats
+        }
+
+    def close(self):
+        for thread in self._threads.values():
+            thread.stop()
+        self._threads.clear()
+        self._late.clear()
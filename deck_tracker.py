@@ -0,0 +1,232 @@
+from functools import lru_cache
+from math import comb
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from sh_game.game_settings import GameSettings, default_settings
+from sh_game.types.event_types import Event
+
+# Likelihoods over the number of fascists k in a draw of 3
+ANY_DRAW = np.ones(4)
+HAS_FASCIST = np.array([0.0, 1.0, 1.0, 1.0])
+HAS_LIBERAL = np.array([1.0, 1.0, 1.0, 0.0])
+
+
+@lru_cache(maxsize=None)
+def draw_table(max_cards: int, size: int) -> np.ndarray:
+    """
+    table[n, f, k]: probability of drawing k fascists with size cards from a deck of
+    n cards of which f are fascist. Computed once and shared, read-only.
+    """
+    table = np.zeros((max_cards + 1, max_cards + 1, size + 1))
+    for n in range(size, max_cards + 1):
+        total = comb(n, size)
+        for f in range(n + 1):
+            for k in range(max(0, size - (n - f)), min(size, f) + 1):
+                table[n, f, k] = comb(f, k) * comb(n - f, size - k) / total
+    table.flags.writeable = False
+    return table
+
+
+def _count(hand) -> int:
+    return sum(card == "fascist" for card in hand)
+
+
+class DeckTracker:
+    """
+    Distribution of the number of fascist policies left in the deck of one game, as
+    seen by seat pid (None for public information only).
+
+    After every DECK_SHUFFLE the deck is known exactly. Every draw removes cards of
+    unknown composition, whose likelihood is constrained by the enacted policy, by
+    claims and peeks (weighted by claim_trust) and, for the seats that saw them, by
+    the drawn, received or peeked hands. The discard pile holds all cards since the
+    last shuffle that were neither enacted nor are still in the deck.
+    Feed it records like RoleTracker, or attach it to a Game.
+    """
+
+    event_records = True
+
+    def __init__(
+        self,
+        pid: Optional[int] = None,
+        claim_trust: float = 0.5,
+        settings: Optional[GameSettings] = None,
+    ):
+        assert 0 <= claim_trust <= 1
+        self.pid = pid
+        self.claim_trust = claim_trust
+        self.settings = settings
+        self.table3: Optional[np.ndarray] = None
+        self.table1: Optional[np.ndarray] = None
+        self.deck_size = 0
+        # probs[f]: probability that f fascist policies are left in the deck
+        self.probs: Optional[np.ndarray] = None
+        # Fascists in the deck at the last shuffle and enacted since
+        self.shuffled_fascists = 0
+        self.enacted_fascists = 0
+        # Joint (fascists in deck before, fascists drawn) of the last 3 card draw,
+        # kept so that claims made after it can still update the deck
+        self.last_draw: Optional[np.ndarray] = None
+        self._next_draw = ANY_DRAW
+        self._draw_pending = False
+        self._chaos = False
+
+    def reset(self, num_players: int):
+        if self.settings is None or self.settings.num_players != num_players:
+            self.settings = default_settings(num_players)
+        num_cards = self.settings.num_fascist_cards + self.settings.num_liberal_cards
+        self.table3 = draw_table(num_cards, 3)
+        self.table1 = draw_table(num_cards, 1)
+        self._shuffled(self.settings.num_liberal_cards, self.settings.num_fascist_cards)
+        self._draw_pending = self._chaos = False
+
+    def _shuffled(self, num_lib: int, num_fasc: int):
+        self.deck_size = num_lib + num_fasc
+        self.probs = np.zeros(len(self.table3))
+        self.probs[num_fasc] = 1
+        self.shuffled_fascists = num_fasc
+        self.enacted_fascists = 0
+        self.last_draw = None
+        # Hands seen before a shuffle say nothing about the new deck
+        self._next_draw = ANY_DRAW
+
+    def attach(self, game):
+        game.bus.subscribe(self, observe_personal=True, records=True)
+
+    def detach(self, game):
+        game.bus.unsubscribe(self)
+
+    def _claim(self, consistent: np.ndarray) -> np.ndarray:
+        return self.claim_trust * consistent + (1 - self.claim_trust)
+
+    def draw(self, likelihood: np.ndarray = ANY_DRAW):
+        """
+        Remove 3 cards from the deck, likelihood[k] weights drawing k fascists
+        """
+        likelihood = likelihood * self._next_draw
+        self._next_draw = ANY_DRAW
+        joint = self.probs[:, None] * self.table3[self.deck_size] * likelihood
+        self.last_draw = joint / joint.sum()
+        self.deck_size -= 3
+        self._update_from_last_draw()
+
+    def _update_from_last_draw(self):
+        probs = np.zeros_like(self.probs)
+        for k in range(4):
+            probs[: len(probs) - k] += self.last_draw[k:, k]
+        self.probs = probs
+
+    def draw_one(self, policy: str):
+        fascist = policy == "fascist"
+        likelihood = self.table1[self.deck_size, :, int(fascist)]
+        probs = self.probs * likelihood
+        probs /= probs.sum()
+        self.probs = np.roll(probs, -1) if fascist else probs
+        self.deck_size -= 1
+        self.enacted_fascists += fascist
+        self.last_draw = None
+        self._next_draw = ANY_DRAW
+
+    def weigh_last_draw(self, likelihood: np.ndarray):
+        """
+        Update the last 3 card draw with a likelihood over its number of fascists
+        """
+        if self.last_draw is None:
+            return
+        joint = self.last_draw * likelihood
+        if not joint.any():
+            return
+        self.last_draw = joint / joint.sum()
+        self._update_from_last_draw()
+
+    def inform_record(self, event: Event, record: NamedTuple):
+        if event == Event.GAME_SETTINGS:
+            self.reset(record.num_players)
+        elif event == Event.DECK_SHUFFLE:
+            self._shuffled(record.num_lib, record.num_fasc)
+        elif event == Event.VOTES:
+            ja = sum(vote == "ja" for vote in record.votes.values())
+            self._draw_pending = 2 * ja > len(record.votes)
+        elif event == Event.CHAOS_POLICY:
+            self._chaos = True
+        elif event == Event.ENACTED:
+            fascist = record.policy == "fascist"
+            if self._chaos:
+                self.draw_one(record.policy)
+            else:
+                self.draw(HAS_FASCIST if fascist else HAS_LIBERAL)
+                self.enacted_fascists += fascist
+            self._draw_pending = self._chaos = False
+        elif event == Event.PRESIDENT_VETO:
+            if record.veto and self._draw_pending:
+                self.draw()
+                self._draw_pending = False
+        elif event == Event.PRESIDENT_CLAIM:
+            claimed = np.arange(4) == _count(record.hand)
+            self.weigh_last_draw(self._claim(claimed))
+        elif event == Event.CHANCELLOR_CLAIM:
+            received = _count(record.hand)
+            consistent = np.isin(np.arange(4), (received, received + 1))
+            self.weigh_last_draw(self._claim(consistent))
+        elif event == Event.PEEK_CLAIM:
+            claimed = np.arange(4) == _count(record.hand)
+            self._next_draw = self._next_draw * self._claim(claimed)
+
+    def personal_record(self, event: Event, pid: int, record: NamedTuple):
+        if pid != self.pid:
+            return
+        if event == Event.DRAW:
+            self._next_draw = (np.arange(4) == _count(record.hand)).astype(float)
+        elif event == Event.GET_CARD:
+            received = _count(record.hand)
+            self._next_draw = np.isin(np.arange(4), (received, received + 1)) * 1.0
+        elif event == Event.PEEK_PERSONAL:
+            self._next_draw = (np.arange(4) == _count(record.peek)).astype(float)
+
+    def deck_distribution(self) -> np.ndarray:
+        """
+        Probabilities of the number of fascists in the deck, including what is known
+        about the next draw (peeks, the own hand)
+        """
+        if self._next_draw is ANY_DRAW or self.deck_size < 3:
+            return self.probs
+        probs = self.probs * (self.table3[self.deck_size] @ self._next_draw)
+        return probs / probs.sum()
+
+    def discard_distribution(self) -> np.ndarray:
+        """
+        Probabilities of the number of fascists in the discard pile
+        """
+        probs = np.zeros_like(self.probs)
+        deck = self.deck_distribution()
+        for f in np.flatnonzero(deck):
+            probs[self.shuffled_fascists - self.enacted_fascists - f] += deck[f]
+        return probs
+
+    def draw_distribution(self, size: int = 3) -> np.ndarray:
+        """
+        Probabilities of drawing k fascists with the next size cards, for a deck that
+        does not need a reshuffle first
+        """
+        assert size in (1, 3) and self.deck_size >= size
+        if size == 1:
+            return self.deck_distribution() @ self.table1[self.deck_size]
+        probs = self.probs @ self.table3[self.deck_size] * self._next_draw
+        return probs / probs.sum()
+
+    def p_draw(self, num_fascists: int, size: int = 3) -> float:
+        return float(self.draw_distribution(size)[num_fascists])
+
+    def last_draw_distribution(self) -> Optional[np.ndarray]:
+        """
+        Posterior of the number of fascists in the last 3 card draw, e.g. to judge the
+        claims of the last government
+        """
+        if self.last_draw is None:
+            return None
+        return self.last_draw.sum(axis=0)
+
+    def expected_fascists(self) -> float:
+        return float(self.deck_distribution() @ np.arange(len(self.probs)))
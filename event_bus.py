@@ -0,0 +1,151 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from sh_game.types.event_types import Event
+
+
+class Subscription:
+    __slots__ = (
+        "recipient",
+        "events",
+        "batched",
+        "observe_personal",
+        "records",
+        "buffer",
+    )
+
+    def __init__(
+        self,
+        recipient: Any,
+        events: Optional[frozenset],
+        batched: bool,
+        observe_personal: bool,
+        records: bool,
+    ):
+        self.recipient = recipient
+        self.events = events
+        self.batched = batched
+        self.observe_personal = observe_personal
+        self.records = records
+        # Events waiting for the next flush, (event, kwargs, is_personal) tuples or,
+        # for record subscribers, (event, record, pid) with pid None for broadcasts
+        self.buffer: List[tuple] = []
+
+    def wants(self, event: Event) -> bool:
+        return self.events is None or event in self.events
+
+
+class EventBus:
+    """
+    Delivers game events to the players and managers that subscribed to them.
+
+    Events are immutable records from KWARGS_CLASSES. Record subscribers get the
+    shared record via inform_record/personal_record, all others get the fields as
+    keyword arguments of inform_event/personal_event like Player and Manager.
+    A subscription can be limited to some events, and it can be batched, in which case
+    events are collected and handed to recipient.inform_batch on flush(). The Game
+    flushes at phase boundaries and before a recipient has to decide.
+    Personal events go to the player they concern if it subscribed to them, and to
+    every observe_personal subscriber (the manager) together with the player.
+    """
+
+    def __init__(self):
+        self.subscriptions: Dict[int, Subscription] = {}
+        self._inform: Dict[Event, List[Subscription]] = {e: [] for e in Event}
+        self._observe_personal: Dict[Event, List[Subscription]] = {e: [] for e in Event}
+        self._batched: List[Subscription] = []
+
+    def subscribe(
+        self,
+        recipient: Any,
+        events: Optional[Iterable[Event]] = None,
+        batched: bool = False,
+        observe_personal: bool = False,
+        records: bool = False,
+    ) -> Subscription:
+        self.unsubscribe(recipient)
+        sub = Subscription(
+            recipient,
+            None if events is None else frozenset(events),
+            batched,
+            observe_personal,
+            records,
+        )
+        self.subscriptions[id(recipient)] = sub
+        for event in Event:
+            if sub.wants(event):
+                self._inform[event].append(sub)
+                if observe_personal:
+                    self._observe_personal[event].append(sub)
+        if batched:
+            self._batched.append(sub)
+        return sub
+
+    def unsubscribe(self, recipient: Any):
+        sub = self.subscriptions.pop(id(recipient), None)
+        if sub is None:
+            return
+        self._deliver(sub)
+        for subs in (*self._inform.values(), *self._observe_personal.values()):
+            if sub in subs:
+                subs.remove(sub)
+        if sub in self._batched:
+            self._batched.remove(sub)
+
+    def broadcast(self, event: Event, record: NamedTuple):
+        kwargs = None
+        for sub in self._inform[event]:
+            if sub.records:
+                if sub.batched:
+                    sub.buffer.append((event, record, None))
+                else:
+                    sub.recipient.inform_record(event, record)
+                continue
+            if kwargs is None:
+                kwargs = record._asdict()
+            if sub.batched:
+                sub.buffer.append((event, kwargs, False))
+            else:
+                sub.recipient.inform_event(event, **kwargs)
+
+    def personal_event(self, player: Any, event: Event, record: NamedTuple):
+        kwargs = None
+        own = self.subscriptions.get(id(player))
+        if own is not None and own.wants(event):
+            if own.records:
+                if own.batched:
+                    own.buffer.append((event, record, player.pid))
+                else:
+                    player.personal_record(event, record)
+            else:
+                kwargs = record._asdict()
+                if own.batched:
+                    own.buffer.append((event, kwargs, True))
+                else:
+                    player.personal_event(event, **kwargs)
+        for sub in self._observe_personal[event]:
+            if sub.records:
+                if sub.batched:
+                    sub.buffer.append((event, record, player.pid))
+                else:
+                    sub.recipient.personal_record(event, player.pid, record)
+                continue
+            if kwargs is None:
+                kwargs = record._asdict()
+            if sub.batched:
+                sub.buffer.append((event, {"player": player, **kwargs}, True))
+            else:
+                sub.recipient.personal_event(event, player=player, **kwargs)
+
+    def flush(self, recipient: Any = None):
+        if recipient is None:
+            for sub in self._batched:
+                self._deliver(sub)
+        else:
+            sub = self.subscriptions.get(id(recipient))
+            if sub is not None:
+                self._deliver(sub)
+
+    def _deliver(self, sub: Subscription):
+        if sub.buffer:
+            batch, sub.buffer = sub.buffer, []
+            sub.recipient.inform_batch(batch)
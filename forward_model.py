@@ -0,0 +1,354 @@
+import random
+from enum import IntEnum
+from typing import Optional, Sequence
+
+from sh_game.board_state import BoardState, seats_of
+from sh_game.types.int_codes import FASCIST, HITLER, LIBERAL, NO_SEAT
+
+# Codes of the winning team returned by a playout
+LIBERAL_TEAM = LIBERAL
+FASCIST_TEAM = FASCIST
+
+
+class Stage(IntEnum):
+    """
+    Points of a round at which a playout can start, each one waits for the decision
+    of the same name. LEGISLATION draws the president's hand first.
+    """
+
+    NOMINATION = 0
+    VOTE = 1
+    LEGISLATION = 2
+    DISCARD = 3
+    PLAY_CARD = 4
+    CHANCELLOR_VETO = 5
+    PRESIDENT_VETO = 6
+    POWER = 7
+
+
+class RolloutPolicy:
+    """
+    Cheap default decisions for playouts. Every seat plays for its team in the sampled
+    role assignment, with probability noise it decides at random instead. Liberals do
+    not use the roles of others, as they would not know them.
+    """
+
+    def __init__(self, noise: float = 0.3):
+        self.noise = noise
+
+    def nominate(self, state: BoardState, rng: random.Random) -> int:
+        candidates = seats_of(state.legal_nominations())
+        if state.is_fascist_team(state.president) and rng.random() >= self.noise:
+            if state.fascist_track >= 3 and state.hitler in candidates:
+                return state.hitler
+            team = [seat for seat in candidates if state.is_fascist_team(seat)]
+            if team:
+                return rng.choice(team)
+        return rng.choice(candidates)
+
+    def vote(self, state: BoardState, seat: int, rng: random.Random) -> bool:
+        if state.is_fascist_team(seat):
+            if state.is_fascist_team(state.president) or state.is_fascist_team(
+                state.chancellor
+            ):
+                return rng.random() >= self.noise
+            return rng.random() < 0.3
+        return rng.random() < 0.6
+
+    def _keep(self, state: BoardState, seat: int, rng: random.Random) -> int:
+        # Card code the seat wants enacted
+        if rng.random() < self.noise:
+            return rng.choice((LIBERAL, FASCIST))
+        return FASCIST if state.is_fascist_team(seat) else LIBERAL
+
+    def discard(
+        self, state: BoardState, hand: Sequence[int], rng: random.Random
+    ) -> int:
+        """
+        Index of the card in hand the president discards
+        """
+        wanted = self._keep(state, state.president, rng)
+        for idx, card in enumerate(hand):
+            if card != wanted:
+                return idx
+        return rng.randrange(len(hand))
+
+    def enact(self, state: BoardState, hand: Sequence[int], rng: random.Random) -> int:
+        """
+        Index of the card in hand the chancellor enacts
+        """
+        wanted = self._keep(state, state.chancellor, rng)
+        for idx, card in enumerate(hand):
+            if card == wanted:
+                return idx
+        return rng.randrange(len(hand))
+
+    def chancellor_veto(self, state: BoardState, card: int, rng: random.Random) -> bool:
+        return self._keep(state, state.chancellor, rng) != card
+
+    def president_veto(self, state: BoardState, card: int, rng: random.Random) -> bool:
+        return self._keep(state, state.president, rng) != card
+
+    def target(self, state: BoardState, power: str, rng: random.Random) -> int:
+        candidates = seats_of(state.legal_to_act_on())
+        if (
+            power == "execute"
+            and state.is_fascist_team(state.president)
+            and rng.random() >= self.noise
+        ):
+            liberals = [s for s in candidates if not state.is_fascist_team(s)]
+            if liberals:
+                return rng.choice(liberals)
+        return rng.choice(candidates)
+
+
+class Playout:
+    """
+    Plays a determinized BoardState to the end with the Board rules, without chat.
+
+    The state is modified in place, pass a clone. forced is the decision taken at
+    the start stage instead of asking the policy: the chancellor seat (NOMINATION),
+    the vote of forced_seat (VOTE), the index of the discarded card (DISCARD), the
+    index of the enacted card (PLAY_CARD), the veto (vetoes) and the target seat
+    (POWER). hand is the hand of the president (DISCARD, PRESIDENT_VETO) or the
+    chancellor (PLAY_CARD), card the enacted card at CHANCELLOR_VETO.
+    """
+
+    def __init__(
+        self,
+        state: BoardState,
+        rng: random.Random,
+        policy: Optional[RolloutPolicy] = None,
+    ):
+        self.state = state
+        self.rng = rng
+        self.policy = RolloutPolicy() if policy is None else policy
+        self.deck = list(state.deck)
+
+    def _draw(self, num: int) -> list:
+        if len(self.deck) < num:
+            self._reshuffle()
+        drawn, self.deck = self.deck[:num], self.deck[num:]
+        return drawn
+
+    def _reshuffle(self):
+        # Discarded and remaining policies are shuffled together
+        state = self.state
+        self.deck += [LIBERAL] * state.discard_lib + [FASCIST] * state.discard_fasc
+        self.rng.shuffle(self.deck)
+        state.discard_lib = state.discard_fasc = 0
+
+    def _discard(self, card: int):
+        if card == FASCIST:
+            self.state.discard_fasc += 1
+        else:
+            self.state.discard_lib += 1
+
+    def run(
+        self,
+        stage: Stage = Stage.NOMINATION,
+        forced=None,
+        forced_seat: int = NO_SEAT,
+        hand: Optional[Sequence[int]] = None,
+        card: Optional[int] = None,
+    ) -> int:
+        state, policy, rng = self.state, self.policy, self.rng
+        while True:
+            if stage == Stage.NOMINATION:
+                state.chancellor = (
+                    policy.nominate(state, rng) if forced is None else forced
+                )
+                forced = None
+                stage = Stage.VOTE
+
+            if stage == Stage.VOTE:
+                ja = 0
+                for seat in seats_of(state.alive):
+                    if seat == forced_seat and forced is not None:
+                        vote = forced
+                        forced = None
+                    else:
+                        vote = policy.vote(state, seat, rng)
+                    ja += 1 if vote else -1
+                if ja <= 0:
+                    winner = self._election_failed()
+                    if winner is not None:
+                        return winner
+                    self._next_president()
+                    stage = Stage.NOMINATION
+                    continue
+                if state.chancellor == state.hitler and state.fascist_track >= 3:
+                    return FASCIST_TEAM
+                state.failed_election_tracker = 0
+                state.term_blocked = 1 << state.chancellor
+                if state.num_alive > 5:
+                    state.term_blocked |= 1 << state.president
+                stage = Stage.LEGISLATION
+
+            if stage == Stage.LEGISLATION:
+                hand = self._draw(3)
+                stage = Stage.DISCARD
+
+            if stage == Stage.DISCARD:
+                hand = list(hand)
+                idx = policy.discard(state, hand, rng) if forced is None else forced
+                forced = None
+                self._discard(hand.pop(idx))
+                stage = Stage.PLAY_CARD
+
+            if stage == Stage.PLAY_CARD:
+                hand = list(hand)
+                idx = policy.enact(state, hand, rng) if forced is None else forced
+                forced = None
+                card = hand.pop(idx)
+                self._discard(hand[0])
+                stage = Stage.CHANCELLOR_VETO if state.can_veto else Stage.POWER
+
+            if stage == Stage.CHANCELLOR_VETO:
+                veto = (
+                    policy.chancellor_veto(state, card, rng)
+                    if forced is None
+                    else forced
+                )
+                forced = None
+                if veto:
+                    stage = Stage.PRESIDENT_VETO
+                else:
+                    stage = Stage.POWER
+
+            if stage == Stage.PRESIDENT_VETO:
+                if card is None:
+                    # The president does not know which of the passed cards was kept
+                    hand = list(hand)
+                    card = hand.pop(policy.enact(state, hand, rng))
+                    self._discard(hand[0])
+                vetoed = (
+                    policy.president_veto(state, card, rng)
+                    if forced is None
+                    else forced
+                )
+                forced = None
+                if vetoed:
+                    self._discard(card)
+                    winner = self._election_failed()
+                    if winner is not None:
+                        return winner
+                    self._next_president()
+                    stage = Stage.NOMINATION
+                    continue
+                stage = Stage.POWER
+
+            if stage == Stage.POWER:
+                if card is not None:
+                    winner = self._enact(card)
+                    if winner is not None:
+                        return winner
+                    power = (
+                        state.settings.fascist_track[state.fascist_track - 1]
+                        if card == FASCIST
+                        else None
+                    )
+                else:
+                    # Started at a pending power, the policy is already enacted
+                    power = state.settings.fascist_track[state.fascist_track - 1]
+                card = hand = None
+                if power is not None:
+                    winner = self._power(power, forced)
+                    if winner is not None:
+                        return winner
+                forced = None
+                self._next_president()
+                stage = Stage.NOMINATION
+
+    def _enact(self, card: int) -> Optional[int]:
+        state = self.state
+        if card == LIBERAL:
+            state.liberal_track += 1
+            if state.liberal_track == state.settings.liberal_track_length:
+                return LIBERAL_TEAM
+        else:
+            state.fascist_track += 1
+            if state.fascist_track == state.settings.fascist_track_length:
+                return FASCIST_TEAM
+        return None
+
+    def _election_failed(self) -> Optional[int]:
+        state = self.state
+        state.failed_election_tracker += 1
+        if state.failed_election_tracker < state.settings.election_tracker_size:
+            return None
+        state.failed_election_tracker = 0
+        state.term_blocked = 0
+        # Chaos: the top policy is enacted without a presidential power
+        return self._enact(self._draw(1)[0])
+
+    def _power(self, power: str, forced: Optional[int]) -> Optional[int]:
+        state = self.state
+        if power == "peek":
+            if len(self.deck) < 3:
+                self._reshuffle()
+            return None
+        target = forced
+        if target is None:
+            target = self.policy.target(state, power, self.rng)
+        if power == "execute":
+            state.alive &= ~(1 << target)
+            if target == state.hitler:
+                return LIBERAL_TEAM
+        elif power == "special_elect":
+            state.special_elect_choice = target
+        return None
+
+    def _next_president(self):
+        state = self.state
+        choice = state.special_elect_choice
+        if choice != NO_SEAT:
+            state.special_elect_return_president = state.president
+            state.president = choice
+            state.special_elect_choice = NO_SEAT
+            return
+        start = state.special_elect_return_president
+        if start == NO_SEAT:
+            start = state.president
+        state.special_elect_return_president = NO_SEAT
+        seat = (start + 1) % state.num_players
+        while not state.alive >> seat & 1:
+            seat = (seat + 1) % state.num_players
+        state.president = seat
+
+
+def playout(
+    state: BoardState,
+    rng: random.Random,
+    stage: Stage = Stage.NOMINATION,
+    policy: Optional[RolloutPolicy] = None,
+    **kwargs,
+) -> int:
+    """
+    Winning team of a playout of a clone of state, see Playout.run for kwargs
+    """
+    return Playout(state.clone(), rng, policy).run(stage, **kwargs)
+
+
+def deal(
+    state: BoardState,
+    roles: Sequence[int],
+    deck_fasc: int,
+    discard_fasc: int,
+    rng: random.Random,
+) -> BoardState:
+    """
+    Determinized clone of state with the given role codes, a random order of the
+    len(state.deck) deck cards with deck_fasc fascists, and discard_fasc fascists
+    among the discarded cards
+    """
+    det = state.clone()
+    det.roles = bytes(roles)
+    det.hitler = det.roles.index(HITLER)
+    deck = [FASCIST] * deck_fasc + [LIBERAL] * (len(state.deck) - deck_fasc)
+    rng.shuffle(deck)
+    det.deck = bytes(deck)
+    num_discards = state.discard_lib + state.discard_fasc
+    det.discard_fasc = discard_fasc
+    det.discard_lib = num_discards - discard_fasc
+    return det
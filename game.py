@@ -1,15 +1,44 @@
-import json
-from typing import List
-from uuid import uuid4
-
-from ykutil import Statlogger, log
+import logging
+import random
+from time import perf_counter
+from typing import Any, Generator, List, NamedTuple, Optional, Tuple
+from uuid import UUID
 
 from sh_game.board import Board
-from sh_game.game_settings import GameSettings
+from sh_game.deadlines import Deadlines
+from sh_game.event_bus import EventBus
+from sh_game.game_settings import GameSettings, default_settings
+from sh_game.instrumentation import EVENT, PHASE, Instrumentation
 from sh_game.manager import Manager
 from sh_game.player import Player
 from sh_game.types.event_types import PRESIDENT_POWERS, Event
 from sh_game.types.game_end_types import GameEnd
+from sh_game.types.kwargs_classes import KWARGS_CLASSES
+
+logger = logging.getLogger(__name__)
+
+# Chat messages in a row after which the manager's next message ends a chat phase
+MAX_CHAT_STREAK = 40
+
+
+class Decision(NamedTuple):
+    """
+    A decision the game waits for.
+
+    pid is None for decisions of the manager, which answers with an (Event, pid) tuple
+    chosen from options (Board.get_legal_actions). Otherwise the player with pid answers
+    event like Player.perform_action(event, **kwargs) would. options lists the legal
+    answers, or is None if the answer is free (chat messages).
+    """
+
+    pid: Optional[int]
+    event: Event
+    options: Any
+    kwargs: dict
+
+
+# Decision generators yield Decisions and get sent (action, hint) tuples back
+Flow = Generator[Decision, Tuple[Any, dict], Any]
 
 
 class Game:
@@ -19,27 +48,124 @@ class Game:
         players: List[Player],
         time_logging_file=None,
         verbose=False,
+        rng: Optional[random.Random] = None,
+        settings: Optional[GameSettings] = None,
+        instruments: Optional[Instrumentation] = None,
+        deadlines: Optional[Deadlines] = None,
     ):
-        settings = GameSettings.get_settings(
-            len(players), is_rebalanced=len(players) in (6, 7, 9)
-        )
-        self.board = Board(settings, players)
+        if settings is None:
+            settings = default_settings(len(players))
+        assert settings.num_players == len(players)
+        self.rng = random.Random() if rng is None else rng
+        self.board = Board(settings, players, rng=self.rng)
         self.board.shuffle_callback = self.on_shuffle
         self.manager = manager
         self.manager.set_game(self)
+        self.bus = EventBus()
+        for player in players:
+            self.bus.subscribe(
+                player,
+                player.subscribed_events,
+                batched=player.batched_events,
+                records=player.event_records,
+            )
+        self.bus.subscribe(
+            manager,
+            manager.subscribed_events,
+            batched=manager.batched_events,
+            observe_personal=True,
+            records=manager.event_records,
+        )
         self.game_result: Event = None
         self.game_end_type: GameEnd = None
-        self.max_repeated_chat_messages = 40
+        self.max_repeated_chat_messages = MAX_CHAT_STREAK
         self.chat_streak = 0
         self.game_id = None
-        self.statlogger = Statlogger()
+        # Timings are only taken with instruments, time_logging_file implies them
+        if instruments is None and time_logging_file is not None:
+            instruments = Instrumentation(path=time_logging_file)
+        self.instruments = instruments
         self.time_logging_file = time_logging_file
+        self.deadlines = deadlines
+        self._timed = False  # whether the current game was sampled by instruments
         self.verbose = verbose
+        self.pending: Optional[Decision] = None
+        self._flow: Optional[Flow] = None
+        # If set, every answered decision is appended as (pid, event, action)
+        self.action_log: Optional[list] = None
 
     def run_game(self):
-        self.statlogger.start_timer("run_game")
-        self.statlogger.start_timer("setup")
-        self.game_id = str(uuid4())
+        decision = self.reset()
+        while decision is not None:
+            decision = self.step(*self.decide(decision))
+
+    def decide(self, decision: Decision) -> Tuple[Any, dict]:
+        """
+        Ask the manager or player responsible for decision.
+        """
+        started = perf_counter() if self._timed else 0.0
+        if self.deadlines is None:
+            answer = self._answer(decision)
+        else:
+            answer = self.deadlines.decide(
+                self, decision, lambda: self._answer(decision)
+            )
+        if self._timed:
+            self._record(decision.event.value, started, EVENT)
+        return answer
+
+    def _answer(self, decision: Decision) -> Tuple[Any, dict]:
+        if decision.pid is None:
+            return self.manager.get_next_action(), None
+        player = self.board.players[decision.pid]
+        return player.perform_action(decision.event, **decision.kwargs)
+
+    @property
+    def done(self) -> bool:
+        return self._flow is None
+
+    def reset(self) -> Optional[Decision]:
+        """
+        Start a new game and return the first pending decision.
+        """
+        self._flow = self._play()
+        return self._advance(None)
+
+    def step(self, action: Any, hint: Optional[dict] = None) -> Optional[Decision]:
+        """
+        Answer the pending decision and run the game until the next one.
+
+        Returns None once the game is over, the outcome is in game_result and
+        game_end_type.
+        """
+        assert self.pending is not None, "No pending decision, call reset first"
+        if self.action_log is not None:
+            self.action_log.append((self.pending.pid, self.pending.event, action))
+        return self._advance((action, hint))
+
+    def _advance(self, answer: Optional[Tuple[Any, dict]]) -> Optional[Decision]:
+        try:
+            self.pending = self._flow.send(answer)
+        except StopIteration:
+            self.pending = None
+            self._flow = None
+        return self.pending
+
+    def _ask(self, player: Player, event: Event, **kwargs) -> Flow:
+        self.bus.flush(player)
+        options = self.board.get_legal_options(event, **kwargs)
+        return (yield Decision(player.pid, event, options, kwargs))
+
+    def _ask_manager(self) -> Flow:
+        self.bus.flush(self.manager)
+        options = self.board.get_legal_actions()
+        action, _hint = yield Decision(None, Event.NOOP, options, {})
+        return action
+
+    def _play(self) -> Flow:
+        self._timed = self.instruments is not None and self.instruments.sample()
+        started = perf_counter() if self._timed else 0.0
+        self.game_id = str(UUID(int=self.rng.getrandbits(128), version=4))
         self.chat_streak = 0
         self.game_result = None
         self.game_end_type = None
@@ -54,36 +180,42 @@ class Game:
         self.inform_roles()
         self.broadcast(Event.START)
 
-        self.statlogger.stop_timer("setup")
-        self.chat_phase()  # TODO: Make this work
-        self.nominate_chancellor()
+        if self._timed:
+            self._record("setup", started)
+        yield from self.chat_phase()  # TODO: Make this work
+        yield from self.nominate_chancellor()
         self.board.phase = 1
+        self.board.invalidate()
         while 1:
-            self.chat_phase()
-            vote_success = self.voting()
+            yield from self.chat_phase()
+            vote_success = yield from self.voting()
             if vote_success:
-                self.vote_passed()
+                yield from self.vote_passed()
             else:
                 self.vote_failed()
             if self.game_result is not None:
                 break
-            self.chat_phase()
+            yield from self.chat_phase()
             if self.game_result is not None:
                 break
             self.board.set_next_president()
             self.board.round_number += 1
-            self.nominate_chancellor()
+            yield from self.nominate_chancellor()
 
         self.broadcast(self.game_result, how=self.game_end_type)
-        self.statlogger.stop_timer("run_game", average=True, summed=True)
-        if self.verbose:
-            print(self.statlogger.stats)
-        if self.time_logging_file is not None:
-            with open(self.time_logging_file, "w") as f:
-                json.dump(self.statlogger.stats, f)
-
-    def chat_phase(self):
-        self.statlogger.start_timer("chat_phase")
+        self.bus.flush()
+        if self._timed:
+            self._record("run_game", started)
+            self.instruments.game_finished()
+            if self.verbose:
+                print(self.instruments.summary())
+
+    def _record(self, name: str, started: float, category: str = PHASE):
+        self.instruments.record(category, name, perf_counter() - started)
+
+    def chat_phase(self) -> Flow:
+        started = perf_counter() if self._timed else 0.0
+        self.bus.flush()
         last_p = (
             self.board.ex_president if self.board.phase == 1 else self.board.president
         )
@@ -92,10 +224,8 @@ class Game:
         )
         move_on_event = Event.VOTES if self.board.phase == 1 else Event.NOMINATION
         while 1:
-            self.statlogger.start_timer("get_next_action")
-            event, pid = self.manager.get_next_action()
-            self.statlogger.stop_timer("get_next_action", average=True, summed=True)
-            self.statlogger.start_timer("chat_phase_act")
+            event, pid = yield from self._ask_manager()
+            act_started = perf_counter() if self._timed else 0.0
             player = self.board.players[pid]
             if event == move_on_event or (
                 event == Event.MESSAGE
@@ -105,43 +235,53 @@ class Game:
                 break
             elif event == Event.MESSAGE:
                 self.chat_streak += 1
-                msg, hint = player.perform_action(Event.MESSAGE)
+                msg, hint = yield from self._ask(player, Event.MESSAGE)
                 if msg is None:
-                    log(f"Player {player.pid} refused to send a message", level="info")
+                    logger.info(f"Player {player.pid} refused to send a message")
                 else:
-                    self.broadcast(Event.MESSAGE, player=player, message=msg, hint=hint)
+                    self.broadcast(
+                        Event.MESSAGE, player=player.pid, message=msg, hint=hint
+                    )
             elif self.board.phase > 0:
                 if event == Event.CHANCELLOR_CLAIM:
                     assert last_c is player
                     assert not self.board.play_card_claimed
-                    claim, _hint = player.perform_action(Event.CHANCELLOR_CLAIM)
-                    self.broadcast(Event.CHANCELLOR_CLAIM, hand=claim, player=player)
+                    claim, _hint = yield from self._ask(player, Event.CHANCELLOR_CLAIM)
+                    self.broadcast(
+                        Event.CHANCELLOR_CLAIM, hand=tuple(claim), player=player.pid
+                    )
                     self.board.play_card_claimed = True
+                    self.board.invalidate()
                 elif event == Event.PRESIDENT_CLAIM:
                     assert last_p is player
                     assert not self.board.discard_claimed
-                    claim, _hint = player.perform_action(Event.PRESIDENT_CLAIM)
-                    self.broadcast(Event.PRESIDENT_CLAIM, hand=claim, player=player)
+                    claim, _hint = yield from self._ask(player, Event.PRESIDENT_CLAIM)
+                    self.broadcast(
+                        Event.PRESIDENT_CLAIM, hand=tuple(claim), player=player.pid
+                    )
                     self.board.discard_claimed = True
+                    self.board.invalidate()
                 elif event in (Event.INVESTIGATION_CLAIM, Event.PEEK_CLAIM):
                     assert last_p is player
                     assert not self.board.action_claimed
                     assert self.board.action_done
-                    claim, _hint = player.perform_action(
-                        event, inved=self.board.inv_target
+                    inved = self.board.inv_target
+                    claim, _hint = yield from self._ask(
+                        player, event, inved=None if inved is None else inved.pid
                     )
                     if event == Event.INVESTIGATION_CLAIM:
                         assert self.board.action_type == Event.INVESTIGATION_ACTION
                         self.broadcast(
                             event,
-                            pres=player,
-                            inved=self.board.inv_target,
+                            pres=player.pid,
+                            inved=self.board.inv_target.pid,
                             role=claim,
                         )
                     else:
                         assert self.board.action_type == Event.PEEK_MESSAGE
-                        self.broadcast(event, hand=claim, player=player)
+                        self.broadcast(event, hand=tuple(claim), player=player.pid)
                     self.board.action_claimed = True
+                    self.board.invalidate()
                 elif (
                     self.board.phase == 2
                     and not self.board.action_done
@@ -151,11 +291,13 @@ class Game:
                     assert last_p is player
                     if event == Event.INVESTIGATION_ACTION:
                         inv: Player
-                        inv, _hint = player.perform_action(Event.INVESTIGATION_ACTION)
+                        inv, _hint = yield from self._ask(
+                            player, Event.INVESTIGATION_ACTION
+                        )
                         assert not inv.is_dead and inv is not player
                         self.board.inv_target = inv
                         self.broadcast(
-                            Event.INVESTIGATION_ACTION, pres=player, inved=inv
+                            Event.INVESTIGATION_ACTION, pres=player.pid, inved=inv.pid
                         )
                         self.personal_event(
                             player,
@@ -165,32 +307,41 @@ class Game:
                         )
                     elif event == Event.EXECUTE_ACTION:
                         kill: Player
-                        kill, _hint = player.perform_action(Event.EXECUTE_ACTION)
+                        kill, _hint = yield from self._ask(
+                            player, Event.EXECUTE_ACTION
+                        )
                         assert not kill.is_dead and kill is not player
-                        self.broadcast(Event.EXECUTE_ACTION, pres=player, targ=kill)
-                        kill.is_dead = True
+                        self.broadcast(
+                            Event.EXECUTE_ACTION, pres=player.pid, targ=kill.pid
+                        )
+                        self.board.kill(kill)
                         if kill.role == "hitler":
                             self.game_result = Event.LIBERAL_WIN
                             self.game_end_type = GameEnd.HITLER_DEAD
                             return
                     elif event == Event.SPECIAL_ELECT_ACTION:
                         chosen: Player
-                        chosen, _hint = player.perform_action(
-                            Event.SPECIAL_ELECT_ACTION
+                        chosen, _hint = yield from self._ask(
+                            player, Event.SPECIAL_ELECT_ACTION
                         )
                         assert not chosen.is_dead and chosen is not player
                         self.broadcast(
-                            Event.SPECIAL_ELECT_ACTION, old_pres=player, new_pres=chosen
+                            Event.SPECIAL_ELECT_ACTION,
+                            old_pres=player.pid,
+                            new_pres=chosen.pid,
                         )
                         self.board.special_elect_choice = chosen
                     self.board.action_done = True
+                    self.board.invalidate()
             else:
                 raise ValueError(
                     f"Manager Error: Cannot perform {event} in message phase {self.board.phase}"
                 )
 
-            self.statlogger.stop_timer("chat_phase_act", average=True, summed=True)
-        self.statlogger.stop_timer("chat_phase", average=True, summed=True)
+            if self._timed:
+                self._record("chat_phase_act", act_started)
+        if self._timed:
+            self._record("chat_phase", started)
 
     def inform_roles(self):
         for player in self.board.players:
@@ -208,47 +359,50 @@ class Game:
                 )
 
     def personal_event(self, player: Player, event_type: Event, **kwargs):
-        player.personal_event(event_type, **kwargs)
-        self.manager.personal_event(event_type, player=player, **kwargs)
+        record = KWARGS_CLASSES[event_type](**kwargs)
+        self.bus.personal_event(player, event_type, record)
 
     def broadcast(self, event_type: Event, **kwargs):
-        for player in self.board.players:
-            player.inform_event(event_type, **kwargs)
-        self.manager.inform_event(event_type, **kwargs)
+        # One immutable record per event, shared by all recipients
+        self.bus.broadcast(event_type, KWARGS_CLASSES[event_type](**kwargs))
 
     def on_shuffle(self):
         self.broadcast(
             Event.DECK_SHUFFLE,
-            num_lib=self.board.policies.count("liberal"),
-            num_fasc=self.board.policies.count("fascist"),
+            num_lib=self.board.policies.num_lib,
+            num_fasc=self.board.policies.num_fasc,
         )
 
-    def nominate_chancellor(self):
-        self.statlogger.start_timer("nominate_chancellor")
+    def nominate_chancellor(self) -> Flow:
+        started = perf_counter() if self._timed else 0.0
         chancellor: Player
-        chancellor, _hint = self.board.president.perform_action(Event.NOMINATION)
+        chancellor, _hint = yield from self._ask(self.board.president, Event.NOMINATION)
         assert (
             chancellor != self.board.president
             and chancellor not in self.board.term_blocked
             and not chancellor.is_dead
         )
-        self.broadcast(Event.NOMINATION, pres=self.board.president, chanc=chancellor)
+        self.broadcast(
+            Event.NOMINATION, pres=self.board.president.pid, chanc=chancellor.pid
+        )
         self.board.nomination(chancellor)
-        self.statlogger.stop_timer("nominate_chancellor", average=True, summed=True)
+        if self._timed:
+            self._record("nominate_chancellor", started)
 
-    def voting(self):
-        self.statlogger.start_timer("voting")
+    def voting(self) -> Flow:
+        started = perf_counter() if self._timed else 0.0
         self.board.on_vote()
         player_votes = {}
         for player in self.board.players:
             if not player.is_dead:
-                vote, _hint = player.perform_action(Event.PERSONAL_VOTE)
+                vote, _hint = yield from self._ask(player, Event.PERSONAL_VOTE)
                 assert vote in ("ja", "nein")
-                player_votes[player] = vote
+                player_votes[player.pid] = vote
                 self.personal_event(player, Event.PERSONAL_VOTE, vote=vote)
         self.broadcast(Event.VOTES, votes=player_votes)
         vote_list = list(player_votes.values())
-        self.statlogger.stop_timer("voting", average=True, summed=True)
+        if self._timed:
+            self._record("voting", started)
         return vote_list.count("ja") > vote_list.count("nein")
 
     def vote_failed(self):
@@ -274,42 +428,47 @@ class Game:
                     else GameEnd.FASCIST_CARDS
                 )
 
-    def vote_passed(self):
-        self.statlogger.start_timer("government")
+    def vote_passed(self) -> Flow:
+        started = perf_counter() if self._timed else 0.0
         if self.board.chancellor.role == "hitler" and self.board.fascist_track >= 3:
             self.game_end_type = GameEnd.HITLER_CHANCELLOR
             self.game_result = Event.FASCIST_WIN
             return
         self.board.vote_success()
         pres_draw = self.board.draw_policy(3)
-        self.personal_event(self.board.president, Event.DRAW, hand=pres_draw)
-        (take, discard), _hint = self.board.president.perform_action(
-            Event.DISCARD, hand=pres_draw
+        self.personal_event(self.board.president, Event.DRAW, hand=tuple(pres_draw))
+        (take, discard), _hint = yield from self._ask(
+            self.board.president, Event.DISCARD, hand=pres_draw
         )
         self.board.discards.append(discard)
         self.personal_event(self.board.president, Event.DISCARD, dropped_card=discard)
         self.personal_event(
-            self.board.chancellor, Event.GET_CARD, hand=take, pres=self.board.president
+            self.board.chancellor,
+            Event.GET_CARD,
+            hand=tuple(take),
+            pres=self.board.president.pid,
         )
-        (enact, discard), _hint = self.board.chancellor.perform_action(
-            Event.PLAY_CARD, hand=take
+        (enact, discard), _hint = yield from self._ask(
+            self.board.chancellor, Event.PLAY_CARD, hand=take
         )
         self.personal_event(self.board.chancellor, Event.PLAY_CARD, card=enact)
         self.board.discards.append(discard)
 
         if self.board.can_veto:
-            chanc_veto, _hint = self.board.chancellor.perform_action(
-                Event.CHANCELLOR_VETO
+            chanc_veto, _hint = yield from self._ask(
+                self.board.chancellor, Event.CHANCELLOR_VETO
             )
             self.broadcast(
-                Event.CHANCELLOR_VETO, veto=chanc_veto, player=self.board.chancellor
+                Event.CHANCELLOR_VETO, veto=chanc_veto, player=self.board.chancellor.pid
             )
             if chanc_veto:
-                pres_veto, _hint = self.board.president.perform_action(
-                    Event.PRESIDENT_VETO
+                pres_veto, _hint = yield from self._ask(
+                    self.board.president, Event.PRESIDENT_VETO
                 )
                 self.broadcast(
-                    Event.PRESIDENT_VETO, veto=pres_veto, player=self.board.president
+                    Event.PRESIDENT_VETO,
+                    veto=pres_veto,
+                    player=self.board.president.pid,
                 )
                 if pres_veto:
                     self.board.discards.append(enact)
@@ -323,7 +482,8 @@ class Game:
             maximum=self.board.settings.track_len[enact],
         )
         self.game_result = self.board.enact_policy(enact)
-        self.statlogger.stop_timer("government", average=True, summed=True)
+        if self._timed:
+            self._record("government", started)
         if self.game_result is not None:
             if self.game_result is Event.FASCIST_WIN:
                 self.game_end_type = GameEnd.FASCIST_CARDS
@@ -334,7 +494,7 @@ class Game:
             self.introduce_presidential_power()
 
     def introduce_presidential_power(self):
-        self.statlogger.start_timer("pres_power")
+        started = perf_counter() if self._timed else 0.0
         pres_power = self.board.settings.fascist_track[self.board.fascist_track - 1]
         assert self.board.action_type is None
         assert not self.board.action_done
@@ -348,7 +508,7 @@ class Game:
                 self.broadcast(Event.PEEK_MESSAGE)
                 peeked = self.board.peek_policy(3)
                 self.personal_event(
-                    self.board.president, Event.PEEK_PERSONAL, peek=peeked
+                    self.board.president, Event.PEEK_PERSONAL, peek=tuple(peeked)
                 )
                 self.board.action_type = Event.PEEK_MESSAGE
                 self.board.action_done = True
@@ -360,4 +520,6 @@ class Game:
                 self.board.action_type = Event.SPECIAL_ELECT_ACTION
             else:
                 raise ValueError("Invalid president power", pres_power)
-        self.statlogger.stop_timer("pres_power", average=True, summed=True)
+            self.board.invalidate()
+        if self._timed:
+            self._record("pres_power", started)
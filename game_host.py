@@ -0,0 +1,102 @@
+import asyncio
+from collections import Counter
+from enum import Enum
+from typing import Dict, Optional
+
+from sh_game.async_game import AsyncGame
+
+
+class GameStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    WAITING = "WAITING"
+    FINISHED = "FINISHED"
+    FAILED = "FAILED"
+
+
+class HostedGame:
+    __slots__ = ("table_id", "game", "num_games", "games_played", "done", "error")
+
+    def __init__(self, table_id: int, game: AsyncGame, num_games: int):
+        self.table_id = table_id
+        self.game = game
+        self.num_games = num_games
+        self.games_played = 0
+        self.done = False
+        self.error: Optional[BaseException] = None
+
+    @property
+    def status(self) -> GameStatus:
+        if self.error is not None:
+            return GameStatus.FAILED
+        if self.done:
+            return GameStatus.FINISHED
+        if self.game.done and self.games_played == 0:
+            return GameStatus.QUEUED
+        if self.game.num_waiting:
+            return GameStatus.WAITING
+        return GameStatus.RUNNING
+
+
+class GameHost:
+    """
+    Runs many AsyncGames as tasks of one event loop.
+
+    A game only holds the loop while the engine itself computes, whenever it awaits a
+    player or manager the next game continues. max_in_flight caps the number of
+    player/manager calls awaited at the same time over all games. max_tables bounds the
+    number of hosted tables, submit waits for a free table (backpressure).
+    """
+
+    def __init__(self, max_in_flight: int = 1024, max_tables: Optional[int] = None):
+        self.decision_limiter = asyncio.Semaphore(max_in_flight)
+        self.table_limiter = (
+            None if max_tables is None else asyncio.Semaphore(max_tables)
+        )
+        self.tables: Dict[int, HostedGame] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._next_id = 0
+
+    async def submit(self, game: AsyncGame, num_games: int = 1) -> HostedGame:
+        """
+        Host game for num_games consecutive games. Waits while all tables are taken.
+        """
+        if self.table_limiter is not None:
+            await self.table_limiter.acquire()
+        game.decision_limiter = self.decision_limiter
+        table = HostedGame(self._next_id, game, num_games)
+        self._next_id += 1
+        self.tables[table.table_id] = table
+        self._tasks[table.table_id] = asyncio.ensure_future(self._run_table(table))
+        return table
+
+    async def _run_table(self, table: HostedGame):
+        try:
+            while table.games_played < table.num_games:
+                await table.game.arun_game()
+                table.games_played += 1
+        except Exception as e:
+            table.error = e
+        finally:
+            table.done = True
+            del self._tasks[table.table_id]
+            if self.table_limiter is not None:
+                self.table_limiter.release()
+
+    def remove_finished(self):
+        for table_id in [i for i, t in self.tables.items() if t.done]:
+            del self.tables[table_id]
+
+    def status(self) -> Dict[int, GameStatus]:
+        return {table_id: table.status for table_id, table in self.tables.items()}
+
+    def status_counts(self) -> Counter:
+        return Counter(table.status for table in self.tables.values())
+
+    @property
+    def num_in_flight(self) -> int:
+        return sum(table.game.num_in_flight for table in self.tables.values())
+
+    async def join(self):
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values())
@@ -0,0 +1,258 @@
+import os
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, NamedTuple, Optional
+
+import numpy as np
+
+from sh_game.types.event_types import EVENT_IDX, IDX_EVENT, Event
+from sh_game.types.game_end_types import GameEnd
+from sh_game.types.int_codes import CARD_CODES, CARD_NAMES, NO_SEAT, ROLE_CODES
+
+if TYPE_CHECKING:
+    from sh_game.board import Board
+    from sh_game.game import Game
+
+# Every record is 8 bytes. event is an EVENT_IDX or one of the log codes below, actor
+# and target are seats (NO_SEAT if unused). The low bits of flags hold the number of
+# cards encoded in payload, PERSONAL marks events that were sent to actor only.
+LOG_DTYPE = np.dtype(
+    [
+        ("event", "u1"),
+        ("flags", "u1"),
+        ("actor", "i1"),
+        ("target", "i1"),
+        ("payload", "<u4"),
+    ]
+)
+PERSONAL = 0x80
+NUM_CARDS = 0x1F
+
+# Log only codes. A game starts with GAME_HEADER (actor: number of players, payload:
+# roles, 2 bits per seat) and DECK_ORDER (the full deck, one bit per card, top card
+# first). Every reshuffle is followed by another DECK_ORDER record.
+GAME_HEADER = 255
+DECK_ORDER = 254
+
+GAME_ENDS = list(GameEnd)
+WIN_EVENTS = (EVENT_IDX[Event.FASCIST_WIN], EVENT_IDX[Event.LIBERAL_WIN])
+
+
+def encode_cards(cards) -> int:
+    bits = 0
+    for i, card in enumerate(cards):
+        bits |= CARD_CODES[card] << i
+    return bits
+
+
+def decode_cards(bits: int, num: int) -> tuple:
+    return tuple(CARD_NAMES[bits >> i & 1] for i in range(num))
+
+
+def encode_roles(roles) -> int:
+    bits = 0
+    for seat, role in enumerate(roles):
+        bits |= ROLE_CODES[role] << 2 * seat
+    return bits
+
+
+class LogRecord(NamedTuple):
+    flags: int = 0
+    actor: int = NO_SEAT
+    target: int = NO_SEAT
+    payload: int = 0
+
+
+def _hand(hand, actor=NO_SEAT, target=NO_SEAT) -> LogRecord:
+    return LogRecord(len(hand), actor, target, encode_cards(hand))
+
+
+# Event -> function from the KWARGS_CLASSES record to the int coded LogRecord
+ENCODERS: Dict[Event, Callable[[NamedTuple], LogRecord]] = {
+    Event.GAME_SETTINGS: lambda r: LogRecord(actor=r.num_players),
+    Event.ALL_ROLE_CALLS: lambda r: LogRecord(
+        payload=sum(ROLE_CODES[role] << 2 * pid for pid, role in r.all_roles.items())
+    ),
+    Event.PERSONAL_VOTE: lambda r: LogRecord(payload=int(r.vote == "ja")),
+    Event.DRAW: lambda r: _hand(r.hand),
+    Event.DISCARD: lambda r: LogRecord(payload=CARD_CODES[r.dropped_card]),
+    Event.GET_CARD: lambda r: _hand(r.hand, target=r.pres),
+    Event.PLAY_CARD: lambda r: LogRecord(payload=CARD_CODES[r.card]),
+    Event.PEEK_PERSONAL: lambda r: _hand(r.peek),
+    Event.NOMINATION: lambda r: LogRecord(actor=r.pres, target=r.chanc),
+    # Bits 0-15: seat voted ja, bits 16-31: seat voted
+    Event.VOTES: lambda r: LogRecord(
+        payload=sum(
+            (vote == "ja") << pid | 1 << 16 + pid for pid, vote in r.votes.items()
+        )
+    ),
+    # Only the length of chat messages is logged
+    Event.MESSAGE: lambda r: LogRecord(actor=r.player, payload=len(r.message)),
+    Event.ENACTED: lambda r: LogRecord(
+        payload=CARD_CODES[r.policy] | r.num_enacted << 8 | r.maximum << 16
+    ),
+    Event.ELECTION_FAIL: lambda r: LogRecord(payload=r.num_fails | r.max_fails << 8),
+    Event.PRESIDENT_CLAIM: lambda r: _hand(r.hand, actor=r.player),
+    Event.CHANCELLOR_CLAIM: lambda r: _hand(r.hand, actor=r.player),
+    Event.PEEK_CLAIM: lambda r: _hand(r.hand, actor=r.player),
+    Event.INVESTIGATION_ACTION: lambda r: LogRecord(actor=r.pres, target=r.inved),
+    Event.INVESTIGATION_CLAIM: lambda r: LogRecord(
+        actor=r.pres, target=r.inved, payload=CARD_CODES[r.role]
+    ),
+    Event.INVESTIGATION_RESULT: lambda r: LogRecord(
+        target=r.inv_pid, payload=CARD_CODES[r.inv_role]
+    ),
+    Event.SPECIAL_ELECT_ACTION: lambda r: LogRecord(
+        actor=r.old_pres, target=r.new_pres
+    ),
+    Event.CHANCELLOR_VETO: lambda r: LogRecord(actor=r.player, payload=int(r.veto)),
+    Event.PRESIDENT_VETO: lambda r: LogRecord(actor=r.player, payload=int(r.veto)),
+    Event.EXECUTE_ACTION: lambda r: LogRecord(actor=r.pres, target=r.targ),
+    Event.DECK_SHUFFLE: lambda r: LogRecord(payload=r.num_lib | r.num_fasc << 8),
+    Event.FASCIST_WIN: lambda r: LogRecord(payload=GAME_ENDS.index(r.how)),
+    Event.LIBERAL_WIN: lambda r: LogRecord(payload=GAME_ENDS.index(r.how)),
+    # Limits are logged in milliseconds
+    Event.TIMEOUT: lambda r: LogRecord(
+        actor=r.player, target=EVENT_IDX[r.decision], payload=round(r.limit * 1000)
+    ),
+}
+
+
+class GameLogWriter:
+    """
+    Appends games in the binary LOG_DTYPE format to a file.
+
+    attach(game) subscribes the writer to all public and personal events of a Game,
+    so it sees every game played with it until detach. Records are buffered and
+    written when buffer_size records are collected and at the end of each game.
+    """
+
+    event_records = True
+
+    def __init__(self, path: str, buffer_size: int = 1 << 16):
+        self.file = open(path, "ab")
+        self.buffer = np.empty(buffer_size, dtype=LOG_DTYPE)
+        self.num_buffered = 0
+        self.board: Optional["Board"] = None
+
+    def attach(self, game: "Game"):
+        self.board = game.board
+        game.bus.subscribe(self, observe_personal=True, records=True)
+
+    def detach(self, game: "Game"):
+        game.bus.unsubscribe(self)
+        self.flush()
+
+    def _append(self, event: int, rec: LogRecord):
+        if self.num_buffered == len(self.buffer):
+            self.flush()
+        self.buffer[self.num_buffered] = (event, *rec)
+        self.num_buffered += 1
+
+    def _write_deck(self):
+        deck = self.board.policies
+        assert len(deck) <= NUM_CARDS
+        self._append(DECK_ORDER, LogRecord(len(deck), payload=encode_cards(deck)))
+
+    def inform_record(self, event: Event, record: NamedTuple):
+        if event == Event.GAME_SETTINGS:
+            players = self.board.players
+            header = LogRecord(
+                actor=len(players), payload=encode_roles(p.role for p in players)
+            )
+            self._append(GAME_HEADER, header)
+            self._write_deck()
+        encoder = ENCODERS.get(event)
+        rec = LogRecord() if encoder is None else encoder(record)
+        self._append(EVENT_IDX[event], rec)
+        if event == Event.DECK_SHUFFLE:
+            self._write_deck()
+        elif event in (Event.FASCIST_WIN, Event.LIBERAL_WIN):
+            self.flush()
+
+    def personal_record(self, event: Event, pid: int, record: NamedTuple):
+        encoder = ENCODERS.get(event)
+        rec = LogRecord() if encoder is None else encoder(record)
+        rec = rec._replace(flags=rec.flags | PERSONAL, actor=pid)
+        self._append(EVENT_IDX[event], rec)
+
+    def flush(self):
+        if self.num_buffered:
+            self.file.write(self.buffer[: self.num_buffered].tobytes())
+            self.num_buffered = 0
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameLogReader:
+    """
+    Memory maps a log written by GameLogWriter. Games are returned as views into the
+    map, nothing is parsed or copied until the records are accessed.
+    """
+
+    def __init__(self, path: str):
+        if os.path.getsize(path) == 0:
+            self.records = np.empty(0, dtype=LOG_DTYPE)
+        else:
+            self.records = np.memmap(path, dtype=LOG_DTYPE, mode="r")
+        self.game_starts = np.flatnonzero(self.records["event"] == GAME_HEADER)
+        self._game_ends = np.append(self.game_starts[1:], len(self.records))
+
+    def __len__(self) -> int:
+        return len(self.game_starts)
+
+    def __getitem__(self, idx: int) -> np.ndarray:
+        return self.records[self.game_starts[idx] : self._game_ends[idx]]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for start, end in zip(self.game_starts, self._game_ends):
+            yield self.records[start:end]
+
+    def num_players(self) -> np.ndarray:
+        return self.records["actor"][self.game_starts]
+
+    def roles(self) -> np.ndarray:
+        """
+        (num_games, 10) array of role codes, NO_SEAT for empty seats
+        """
+        bits = self.records["payload"][self.game_starts].astype(np.int64)
+        roles = (bits[:, None] >> 2 * np.arange(10)) & 3
+        roles[np.arange(10) >= self.num_players()[:, None]] = NO_SEAT
+        return roles
+
+    def outcomes(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Winning Event and GameEnd index of every finished game, -1 for unfinished ones
+        """
+        events = self.records["event"]
+        ends = np.flatnonzero(np.isin(events, WIN_EVENTS))
+        game_of_end = np.searchsorted(self.game_starts, ends, side="right") - 1
+        winner = np.full(len(self), -1, dtype=np.int16)
+        how = np.full(len(self), -1, dtype=np.int16)
+        winner[game_of_end] = events[ends]
+        how[game_of_end] = self.records["payload"][ends]
+        return winner, how
+
+
+def decode(record: np.void) -> tuple[Optional[Event], dict]:
+    """
+    Readable form of a single log record, mainly for debugging
+    """
+    code = int(record["event"])
+    fields = {
+        "actor": int(record["actor"]),
+        "target": int(record["target"]),
+        "payload": int(record["payload"]),
+        "personal": bool(record["flags"] & PERSONAL),
+    }
+    num_cards = int(record["flags"]) & NUM_CARDS
+    if num_cards:
+        fields["cards"] = decode_cards(fields["payload"], num_cards)
+    return IDX_EVENT.get(code), fields
@@ -1,13 +1,26 @@
 import json
+import os
 from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 
+# Rules of secrethitler.io for 5-10 players, shipped with the package
+DEFAULT_CONFIG = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "configs", "game", "shio_default.json"
+)
 
-@dataclass
+
+@dataclass(frozen=True)
 class GameSettings:
+    """
+    Rules of a game. Settings are shared between games, so they are frozen, use
+    dataclasses.replace for a variant.
+    """
+
     num_players: int
     num_liberals: int
     num_fascists: int
-    fascist_track: list
+    fascist_track: Tuple[Optional[str], ...]
     num_fascist_cards: int
     num_liberal_cards: int
     hitler_knows_fascists: bool
@@ -16,6 +29,10 @@ class GameSettings:
     liberal_track_length: int = 5
     fascist_track_length: int = 6
 
+    def __post_init__(self):
+        # Config files give the track as a list
+        object.__setattr__(self, "fascist_track", tuple(self.fascist_track))
+
     @property
     def track_len(self):
         return {
@@ -28,12 +45,74 @@ class GameSettings:
         cls,
         num_players: int,
         is_rebalanced: bool,
-        config_path: str = "configs/game/shio_default.json",
-    ):
-        with open(config_path, "r") as f:
-            config = json.load(f)
-
-        return cls(
-            num_players=num_players,
-            **config[str(num_players)]["rebalanced" if is_rebalanced else "default"],
-        )
+        config_path: Optional[str] = None,
+    ) -> "GameSettings":
+        variant = "rebalanced" if is_rebalanced else "default"
+        if config_path is None:
+            return SETTINGS.get(num_players, variant)
+        return load_config(os.path.abspath(config_path))[variant][num_players]
+
+
+@lru_cache(maxsize=None)
+def load_config(path: str) -> Dict[str, Dict[int, GameSettings]]:
+    """
+    Parse a config file of the shio_default.json format into
+    {variant: {num_players: settings}}. Every path is read only once.
+    """
+    with open(path, "r") as f:
+        config = json.load(f)
+    variants = {}
+    for num_players, by_variant in config.items():
+        for variant, kwargs in by_variant.items():
+            variants.setdefault(variant, {})[int(num_players)] = GameSettings(
+                num_players=int(num_players), **kwargs
+            )
+    return variants
+
+
+class SettingsRegistry:
+    """
+    Rule variants by name. The variants of config_path ("default" and "rebalanced"
+    for the bundled config) are loaded on first use, more can be added with register.
+    Returned settings are frozen and shared between all games.
+    """
+
+    def __init__(self, config_path: str = DEFAULT_CONFIG):
+        self.config_path = config_path
+        self._custom: Dict[str, Dict[int, GameSettings]] = {}
+
+    def register(self, variant: str, settings: GameSettings):
+        self._custom.setdefault(variant, {})[settings.num_players] = settings
+
+    def variants(self) -> Dict[str, Dict[int, GameSettings]]:
+        merged = {k: dict(v) for k, v in load_config(self.config_path).items()}
+        for variant, by_players in self._custom.items():
+            merged.setdefault(variant, {}).update(by_players)
+        return merged
+
+    def get(self, num_players: int, variant: str = "default") -> GameSettings:
+        custom = self._custom.get(variant)
+        if custom is not None and num_players in custom:
+            return custom[num_players]
+        try:
+            return load_config(self.config_path)[variant][num_players]
+        except KeyError:
+            raise KeyError(
+                f"No settings for variant {variant!r} with {num_players} players"
+            ) from None
+
+    def preload(self):
+        """
+        Parse the config file now, e.g. before forking worker processes
+        """
+        load_config(self.config_path)
+
+
+SETTINGS = SettingsRegistry()
+
+
+def default_settings(num_players: int) -> GameSettings:
+    """
+    The settings a Game uses if none are given, rebalanced for 6, 7 and 9 players
+    """
+    return GameSettings.get_settings(num_players, num_players in (6, 7, 9))
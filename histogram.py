@@ -0,0 +1,74 @@
+import math
+from typing import Dict, List, Optional
+
+
+class Histogram:
+    """
+    Histogram with logarithmically spaced buckets, e.g. for latencies in seconds.
+
+    Bucket i counts values in [min_value * growth**(i-1), min_value * growth**i),
+    bucket 0 everything below min_value. Percentiles are accurate up to one bucket.
+    """
+
+    __slots__ = ("min_value", "growth", "counts", "count", "total", "max")
+
+    def __init__(self, min_value: float = 1e-6, growth: float = 1.25):
+        self.min_value = min_value
+        self.growth = growth
+        self.counts: List[int] = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def _bucket(self, value: float) -> int:
+        if value < self.min_value:
+            return 0
+        return int(math.log(value / self.min_value, self.growth)) + 1
+
+    def _upper(self, bucket: int) -> float:
+        return self.min_value * self.growth**bucket
+
+    def add(self, value: float):
+        bucket = self._bucket(value)
+        if bucket >= len(self.counts):
+            self.counts.extend([0] * (bucket + 1 - len(self.counts)))
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "Histogram"):
+        assert (self.min_value, self.growth) == (other.min_value, other.growth)
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for bucket, count in enumerate(other.counts):
+            self.counts[bucket] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self._upper(bucket), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
@@ -0,0 +1,74 @@
+import json
+import random
+from collections import defaultdict
+from typing import Callable, Dict, Optional
+
+from sh_game.histogram import Histogram
+
+# Categories of timings recorded by the Game
+PHASE = "phase"  # game phases like voting or government, plus the whole game
+EVENT = "event"  # decisions by Event type, NOOP for the manager
+
+
+class Instrumentation:
+    """
+    Latency histograms of game phases and decisions.
+
+    A Game only measures anything if it was given an Instrumentation, and only in the
+    games picked by sample(), so disabled or unsampled games pay a single attribute
+    check per timed section. Whole games are sampled so their phases stay comparable.
+    Every export_every finished games, the summary (count, mean, p50, p95, p99, max
+    per category and name) is written as JSON to path and/or passed to callback.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 1.0,
+        path: Optional[str] = None,
+        callback: Optional[Callable[[dict], None]] = None,
+        export_every: int = 1,
+        seed: Optional[int] = None,
+    ):
+        assert 0 <= sample_rate <= 1
+        self.sample_rate = sample_rate
+        self.path = path
+        self.callback = callback
+        self.export_every = export_every
+        # Own rng, sampling must not change the course of the games
+        self.rng = random.Random(seed)
+        self.histograms: Dict[str, Dict[str, Histogram]] = defaultdict(
+            lambda: defaultdict(Histogram)
+        )
+        self.games_finished = 0
+
+    def sample(self) -> bool:
+        return self.sample_rate >= 1 or self.rng.random() < self.sample_rate
+
+    def record(self, category: str, name: str, seconds: float):
+        self.histograms[category][name].add(seconds)
+
+    def merge(self, other: "Instrumentation"):
+        for category, by_name in other.histograms.items():
+            for name, histogram in by_name.items():
+                self.histograms[category][name].merge(histogram)
+
+    def summary(self) -> Dict[str, Dict[str, dict]]:
+        return {
+            category: {name: h.summary() for name, h in by_name.items()}
+            for category, by_name in self.histograms.items()
+        }
+
+    def game_finished(self):
+        self.games_finished += 1
+        if self.games_finished % self.export_every == 0:
+            self.export()
+
+    def export(self):
+        if self.path is None and self.callback is None:
+            return
+        summary = self.summary()
+        if self.path is not None:
+            with open(self.path, "w") as f:
+                json.dump(summary, f)
+        if self.callback is not None:
+            self.callback(summary)
@@ -1,5 +1,6 @@
+import random
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Tuple
+from typing import TYPE_CHECKING, NamedTuple, Optional, Tuple
 
 from sh_game.types.event_types import Event
 
@@ -9,15 +10,24 @@ if TYPE_CHECKING:
 
 
 class Manager(ABC):
+    # Events the game sends to this manager, None for all of them
+    subscribed_events: Optional[frozenset[Event]] = None
+    # Receive events in batches via inform_batch at phase boundaries and before acting
+    batched_events: bool = False
+    # Receive the shared event records via inform_record/personal_record
+    event_records: bool = False
+
     def __init__(self):
         self.game: Game = None
         self.board: Board = None
+        self.rng: random.Random = None
         self.history = []
         self.game_number = 0
 
     def set_game(self, game: "Game"):
         self.game = game
         self.board = game.board
+        self.rng = game.rng
 
     def reset(self):
         self.history = []
@@ -31,6 +41,30 @@ class Manager(ABC):
     def inform_event(self, event: Event, **kwargs):
         pass
 
+    def inform_record(self, event: Event, record: NamedTuple):
+        self.inform_event(event, **record._asdict())
+
+    def personal_record(self, event: Event, pid: int, record: NamedTuple):
+        self.personal_event(event, player=self.board.players[pid], **record._asdict())
+
+    def inform_batch(self, events: list[tuple]):
+        for event, payload, personal in events:
+            if self.event_records:
+                if personal is None:
+                    self.inform_record(event, payload)
+                else:
+                    self.personal_record(event, personal, payload)
+            elif personal:
+                self.personal_event(event, **payload)
+            else:
+                self.inform_event(event, **payload)
+
     @abstractmethod
     def get_next_action(self) -> Tuple[Event, int]:
         pass
+
+    async def aget_next_action(self) -> Tuple[Event, int]:
+        """
+        Async variant of get_next_action used by AsyncGame.
+        """
+        return self.get_next_action()
@@ -0,0 +1,276 @@
+from typing import TYPE_CHECKING, Callable, Dict, NamedTuple, Optional
+
+import numpy as np
+
+from sh_game.types.event_types import Event
+from sh_game.types.int_codes import ROLE_CODES, ROLE_NAMES
+
+if TYPE_CHECKING:
+    from sh_game.board import Board
+    from sh_game.game import Game
+
+MAX_PLAYERS = 10
+# Number of most recent governments (nominations) kept in the observation
+HISTORY = 8
+
+# One government: president and chancellor one-hot, votes (+1 ja, -1 nein), outcome
+# (+1 fascist, -1 liberal enacted), fascist cards claimed by president and chancellor
+# and the number of the nomination in the game (0 marks an unused slot)
+GOV_FIELDS = {
+    "pres": MAX_PLAYERS,
+    "chanc": MAX_PLAYERS,
+    "votes": MAX_PLAYERS,
+    "outcome": 1,
+    "pres_claim": 1,
+    "chanc_claim": 1,
+    "number": 1,
+}
+
+# Public fields are equal in all rows, private fields only hold what a seat knows.
+# Per seat fields have one column per seat, counts are not normalized.
+FIELDS = {
+    # public
+    "tracks": 2,  # liberal, fascist policies enacted
+    "election_tracker": 1,
+    "num_players": 1,
+    "alive": MAX_PLAYERS,
+    "nominated_pres": MAX_PLAYERS,
+    "nominated_chanc": MAX_PLAYERS,
+    "last_vote": MAX_PLAYERS,
+    "ja_votes": MAX_PLAYERS,
+    "times_pres": MAX_PLAYERS,
+    "times_chanc": MAX_PLAYERS,
+    "lib_as_pres": MAX_PLAYERS,
+    "fasc_as_pres": MAX_PLAYERS,
+    "lib_as_chanc": MAX_PLAYERS,
+    "fasc_as_chanc": MAX_PLAYERS,
+    "pres_claims": MAX_PLAYERS,  # fascist cards claimed as president, summed
+    "chanc_claims": MAX_PLAYERS,
+    "inv_claims": MAX_PLAYERS,  # +1 claimed fascist, -1 claimed liberal
+    "peek_claim": 1,
+    "governments": HISTORY * sum(GOV_FIELDS.values()),
+    # private
+    "own_seat": MAX_PLAYERS,
+    "own_role": len(ROLE_NAMES),
+    "known_roles": len(ROLE_NAMES) * MAX_PLAYERS,  # role one-hot per seat
+    "investigations": MAX_PLAYERS,  # +1 fascist, -1 liberal
+    "hand": 3,  # fascist cards in the last draw, received hand and peek
+}
+
+
+def _offsets(fields: Dict[str, int]) -> Dict[str, int]:
+    offsets, pos = {}, 0
+    for name, size in fields.items():
+        offsets[name] = pos
+        pos += size
+    return offsets
+
+
+OFFSETS = _offsets(FIELDS)
+GOV_OFFSETS = _offsets(GOV_FIELDS)
+OBS_SIZE = sum(FIELDS.values())
+GOV_SIZE = sum(GOV_FIELDS.values())
+
+
+def field(obs: np.ndarray, name: str) -> np.ndarray:
+    """
+    View of one field of observations with OBS_SIZE as last axis
+    """
+    start = OFFSETS[name]
+    return obs[..., start : start + FIELDS[name]]
+
+
+def _fasc(hand) -> int:
+    return sum(card == "fascist" for card in hand)
+
+
+class ObservationEncoder:
+    """
+    Keeps a fixed-shape observation per seat of a Game up to date while it is played.
+
+    attach(game) subscribes the encoder to the event records of the game, including
+    personal ones. Every event changes a few columns of the (MAX_PLAYERS, OBS_SIZE)
+    float32 array, so the cost does not grow with the length of the game. Row i is
+    the observation of seat i, see FIELDS for the layout. observation(pid) and
+    observations are views, pass buffer to let the encoder write into a slice of a
+    larger array, e.g. one row block per game of a batch:
+
+        batch = np.zeros((num_games, MAX_PLAYERS, OBS_SIZE), dtype=np.float32)
+        encoders = [ObservationEncoder(batch[i]) for i in range(num_games)]
+    """
+
+    event_records = True
+
+    def __init__(self, buffer: Optional[np.ndarray] = None):
+        if buffer is None:
+            buffer = np.zeros((MAX_PLAYERS, OBS_SIZE), dtype=np.float32)
+        assert buffer.shape == (MAX_PLAYERS, OBS_SIZE)
+        self.obs = buffer
+        self.board: Optional["Board"] = None
+        self.num_players = 0
+        self.num_nominations = 0
+        self._gov: Optional[int] = None  # column of the last nominated government
+        self._elected: Optional[int] = None  # column of the last elected government
+        self._pres: Optional[int] = None  # seats of the last nominated government
+        self._chanc: Optional[int] = None
+        self._passed = False
+        self._chaos = False
+        self._public: Dict[Event, Callable[[NamedTuple], None]] = {
+            Event.GAME_SETTINGS: self._on_settings,
+            Event.NOMINATION: self._on_nomination,
+            Event.VOTES: self._on_votes,
+            Event.ELECTION_FAIL: self._on_election_fail,
+            Event.CHAOS_POLICY: self._on_chaos,
+            Event.ENACTED: self._on_enacted,
+            Event.PRESIDENT_CLAIM: self._on_president_claim,
+            Event.CHANCELLOR_CLAIM: self._on_chancellor_claim,
+            Event.INVESTIGATION_CLAIM: self._on_investigation_claim,
+            Event.PEEK_CLAIM: self._on_peek_claim,
+            Event.EXECUTE_ACTION: self._on_execute,
+        }
+        self._personal: Dict[Event, Callable[[int, NamedTuple], None]] = {
+            Event.PERSONAL_ROLE_CALL: self._on_role_call,
+            Event.ALL_ROLE_CALLS: self._on_all_role_calls,
+            Event.INVESTIGATION_RESULT: self._on_investigation_result,
+            Event.DRAW: self._on_hand(0),
+            Event.GET_CARD: self._on_hand(1),
+            Event.PEEK_PERSONAL: self._on_hand(2),
+        }
+
+    @property
+    def observations(self) -> np.ndarray:
+        return self.obs[: self.num_players]
+
+    def observation(self, pid: int) -> np.ndarray:
+        return self.obs[pid]
+
+    def attach(self, game: "Game"):
+        self.board = game.board
+        game.bus.subscribe(
+            self,
+            set(self._public) | set(self._personal),
+            observe_personal=True,
+            records=True,
+        )
+
+    def detach(self, game: "Game"):
+        game.bus.unsubscribe(self)
+
+    def inform_record(self, event: Event, record: NamedTuple):
+        handler = self._public.get(event)
+        if handler is not None:
+            handler(record)
+
+    def personal_record(self, event: Event, pid: int, record: NamedTuple):
+        handler = self._personal.get(event)
+        if handler is not None:
+            handler(pid, record)
+
+    def _add(self, name: str, idx: int, value: float):
+        self.obs[:, OFFSETS[name] + idx] += value
+
+    def _set(self, name: str, idx: int, value: float):
+        self.obs[:, OFFSETS[name] + idx] = value
+
+    def _set_gov(self, start: Optional[int], name: str, idx: int, value: float):
+        if start is not None:
+            self.obs[:, start + GOV_OFFSETS[name] + idx] = value
+
+    def _on_settings(self, record: NamedTuple):
+        self.obs[:] = 0
+        self.num_players = record.num_players
+        self.num_nominations = 0
+        self._gov = self._elected = self._pres = self._chanc = None
+        self._passed = self._chaos = False
+        self._set("num_players", 0, record.num_players)
+        field(self.obs, "alive")[:, : record.num_players] = 1
+        for pid in range(record.num_players):
+            self.obs[pid, OFFSETS["own_seat"] + pid] = 1
+
+    def _on_nomination(self, record: NamedTuple):
+        start = OFFSETS["governments"] + self.num_nominations % HISTORY * GOV_SIZE
+        self.num_nominations += 1
+        self.obs[:, start : start + GOV_SIZE] = 0
+        self._set_gov(start, "pres", record.pres, 1)
+        self._set_gov(start, "chanc", record.chanc, 1)
+        self._set_gov(start, "number", 0, self.num_nominations)
+        if self._pres is not None:
+            self._set("nominated_pres", self._pres, 0)
+            self._set("nominated_chanc", self._chanc, 0)
+        self._set("nominated_pres", record.pres, 1)
+        self._set("nominated_chanc", record.chanc, 1)
+        self._pres, self._chanc = record.pres, record.chanc
+        self._gov = start
+
+    def _on_votes(self, record: NamedTuple):
+        ja = 0
+        for pid, vote in record.votes.items():
+            value = 1 if vote == "ja" else -1
+            ja += value
+            self._set("last_vote", pid, value)
+            self._set_gov(self._gov, "votes", pid, value)
+            if value == 1:
+                self._add("ja_votes", pid, 1)
+        self._passed = ja > 0
+        if self._passed:
+            self._add("times_pres", self._pres, 1)
+            self._add("times_chanc", self._chanc, 1)
+            self._elected = self._gov
+
+    def _on_election_fail(self, record: NamedTuple):
+        self._passed = False
+        self._set("election_tracker", 0, record.num_fails % record.max_fails)
+
+    def _on_chaos(self, record: NamedTuple):
+        self._chaos = True
+
+    def _on_enacted(self, record: NamedTuple):
+        fascist = record.policy == "fascist"
+        self._set("tracks", int(fascist), record.num_enacted)
+        if self._passed and not self._chaos:
+            self._add("fasc_as_pres" if fascist else "lib_as_pres", self._pres, 1)
+            self._add("fasc_as_chanc" if fascist else "lib_as_chanc", self._chanc, 1)
+            self._set_gov(self._gov, "outcome", 0, 1 if fascist else -1)
+        self._set("election_tracker", 0, 0)
+        self._passed = self._chaos = False
+
+    def _on_president_claim(self, record: NamedTuple):
+        self._add("pres_claims", record.player, _fasc(record.hand))
+        self._set_gov(self._elected, "pres_claim", 0, _fasc(record.hand))
+
+    def _on_chancellor_claim(self, record: NamedTuple):
+        self._add("chanc_claims", record.player, _fasc(record.hand))
+        self._set_gov(self._elected, "chanc_claim", 0, _fasc(record.hand))
+
+    def _on_investigation_claim(self, record: NamedTuple):
+        self._set("inv_claims", record.inved, 1 if record.role == "fascist" else -1)
+
+    def _on_peek_claim(self, record: NamedTuple):
+        self._set("peek_claim", 0, _fasc(record.hand))
+
+    def _on_execute(self, record: NamedTuple):
+        self._set("alive", record.targ, 0)
+
+    def _set_role(self, pid: int, seat: int, role: str):
+        start = OFFSETS["known_roles"] + len(ROLE_NAMES) * seat
+        self.obs[pid, start + ROLE_CODES[role]] = 1
+
+    def _on_role_call(self, pid: int, record: NamedTuple):
+        role = self.board.players[pid].role
+        self.obs[pid, OFFSETS["own_role"] + ROLE_CODES[role]] = 1
+        self._set_role(pid, pid, role)
+
+    def _on_all_role_calls(self, pid: int, record: NamedTuple):
+        for seat, role in record.all_roles.items():
+            self._set_role(pid, seat, role)
+
+    def _on_investigation_result(self, pid: int, record: NamedTuple):
+        value = 1 if record.inv_role == "fascist" else -1
+        self.obs[pid, OFFSETS["investigations"] + record.inv_pid] = value
+
+    def _on_hand(self, idx: int) -> Callable[[int, NamedTuple], None]:
+        def handler(pid: int, record: NamedTuple):
+            hand = record.peek if idx == 2 else record.hand
+            self.obs[pid, OFFSETS["hand"] + idx] = _fasc(hand)
+
+        return handler
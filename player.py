@@ -1,5 +1,6 @@
+import random
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, NamedTuple, Optional
 
 from sh_game.types.event_types import Event
 
@@ -8,11 +9,20 @@ if TYPE_CHECKING:
 
 
 class Player(ABC):
+    # Events the game sends to this player, None for all of them
+    subscribed_events: Optional[frozenset[Event]] = None
+    # Receive events in batches via inform_batch at phase boundaries and before acting
+    batched_events: bool = False
+    # Receive the shared event records via inform_record/personal_record
+    event_records: bool = False
+
     def __init__(self, pid, name, game_id=None, num_players=None, role=None):
         self.name: str = name
         self.pid: int = pid
         self.role: str = role
         self.board: Board = None
+        # Set by the Board, all randomness of a player should come from the game rng
+        self.rng: random.Random = None
         self.num_players: int = num_players
         self.game_id: str = game_id
         self.is_dead: bool = False
@@ -56,6 +66,41 @@ class Player(ABC):
         Get some personal event
         """
 
+    def inform_record(self, event: Event, record: NamedTuple):
+        """
+        Get the record of a game event if event_records is set
+        """
+        self.inform_event(event, **record._asdict())
+
+    def personal_record(self, event: Event, record: NamedTuple):
+        """
+        Get the record of a personal event if event_records is set
+        """
+        self.personal_event(event, **record._asdict())
+
+    def inform_batch(self, events: list[tuple]):
+        """
+        Get a batch of events if batched_events is set, as (event, kwargs, is_personal)
+        tuples, or (event, record, pid) tuples with event_records
+        """
+        for event, payload, personal in events:
+            if self.event_records:
+                if personal is None:
+                    self.inform_record(event, payload)
+                else:
+                    self.personal_record(event, payload)
+            elif personal:
+                self.personal_event(event, **payload)
+            else:
+                self.inform_event(event, **payload)
+
     @abstractmethod
     def perform_action(self, event_type: Event, **kwargs) -> tuple[Any, dict]:
         pass
+
+    async def aperform_action(self, event_type: Event, **kwargs) -> tuple[Any, dict]:
+        """
+        Async variant of perform_action used by AsyncGame. Players backed by slow
+        remote calls should override this to let the game run decisions concurrently.
+        """
+        return self.perform_action(event_type, **kwargs)
@@ -0,0 +1,63 @@
+from typing import Iterable, Iterator, List
+
+from sh_game.types.int_codes import CARD_CODES, CARD_NAMES, FASCIST
+
+
+class PolicyDeck:
+    """
+    Policy deck of a Board: a preallocated array of card codes with the top card at
+    pos and counts of the cards left, so that draws, peeks and counts do not copy or
+    scan the deck. Iterating yields the card names from the top.
+    """
+
+    __slots__ = ("cards", "pos", "num_lib", "num_fasc")
+
+    def __init__(self, capacity: int):
+        self.cards = bytearray(capacity)
+        self.pos = capacity
+        self.num_lib = 0
+        self.num_fasc = 0
+
+    def __len__(self) -> int:
+        return len(self.cards) - self.pos
+
+    def __iter__(self) -> Iterator[str]:
+        return (CARD_NAMES[card] for card in self.cards[self.pos :])
+
+    def __repr__(self):
+        return f"PolicyDeck(lib:{self.num_lib}, fasc:{self.num_fasc})"
+
+    def count(self, card: str) -> int:
+        return self.num_fasc if card == "fascist" else self.num_lib
+
+    def codes(self) -> bytes:
+        """
+        Card codes from the top card on
+        """
+        return bytes(self.cards[self.pos :])
+
+    def set(self, cards: Iterable[str]):
+        """
+        Replace the deck by cards, the first one on top
+        """
+        self.set_codes([CARD_CODES[card] for card in cards])
+
+    def set_codes(self, codes: Iterable[int]):
+        codes = bytes(codes)
+        assert len(codes) <= len(self.cards)
+        self.pos = len(self.cards) - len(codes)
+        self.cards[self.pos :] = codes
+        self.num_fasc = codes.count(FASCIST)
+        self.num_lib = len(codes) - self.num_fasc
+
+    def peek(self, num: int) -> List[str]:
+        assert num <= len(self)
+        return [CARD_NAMES[card] for card in self.cards[self.pos : self.pos + num]]
+
+    def draw(self, num: int) -> List[str]:
+        drawn = self.peek(num)
+        fascists = drawn.count("fascist")
+        self.num_fasc -= fascists
+        self.num_lib -= num - fascists
+        self.pos += num
+        return drawn
@@ -0,0 +1,271 @@
+import math
+import random
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from sh_game.baselines.manager import BaselineManager
+from sh_game.game import Game
+from sh_game.manager import Manager
+from sh_game.player import Player
+from sh_game.tournament_stats import MIN_PLAYERS, SEAT_COUNTS
+from sh_game.types.event_types import Event
+
+ELO_SCALE = 400 / math.log(10)
+
+
+class RatingPool:
+    """
+    Incremental Bayesian ratings of a pool of agents in Secret Hitler team games, a
+    Glicko/TrueSkill-style Gaussian approximation to a logistic model: the liberals
+    win with probability sigmoid((mean liberal skill - mean fascist skill + side
+    bias) / c), where the side bias per seat count absorbs the edge that the roles
+    give the fascists and is learned like a skill. Every result updates the skill
+    means and variances of the seated agents in O(seats), so ratings never replay
+    history. Before each game the variances grow by tau**2, to follow agents that
+    keep learning.
+
+    Skills are in logistic units, elo() gives them on the Elo scale. Agents are
+    keyed by name and added on first use, the arrays double when they are full.
+    """
+
+    def __init__(
+        self,
+        prior_sigma: float = 1.0,
+        beta: float = 0.5,
+        tau: float = 0.001,
+        min_sigma: float = 0.02,
+    ):
+        self.prior_sigma = prior_sigma
+        self.beta = beta
+        self.tau = tau
+        self.min_sigma = min_sigma
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._mu = np.zeros(0)
+        self._sigma2 = np.zeros(0)
+        self._games = np.zeros(0, dtype=np.int64)
+        self._wins = np.zeros(0, dtype=np.int64)
+        self.bias_mu = np.zeros(len(SEAT_COUNTS))
+        self.bias_sigma2 = np.full(len(SEAT_COUNTS), prior_sigma**2)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    # Skill means and variances, games and wins of the agents, views of the arrays
+    @property
+    def mu(self) -> np.ndarray:
+        return self._mu[: len(self.names)]
+
+    @property
+    def sigma2(self) -> np.ndarray:
+        return self._sigma2[: len(self.names)]
+
+    @property
+    def games(self) -> np.ndarray:
+        return self._games[: len(self.names)]
+
+    @property
+    def wins(self) -> np.ndarray:
+        return self._wins[: len(self.names)]
+
+    def _reserve(self, capacity: int):
+        num = len(self.names)
+        for attr in ("_mu", "_sigma2", "_games", "_wins"):
+            old = getattr(self, attr)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:num] = old[:num]
+            setattr(self, attr, new)
+
+    def add(self, name: str) -> int:
+        idx = self.index.get(name)
+        if idx is None:
+            idx = len(self.names)
+            if idx == len(self._mu):
+                self._reserve(max(2 * idx, 16))
+            self._mu[idx] = 0.0
+            self._sigma2[idx] = self.prior_sigma**2
+            self._games[idx] = self._wins[idx] = 0
+            self.index[name] = idx
+            self.names.append(name)
+        return idx
+
+    def _indices(self, names: Sequence[str]) -> np.ndarray:
+        return np.array([self.add(name) for name in names], dtype=np.int64)
+
+    def _team(self, idx: np.ndarray):
+        # Mean skill of a team and its variance
+        return self.mu[idx].mean(), self.sigma2[idx].sum() / len(idx) ** 2
+
+    def win_probability(
+        self, liberals: Sequence[str], fascists: Sequence[str]
+    ) -> float:
+        """
+        Predicted probability that the liberals win
+        """
+        lib, fasc = self._indices(liberals), self._indices(fascists)
+        size = len(lib) + len(fasc) - MIN_PLAYERS
+        lib_mu, lib_var = self._team(lib)
+        fasc_mu, fasc_var = self._team(fasc)
+        c = math.sqrt(lib_var + fasc_var + self.bias_sigma2[size] + 2 * self.beta**2)
+        return 1 / (1 + math.exp(-(lib_mu - fasc_mu + self.bias_mu[size]) / c))
+
+    def record(self, liberals: Sequence[str], fascists: Sequence[str], result: Event):
+        """
+        Update the ratings with one game, result being Event.LIBERAL_WIN or
+        Event.FASCIST_WIN. An agent with several seats counts once per seat.
+        """
+        assert result in (Event.LIBERAL_WIN, Event.FASCIST_WIN)
+        lib, fasc = self._indices(liberals), self._indices(fascists)
+        size = len(lib) + len(fasc) - MIN_PLAYERS
+        seated = np.concatenate([lib, fasc])
+        self.sigma2[seated] += self.tau**2
+        self.bias_sigma2[size] += self.tau**2
+
+        lib_mu, lib_var = self._team(lib)
+        fasc_mu, fasc_var = self._team(fasc)
+        c2 = lib_var + fasc_var + self.bias_sigma2[size] + 2 * self.beta**2
+        c = math.sqrt(c2)
+        p = 1 / (1 + math.exp(-(lib_mu - fasc_mu + self.bias_mu[size]) / c))
+        score = 1.0 if result == Event.LIBERAL_WIN else 0.0
+        # Gradient and curvature of the log-likelihood in the liberal advantage, the
+        # advantage moves by 1 / team size per seat
+        gradient = (score - p) / c
+        curvature = p * (1 - p) / c2
+        min_var = self.min_sigma**2
+        for idx, sign in ((lib, 1.0), (fasc, -1.0)):
+            weight = 1 / len(idx)
+            var = self.sigma2[idx]
+            np.add.at(self.mu, idx, sign * weight * var * gradient)
+            new_var = var / (1 + var * weight * weight * curvature)
+            self.sigma2[idx] = np.maximum(new_var, min_var)
+        var = self.bias_sigma2[size]
+        self.bias_mu[size] += var * gradient
+        self.bias_sigma2[size] = max(var / (1 + var * curvature), min_var)
+
+        np.add.at(self.games, seated, 1)
+        np.add.at(self.wins, lib if score else fasc, 1)
+
+    def add_game(self, game: Game, agent_of: Dict[int, str]):
+        """
+        Record a finished game, agent_of maps id(player) to the agent's name
+        """
+        liberals, fascists = [], []
+        for player in game.board.players:
+            team = liberals if player.party_membership == "liberal" else fascists
+            team.append(agent_of[id(player)])
+        self.record(liberals, fascists, game.game_result)
+
+    def elo(self, name: str) -> float:
+        return 1500 + ELO_SCALE * self.mu[self.index[name]]
+
+    def conservative(self) -> np.ndarray:
+        """
+        Lower bounds mu - 3 sigma of the skills, for leaderboards
+        """
+        return self.mu - 3 * np.sqrt(self.sigma2)
+
+    def leaderboard(self) -> List[tuple]:
+        """
+        (name, Elo, Elo sd, games) from the best conservative skill down
+        """
+        order = np.argsort(-self.conservative(), kind="stable")
+        return [
+            (
+                self.names[i],
+                1500 + ELO_SCALE * self.mu[i],
+                ELO_SCALE * math.sqrt(self.sigma2[i]),
+                int(self.games[i]),
+            )
+            for i in order
+        ]
+
+    def matchmake(
+        self,
+        num_players: int,
+        rng: random.Random,
+        names: Optional[Sequence[str]] = None,
+        width: float = 0.5,
+    ) -> List[str]:
+        """
+        Agents for the seats of the next game, from names or the whole pool. The
+        first is drawn by its variance, so uncertain and new agents play most. The
+        others are drawn by variance times closeness in skill to the first (a
+        Gaussian of sd width), since even games are the most informative. Agents only
+        repeat if there are fewer than num_players.
+        """
+        candidates = self._indices(self.names if names is None else names)
+        assert len(candidates), "The pool is empty"
+        var = self.sigma2[candidates]
+        first = rng.choices(range(len(candidates)), weights=var)[0]
+        closeness = np.exp(
+            -0.5 * ((self.mu[candidates] - self.mu[candidates[first]]) / width) ** 2
+        )
+        weights = var * closeness
+        seats = [first]
+        while len(seats) < num_players:
+            available = [i for i in range(len(candidates)) if i not in seats]
+            if not available:
+                available = list(range(len(candidates)))
+            seats.append(
+                rng.choices(available, weights=[weights[i] for i in available])[0]
+            )
+        return [self.names[candidates[i]] for i in seats]
+
+    def save(self, path: str):
+        """
+        Write the pool to a compressed .npz file
+        """
+        np.savez_compressed(
+            path,
+            names=np.array(self.names, dtype=str),
+            mu=self.mu,
+            sigma2=self.sigma2,
+            games=self.games,
+            wins=self.wins,
+            bias_mu=self.bias_mu,
+            bias_sigma2=self.bias_sigma2,
+            params=np.array([self.prior_sigma, self.beta, self.tau, self.min_sigma]),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "RatingPool":
+        with np.load(path) as data:
+            pool = cls(*data["params"].tolist())
+            pool.names = data["names"].tolist()
+            pool.index = {name: idx for idx, name in enumerate(pool.names)}
+            pool._mu = data["mu"]
+            pool._sigma2 = data["sigma2"]
+            pool._games = data["games"]
+            pool._wins = data["wins"]
+            pool.bias_mu = data["bias_mu"]
+            pool.bias_sigma2 = data["bias_sigma2"]
+        return pool
+
+
+def play_rated_games(
+    pool: RatingPool,
+    player_factories: Dict[str, Callable[[int], Player]],
+    num_games: int,
+    seat_counts: Sequence[int] = (5, 6, 7, 8, 9, 10),
+    seed: int = 0,
+    manager_factory: Callable[[], Manager] = partial(BaselineManager, verbose=False),
+):
+    """
+    Play num_games matchmade games between the agents of player_factories and
+    record them in pool
+    """
+    rng = random.Random(seed)
+    names = list(player_factories)
+    for name in names:
+        pool.add(name)
+    for game_idx in range(num_games):
+        num_players = seat_counts[game_idx % len(seat_counts)]
+        seated = pool.matchmake(num_players, rng, names)
+        players = [player_factories[name](pid) for pid, name in enumerate(seated)]
+        # Before the game, which shuffles the list of players
+        agent_of = {id(player): name for player, name in zip(players, seated)}
+        game = Game(manager=manager_factory(), players=players, rng=rng)
+        game.run_game()
+        pool.add_game(game, agent_of)
@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import multiprocessing
+import random
+import threading
+import traceback
+from multiprocessing.connection import Connection
+from types import MappingProxyType
+from typing import Any, Callable, Optional, Sequence
+
+from sh_game.board import Board
+from sh_game.board_state import BoardState
+from sh_game.game_settings import GameSettings
+from sh_game.player import Player
+from sh_game.types.event_types import EVENT_IDX, IDX_EVENT, Event
+from sh_game.types.kwargs_classes import KWARGS_CLASSES
+
+logger = logging.getLogger(__name__)
+
+# Events travel as their EVENT_IDX, records as plain tuples
+# The settings are sent once per game, not with every snapshot
+STATE_FIELDS = tuple(name for name in BoardState.__slots__ if name != "settings")
+
+# Message kinds, the first item of every message
+INFO, SETTINGS, RESET, EVENTS_MSG, ACT, CLOSE = range(6)
+ANSWER, PLAYER_ANSWER, ERROR = range(3)
+
+
+def pack_record(record: tuple) -> tuple:
+    # Read-only mapping fields do not pickle, the record rebuilds them
+    return tuple(
+        dict(value) if isinstance(value, MappingProxyType) else value
+        for value in record
+    )
+
+
+def pack_state(state: BoardState) -> tuple:
+    return tuple(getattr(state, name) for name in STATE_FIELDS)
+
+
+def unpack_state(values: tuple, settings: GameSettings) -> BoardState:
+    state = BoardState.__new__(BoardState)
+    state.settings = settings
+    for name, value in zip(STATE_FIELDS, values):
+        setattr(state, name, value)
+    return state
+
+
+class _Seat(Player):
+    # Stand-in for the other seats on the board of a worker
+    subscribed_events = frozenset()
+
+    def inform_event(self, event: Event, **kwargs):
+        pass
+
+    def personal_event(self, event: Event, **kwargs):
+        pass
+
+    def perform_action(self, event_type: Event, **kwargs):
+        raise RuntimeError(
+            f"Seat {self.pid} was asked for {event_type} in a worker, where only the "
+            "hosted player takes decisions"
+        )
+
+
+class _Worker:
+    """
+    Hosts one player in a worker process. The player sees a mirror Board that is
+    overwritten with the snapshot of the engine's board before every event batch and
+    decision, the other seats are stand-ins.
+    """
+
+    def __init__(self, conn: Connection, player: Player):
+        self.conn = conn
+        self.player = player
+        self.settings: Optional[GameSettings] = None
+        self.board: Optional[Board] = None
+        self.seed = 0
+
+    def serve(self):
+        while True:
+            msg = self.conn.recv()
+            kind = msg[0]
+            if kind == CLOSE:
+                return
+            elif kind == INFO:
+                self.conn.send((ANSWER, msg[1], self.player.subscribed_events, None))
+            elif kind == SETTINGS:
+                self.settings, self.seed = msg[1], msg[2]
+                self.board = None
+            elif kind == RESET:
+                self.player.reset(msg[1], msg[2])
+            elif kind == EVENTS_MSG:
+                self._sync(msg[1])
+                self.player.inform_batch(self._unpack_events(msg[2]))
+            elif kind == ACT:
+                _kind, seq, snapshot, event_idx, kwargs = msg
+                self._sync(snapshot)
+                event = IDX_EVENT[event_idx]
+                action, hint = self.player.perform_action(event, **kwargs)
+                if isinstance(action, Player):
+                    self.conn.send((PLAYER_ANSWER, seq, action.pid, hint))
+                else:
+                    self.conn.send((ANSWER, seq, action, hint))
+
+    def _sync(self, snapshot: tuple):
+        game_id, values = snapshot
+        state = unpack_state(values, self.settings)
+        player = self.player
+        if self.board is None:
+            seats = [_Seat(seat, "seat") for seat in range(state.num_players)]
+            self.board = Board(self.settings, seats, rng=random.Random(self.seed))
+            player.board, player.rng = self.board, self.board.rng
+        players = self.board.players
+        if player in players:
+            players[players.index(player)] = players[player.pid]
+        players[player.pid] = player
+        player.game_id = game_id
+        state.to_board(self.board)
+
+    def _unpack_events(self, events: Sequence[tuple]) -> list:
+        batch = []
+        for event_idx, fields, pid in events:
+            event = IDX_EVENT[event_idx]
+            record = KWARGS_CLASSES[event](*fields)
+            if self.player.event_records:
+                batch.append((event, record, pid))
+            else:
+                batch.append((event, record._asdict(), pid is not None))
+        return batch
+
+
+def _serve(conn: Connection, factory: Callable[..., Player], args: tuple, kwargs: dict):
+    try:
+        _Worker(conn, factory(*args, **kwargs)).serve()
+    except (EOFError, KeyboardInterrupt):
+        pass
+    except Exception:
+        # Report the crash to the proxy, which then plays the seat itself
+        try:
+            conn.send((ERROR, traceback.format_exc(), None))
+        except OSError:
+            pass
+
+
+class RemotePlayer(Player):
+    """
+    Seat in the Game for a player that runs in its own process, built there as
+    factory(pid, name, *args, **kwargs). Events go to the worker in batches together
+    with a BoardState snapshot of the board, decisions wait for its answer. Player
+    answers are sent back as pids. Requests are numbered and one at a time, so a
+    decision that was dropped while it waited (e.g. a prefetched chat message of
+    AsyncGame) cannot take the answer to a later one.
+
+    If the worker crashes, the error is logged and the seat plays the first legal
+    option for the rest of its life. Call close() to stop the worker.
+    """
+
+    batched_events = True
+    event_records = True
+
+    def __init__(
+        self,
+        pid,
+        name,
+        factory: Callable[..., Player],
+        args: tuple = (),
+        kwargs: Optional[dict] = None,
+        start_method: Optional[str] = None,
+    ):
+        super().__init__(pid, name)
+        context = multiprocessing.get_context(start_method)
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_serve,
+            args=(child, factory, (pid, name, *args), kwargs or {}),
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+        self.crashed = False
+        self._settings: Optional[GameSettings] = None
+        # Sends come from the game and from executor threads of aperform_action
+        self._send_lock = threading.Lock()
+        self._request_lock = threading.Lock()
+        self._seq = 0
+        reply = self._request(INFO)
+        self.subscribed_events = None if reply is None else reply[1]
+
+    def _send(self, msg: tuple):
+        if self.crashed:
+            return
+        try:
+            with self._send_lock:
+                self.conn.send(msg)
+        except (OSError, ValueError):
+            self._crash("the worker connection is closed")
+
+    def _request(self, kind: int, *args) -> Optional[tuple]:
+        """
+        (kind of answer, answer, hint) of the worker, None if it crashed. Replies to
+        earlier requests that are still in the pipe are skipped.
+        """
+        with self._request_lock:
+            self._seq += 1
+            seq = self._seq
+            self._send((kind, seq, *args))
+            while not self.crashed:
+                try:
+                    reply = self.conn.recv()
+                except (EOFError, OSError):
+                    self._crash("the worker exited")
+                    break
+                if reply[0] == ERROR:
+                    self._crash(reply[1])
+                    break
+                if reply[1] == seq:
+                    return reply[0], reply[2], reply[3]
+        return None
+
+    def _crash(self, reason: str):
+        self.crashed = True
+        logger.warning("Remote player %s crashed, playing fallbacks: %s", self, reason)
+
+    def _snapshot(self) -> tuple:
+        if self.board.settings is not self._settings:
+            self._settings = self.board.settings
+            self._send((SETTINGS, self._settings, self.rng.getrandbits(64)))
+        return self.game_id, pack_state(BoardState.from_board(self.board))
+
+    def reset(self, pid, role=None):
+        super().reset(pid, role)
+        self._send((RESET, pid, role))
+
+    def inform_event(self, event: Event, **kwargs):
+        self.inform_batch([(event, KWARGS_CLASSES[event](**kwargs), None)])
+
+    def personal_event(self, event: Event, **kwargs):
+        self.inform_batch([(event, KWARGS_CLASSES[event](**kwargs), self.pid)])
+
+    def inform_batch(self, events: list[tuple]):
+        if self.crashed:
+            return
+        packed = [
+            (EVENT_IDX[event], pack_record(record), pid)
+            for event, record, pid in events
+        ]
+        self._send((EVENTS_MSG, self._snapshot(), packed))
+
+    def perform_action(self, event_type: Event, **kwargs) -> tuple[Any, dict]:
+        if not self.crashed:
+            reply = self._request(ACT, self._snapshot(), EVENT_IDX[event_type], kwargs)
+            if reply is not None:
+                kind, action, hint = reply
+                if kind == PLAYER_ANSWER:
+                    action = self.board.players[action]
+                return action, hint
+        return self.fallback(event_type, **kwargs), {}
+
+    async def aperform_action(self, event_type: Event, **kwargs) -> tuple[Any, dict]:
+        # Wait for the worker in a thread, so that other seats can decide meanwhile
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: self.perform_action(event_type, **kwargs)
+        )
+
+    def fallback(self, event_type: Event, **kwargs) -> Any:
+        """
+        Answer of a crashed seat: the first legal option, or an empty message
+        """
+        options = self.board.get_legal_options(event_type, **kwargs)
+        return "" if options is None else options[0]
+
+    def close(self):
+        if self.process.is_alive():
+            self._send((CLOSE,))
+            self.process.join(1)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.conn.close()
@@ -0,0 +1,533 @@
+import gc
+import pickle
+import random
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from operator import eq
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from sh_game.board import CLAIMS, Board
+from sh_game.board_state import BoardState
+from sh_game.game import MAX_CHAT_STREAK, Game
+from sh_game.game_settings import default_settings
+from sh_game.player import Player
+from sh_game.types.event_types import Event
+from sh_game.types.game_end_types import GameEnd
+
+# Size of the compressed chunk that follows in a file of save_records
+CHUNK_HEADER = struct.Struct("<I")
+# Events of every round, attribute lookups on Event are slow
+_NOOP = Event.NOOP
+_MESSAGE = Event.MESSAGE
+_VOTES = Event.VOTES
+_NOMINATION = Event.NOMINATION
+_DISCARD = Event.DISCARD
+_PLAY_CARD = Event.PLAY_CARD
+
+
+class GameRecord(NamedTuple):
+    """
+    Everything needed to replay a game without its agents.
+
+    roles: role per seat. decks: the initial deck order and the order after every
+    reshuffle, top card first. actions: (pid, event, action) per answered decision,
+    pid is None for the manager, Player answers are stored as their pid.
+    """
+
+    roles: Tuple[str, ...]
+    decks: List[Tuple[str, ...]]
+    actions: List[Tuple[Optional[int], Event, Any]]
+
+
+class ReplayResult(NamedTuple):
+    game_result: Event
+    game_end_type: GameEnd
+    round_number: int
+    snapshots: Optional[List[BoardState]]
+
+
+class ReplayError(ValueError):
+    pass
+
+
+def _freeze(action: Any) -> Any:
+    if isinstance(action, Player):
+        return action.pid
+    if isinstance(action, (list, tuple)):
+        return tuple(_freeze(a) for a in action)
+    return action
+
+
+class GameRecorder:
+    """
+    Records GameRecords of all games played by a Game after attach(game).
+    """
+
+    event_records = True
+    subscribed_events = frozenset(
+        {Event.GAME_SETTINGS, Event.DECK_SHUFFLE, Event.FASCIST_WIN, Event.LIBERAL_WIN}
+    )
+
+    def __init__(self):
+        self.records: List[GameRecord] = []
+        self.game: Optional[Game] = None
+
+    def attach(self, game: Game):
+        self.game = game
+        game.bus.subscribe(self, self.subscribed_events, records=True)
+
+    def inform_record(self, event: Event, record: NamedTuple):
+        board = self.game.board
+        if event == Event.GAME_SETTINGS:
+            self.game.action_log = []
+            self.records.append(
+                GameRecord(
+                    tuple(p.role for p in board.players),
+                    [tuple(board.policies)],
+                    self.game.action_log,
+                )
+            )
+        elif event == Event.DECK_SHUFFLE:
+            self.records[-1].decks.append(tuple(board.policies))
+        else:
+            actions = self.records[-1].actions
+            actions[:] = [(pid, ev, _freeze(action)) for pid, ev, action in actions]
+            self.game.action_log = None
+
+
+class ScriptedRandom(random.Random):
+    """
+    Replaces the shuffles of Board by recorded orders. Board.setup_new_game shuffles
+    the deck, the players and the roles, every reshuffle shuffles the deck again.
+    A None entry leaves the shuffled list as it is.
+    """
+
+    def __init__(self, orders: Optional[list] = None):
+        super().__init__(0)
+        self.orders: List[Optional[tuple]] = [] if orders is None else orders
+
+    def shuffle(self, x, random=None):
+        if not self.orders:
+            raise ReplayError("Recording has no deck order left for this shuffle")
+        order = self.orders.pop(0)
+        if order is not None:
+            if sorted(order) != sorted(x):
+                raise ReplayError(f"Recorded order {order} does not match {x}")
+            x[:] = order
+
+
+class ReplaySeat(Player):
+    subscribed_events = frozenset()
+
+    def inform_event(self, event: Event, **kwargs):
+        pass
+
+    def personal_event(self, event: Event, **kwargs):
+        pass
+
+    def perform_action(self, event_type: Event, **kwargs):
+        raise ReplayError("Replay seats do not take decisions")
+
+
+class Replayer:
+    """
+    Drives a Board with a recorded action stream, following the flow of Game.run_game
+    without its generators, agents and events. Manager actions are checked against
+    the cached Board.get_legal_actions, player answers against the legal options of
+    their decision, a vote round in one pass. Chat messages and the manager actions
+    that only move the flow on leave the Board as it is. Boards are reused per number
+    of players, so a Replayer is cheap to call many times.
+    """
+
+    def __init__(self):
+        self._boards: Dict[int, Board] = {}
+        # Frozen legal answers of DISCARD and PLAY_CARD by hand
+        self._hands: Dict[Tuple[Event, tuple], frozenset] = {}
+        # Frozen legal answers of the decisions whose options never change
+        self.fixed_options = {
+            event: frozenset(_freeze(o) for o in options)
+            for event, options in (
+                (Event.PRESIDENT_CLAIM, CLAIMS[3]),
+                (Event.PEEK_CLAIM, CLAIMS[3]),
+                (Event.CHANCELLOR_CLAIM, CLAIMS[2]),
+                (Event.INVESTIGATION_CLAIM, ("fascist", "liberal")),
+                (Event.CHANCELLOR_VETO, (True, False)),
+                (Event.PRESIDENT_VETO, (True, False)),
+            )
+        }
+
+    def _board(self, num_players: int) -> Board:
+        board = self._boards.get(num_players)
+        if board is None:
+            board = Board(
+                default_settings(num_players),
+                [ReplaySeat(i, "replay") for i in range(num_players)],
+                # Board.__init__ already sets up a game, keep its shuffles
+                rng=ScriptedRandom([None, None, None]),
+            )
+            self._boards[num_players] = board
+        return board
+
+    def replay(self, record: GameRecord, snapshots: bool = False) -> ReplayResult:
+        board = self._board(len(record.roles))
+        decks = record.decks
+        board.rng.orders = [decks[0], None, list(record.roles), *decks[1:]]
+        board.setup_new_game()
+        run = _Run(self, board, record.actions, [] if snapshots else None)
+        run.play()
+        if run.idx < len(run.actions):
+            raise ReplayError(f"Game ended before action {run.idx}")
+        if snapshots:
+            run.states.append(BoardState.from_board(board))
+        return ReplayResult(
+            run.game_result, run.game_end_type, board.round_number, run.states
+        )
+
+    def hand_options(self, board: Board, event: Event, hand: list) -> frozenset:
+        key = (event, tuple(hand))
+        options = self._hands.get(key)
+        if options is None:
+            options = self._hands[key] = frozenset(
+                _freeze(o) for o in board.get_legal_options(event, hand=hand)
+            )
+        return options
+
+
+class _Run:
+    # One game of Replayer.replay. States get the BoardState after every action,
+    # taken when the next action is due like Game.step returns then
+    def __init__(
+        self,
+        replayer: Replayer,
+        board: Board,
+        actions: List[Tuple[Optional[int], Event, Any]],
+        states: Optional[List[BoardState]],
+    ):
+        self.replayer = replayer
+        self.board = board
+        self.actions = actions
+        self.states = states
+        self.idx = 0
+        self.game_result: Optional[Event] = None
+        self.game_end_type: Optional[GameEnd] = None
+        self._voters: Optional[tuple] = None
+
+    def take(self, pid: Optional[int], event: Event) -> Any:
+        idx = self.idx
+        if idx == len(self.actions):
+            raise ReplayError("Recording ended before the game")
+        rec_pid, rec_event, action = self.actions[idx]
+        if rec_pid != pid or rec_event is not event:
+            raise ReplayError(
+                f"Action {idx}: recorded {rec_pid}/{rec_event}, "
+                f"game waits for {pid}/{event}"
+            )
+        if self.states is not None and idx:
+            self.states.append(BoardState.from_board(self.board))
+        self.idx = idx + 1
+        return action
+
+    def illegal(self, action: Any, event: Event) -> ReplayError:
+        return ReplayError(f"Action {self.idx - 1}: {action} is illegal for {event}")
+
+    def take_option(self, pid: int, event: Event, options) -> Any:
+        action = self.take(pid, event)
+        if action not in options:
+            raise self.illegal(action, event)
+        return action
+
+    def take_target(self, pid: int, event: Event, options: List[Player]) -> Player:
+        target = self.take(pid, event)
+        for player in options:
+            if player.pid == target:
+                return player
+        raise self.illegal(target, event)
+
+    def play(self):
+        board = self.board
+        self.chat()
+        self.nominate()
+        board.phase = 1
+        board.invalidate()
+        while True:
+            self.chat()
+            if self.vote():
+                self.vote_passed()
+            else:
+                self.vote_failed()
+            if self.game_result is not None:
+                return
+            self.chat()
+            if self.game_result is not None:
+                return
+            board.set_next_president()
+            board.round_number += 1
+            self.nominate()
+
+    def nominate(self):
+        board = self.board
+        chancellor = self.take_target(
+            board.president.pid, _NOMINATION, board.get_legal_nominations()
+        )
+        board.nomination(chancellor)
+
+    def chat(self):
+        board = self.board
+        actions = self.actions
+        # Without snapshots manager actions and messages skip take()
+        end = len(actions) if self.states is None else 0
+        move_on = _VOTES if board.phase == 1 else _NOMINATION
+        streak = 0
+        # Messages leave the board and so the cached legal actions as they are
+        legals = board.get_legal_actions()
+        while True:
+            idx = self.idx
+            rec = actions[idx] if idx < end else None
+            if rec is not None and rec[1] is _NOOP and rec[0] is None:
+                action = rec[2]
+                self.idx = idx = idx + 1
+            else:
+                action = self.take(None, _NOOP)
+                idx = self.idx
+            try:
+                event, pid = action
+                legal = pid in legals.get(event, ())
+            except (TypeError, ValueError):
+                legal = False
+            if not legal:
+                raise ReplayError(
+                    f"Action {idx - 1}: {action} is no legal manager action"
+                )
+            if event is _MESSAGE:
+                if streak >= MAX_CHAT_STREAK:
+                    return
+                streak += 1
+                # The message itself is free
+                rec = actions[idx] if idx < end else None
+                if rec is not None and rec[1] is _MESSAGE and rec[0] == pid:
+                    self.idx = idx + 1
+                else:
+                    self.take(pid, _MESSAGE)
+                continue
+            if event is move_on:
+                return
+            if event in (Event.INVESTIGATION_ACTION, Event.EXECUTE_ACTION):
+                self.power(pid, event)
+                if self.game_result is not None:
+                    return
+            elif event is Event.SPECIAL_ELECT_ACTION:
+                self.power(pid, event)
+            else:
+                self.claim(pid, event)
+            legals = board.get_legal_actions()
+
+    def claim(self, pid: int, event: Event):
+        board = self.board
+        self.take_option(pid, event, self.replayer.fixed_options[event])
+        if event is Event.CHANCELLOR_CLAIM:
+            board.play_card_claimed = True
+        elif event is Event.PRESIDENT_CLAIM:
+            board.discard_claimed = True
+        else:
+            board.action_claimed = True
+        board.invalidate()
+
+    def power(self, pid: int, event: Event):
+        board = self.board
+        target = self.take_target(pid, event, board.get_legal_to_act_on())
+        if event is Event.INVESTIGATION_ACTION:
+            board.inv_target = target
+        elif event is Event.EXECUTE_ACTION:
+            board.kill(target)
+            self._voters = None
+            if target.role == "hitler":
+                self.game_result = Event.LIBERAL_WIN
+                self.game_end_type = GameEnd.HITLER_DEAD
+                return
+        else:
+            board.special_elect_choice = target
+        board.action_done = True
+        board.invalidate()
+
+    def vote(self) -> bool:
+        """
+        Whether the recorded vote round passes, checked in one pass over its actions
+        """
+        board = self.board
+        board.on_vote()
+        if self._voters is None:
+            alive = [p.pid for p in board.players if not p.is_dead]
+            self._voters = (
+                alive,
+                [(pid, Event.PERSONAL_VOTE, "ja") for pid in alive],
+                [(pid, Event.PERSONAL_VOTE, "nein") for pid in alive],
+            )
+        alive, ja_votes, nein_votes = self._voters
+        start = self.idx
+        votes = self.actions[start : start + len(alive)]
+        ja = sum(map(eq, votes, ja_votes))
+        if len(votes) < len(alive) or ja + sum(map(eq, votes, nein_votes)) < len(alive):
+            # Find the first bad vote for the error
+            for pid in alive:
+                self.take_option(pid, Event.PERSONAL_VOTE, ("ja", "nein"))
+        if self.states is not None:
+            # The board only changes after the last vote
+            if start:
+                self.states.append(BoardState.from_board(board))
+            self.states += [BoardState.from_board(board) for _ in alive[1:]]
+        self.idx = start + len(alive)
+        return ja > len(alive) - ja
+
+    def vote_failed(self):
+        board = self.board
+        if board.vote_failed():
+            self.enact(board.draw_policy(1)[0])
+
+    def enact(self, policy: str):
+        result = self.board.enact_policy(policy)
+        if result is not None:
+            self.game_result = result
+            if result is Event.LIBERAL_WIN:
+                self.game_end_type = GameEnd.LIBERAL_CARDS
+            else:
+                self.game_end_type = GameEnd.FASCIST_CARDS
+
+    def vote_passed(self):
+        board = self.board
+        president, chancellor = board.president.pid, board.chancellor.pid
+        if board.chancellor.role == "hitler" and board.fascist_track >= 3:
+            self.game_result = Event.FASCIST_WIN
+            self.game_end_type = GameEnd.HITLER_CHANCELLOR
+            return
+        board.vote_success()
+        hand = board.draw_policy(3)
+        options = self.replayer.hand_options
+        take, discard = self.take_option(
+            president, _DISCARD, options(board, _DISCARD, hand)
+        )
+        board.discards.append(discard)
+        enact, discard = self.take_option(
+            chancellor, _PLAY_CARD, options(board, _PLAY_CARD, list(take))
+        )
+        board.discards.append(discard)
+        if board.can_veto:
+            fixed = self.replayer.fixed_options
+            veto = self.take_option(
+                chancellor, Event.CHANCELLOR_VETO, fixed[Event.CHANCELLOR_VETO]
+            )
+            if veto and self.take_option(
+                president, Event.PRESIDENT_VETO, fixed[Event.PRESIDENT_VETO]
+            ):
+                board.discards.append(enact)
+                self.vote_failed()
+                return
+        self.enact(enact)
+        if self.game_result is None and enact == "fascist":
+            self.introduce_power()
+
+    def introduce_power(self):
+        board = self.board
+        power = board.settings.fascist_track[board.fascist_track - 1]
+        if power is None:
+            return
+        if power == "inv":
+            board.action_type = Event.INVESTIGATION_ACTION
+        elif power == "peek":
+            # Peeking reshuffles a short deck
+            board.peek_policy(3)
+            board.action_type = Event.PEEK_MESSAGE
+            board.action_done = True
+        elif power == "execute":
+            board.action_type = Event.EXECUTE_ACTION
+        elif power == "special_elect":
+            board.action_type = Event.SPECIAL_ELECT_ACTION
+        else:
+            raise ReplayError(f"Invalid president power {power}")
+        board.invalidate()
+
+
+def save_records(path: str, records: Iterable[GameRecord], chunk_size: int = 1000):
+    """
+    Write records to a file of chunks of chunk_size records. Every chunk is pickled
+    and compressed on its own, behind its length as a CHUNK_HEADER.
+    """
+    with open(path, "wb") as file:
+        chunk = []
+        for record in records:
+            chunk.append(GameRecord(record.roles, record.decks, list(record.actions)))
+            if len(chunk) == chunk_size:
+                _write_chunk(file, chunk)
+                chunk = []
+        if chunk:
+            _write_chunk(file, chunk)
+
+
+def _write_chunk(file: BinaryIO, chunk: List[GameRecord]):
+    blob = zlib.compress(pickle.dumps(chunk, protocol=pickle.HIGHEST_PROTOCOL))
+    file.write(CHUNK_HEADER.pack(len(blob)))
+    file.write(blob)
+
+
+def read_chunks(path: str) -> Iterator[bytes]:
+    """
+    The compressed chunks of a file of save_records, unpack them with unpack_chunk
+    """
+    with open(path, "rb") as file:
+        while True:
+            header = file.read(CHUNK_HEADER.size)
+            if not header:
+                return
+            (size,) = CHUNK_HEADER.unpack(header)
+            yield file.read(size)
+
+
+def unpack_chunk(blob: bytes) -> List[GameRecord]:
+    """
+    Records of a chunk of read_chunks. Only unpack trusted files, they are unpickled.
+    """
+    # Otherwise the collector scans the records again and again while they are built
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.loads(zlib.decompress(blob))
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def load_chunks(path: str) -> Iterator[List[GameRecord]]:
+    for blob in read_chunks(path):
+        yield unpack_chunk(blob)
+
+
+def load_records(path: str) -> Iterator[GameRecord]:
+    for chunk in load_chunks(path):
+        yield from chunk
+
+
+def _replay_chunk(blob: bytes) -> List[ReplayResult]:
+    replayer = Replayer()
+    return [replayer.replay(record) for record in unpack_chunk(blob)]
+
+
+def replay_file(path: str, max_workers: Optional[int] = None) -> List[ReplayResult]:
+    """
+    Replay all games of a file of save_records in a process pool, one chunk per
+    task. The chunks are passed on compressed, only the workers unpickle them.
+    """
+    results: List[ReplayResult] = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for chunk_results in executor.map(_replay_chunk, read_chunks(path)):
+            results.extend(chunk_results)
+    return results
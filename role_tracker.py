@@ -0,0 +1,222 @@
+from functools import lru_cache
+from itertools import combinations
+from typing import Callable, Dict, NamedTuple, Optional
+
+import numpy as np
+
+from sh_game.game_settings import GameSettings, default_settings
+from sh_game.types.event_types import Event
+from sh_game.types.int_codes import FASCIST, HITLER, LIBERAL, ROLE_CODES, ROLE_NAMES
+
+
+class AssignmentTable(NamedTuple):
+    """
+    All role assignments of a player count, one row per assignment.
+    roles holds role codes, one_hot is roles one-hot encoded as (A, seats * 3).
+    """
+
+    roles: np.ndarray
+    one_hot: np.ndarray
+    fascist_team: np.ndarray
+    hitler: np.ndarray
+
+
+@lru_cache(maxsize=None)
+def assignment_table(num_liberals: int, num_fascists: int) -> AssignmentTable:
+    """
+    Every way to seat num_liberals liberals and num_fascists fascists, one of which
+    is Hitler. Computed once per player count and shared, the arrays are read-only.
+    """
+    num_players = num_liberals + num_fascists
+    rows = []
+    for hitler in range(num_players):
+        others = [seat for seat in range(num_players) if seat != hitler]
+        for fascists in combinations(others, num_fascists - 1):
+            row = [LIBERAL] * num_players
+            row[hitler] = HITLER
+            for seat in fascists:
+                row[seat] = FASCIST
+            rows.append(row)
+    roles = np.array(rows, dtype=np.int8)
+    one_hot = np.zeros((len(roles), num_players, len(ROLE_NAMES)))
+    np.put_along_axis(one_hot, roles[..., None].astype(np.intp), 1, axis=2)
+    table = AssignmentTable(
+        roles,
+        one_hot.reshape(len(roles), -1),
+        roles != LIBERAL,
+        roles == HITLER,
+    )
+    for array in table:
+        array.flags.writeable = False
+    return table
+
+
+# Gets the tracker and the event record, returns a likelihood per assignment or None
+Likelihood = Callable[["RoleTracker", NamedTuple], Optional[np.ndarray]]
+
+
+class RoleTracker:
+    """
+    Exact posterior over the role assignments of one game, as seen by seat pid (None
+    for a spectator without private information).
+
+    Feed it the event records of the game via inform_record and
+    personal_record(event, pid, record), or attach it to a Game. Certain knowledge
+    filters assignments: the own role, ALL_ROLE_CALLS, investigation results,
+    executed players and elected chancellors that did not end the game, who are not
+    Hitler. Soft evidence comes from likelihoods, functions per Event that return a
+    weight per assignment, see claim_conflict_likelihood.
+    """
+
+    event_records = True
+
+    def __init__(
+        self,
+        pid: Optional[int] = None,
+        likelihoods: Optional[Dict[Event, Likelihood]] = None,
+        settings: Optional[GameSettings] = None,
+    ):
+        self.pid = pid
+        self.likelihoods: Dict[Event, Likelihood] = dict(likelihoods or {})
+        self.settings = settings
+        self.table: Optional[AssignmentTable] = None
+        self.weights: Optional[np.ndarray] = None
+        self.board = None
+        self.fascist_track = 0
+        self.nomination: Optional[tuple[int, int]] = None
+        # Last elected (president, chancellor) and the hands they claimed since
+        self.government: Optional[tuple[int, int]] = None
+        self.claims: Dict[Event, tuple] = {}
+        # Seat that is not Hitler if the next event is not a win
+        self._not_hitler_unless_win: Optional[int] = None
+
+    def reset(self, num_players: int):
+        if self.settings is None or self.settings.num_players != num_players:
+            self.settings = default_settings(num_players)
+        self.table = assignment_table(
+            self.settings.num_liberals, self.settings.num_fascists
+        )
+        self.weights = np.ones(len(self.table.roles))
+        self.fascist_track = self.settings.fascist_pre_enact
+        self.nomination = self.government = None
+        self.claims = {}
+        self._not_hitler_unless_win = None
+
+    def attach(self, game):
+        self.board = game.board
+        game.bus.subscribe(self, observe_personal=True, records=True)
+
+    def detach(self, game):
+        game.bus.unsubscribe(self)
+
+    def filter(self, mask: np.ndarray):
+        """
+        Keep only the assignments where mask is True
+        """
+        self.weights *= mask
+        if not self.weights.any():
+            raise ValueError("No role assignment is consistent with the game")
+
+    def weigh(self, likelihood: np.ndarray):
+        self.weights *= likelihood
+        if not self.weights.any():
+            raise ValueError("Likelihoods ruled out every role assignment")
+
+    def observe_role(self, seat: int, role: str):
+        self.filter(self.table.roles[:, seat] == ROLE_CODES[role])
+
+    def observe_party(self, seat: int, party: str):
+        self.filter(self.table.fascist_team[:, seat] == (party == "fascist"))
+
+    def observe_not_hitler(self, seat: int):
+        self.filter(~self.table.hitler[:, seat])
+
+    def inform_record(self, event: Event, record: NamedTuple):
+        if event == Event.GAME_SETTINGS:
+            self.reset(record.num_players)
+            return
+        if self._not_hitler_unless_win is not None:
+            if event not in (Event.FASCIST_WIN, Event.LIBERAL_WIN):
+                self.observe_not_hitler(self._not_hitler_unless_win)
+            self._not_hitler_unless_win = None
+        if event == Event.NOMINATION:
+            self.nomination = (record.pres, record.chanc)
+        elif event == Event.VOTES:
+            ja = sum(vote == "ja" for vote in record.votes.values())
+            if 2 * ja > len(record.votes):
+                self.government = self.nomination
+                self.claims = {}
+                if self.fascist_track >= 3:
+                    self._not_hitler_unless_win = self.nomination[1]
+        elif event == Event.ENACTED:
+            if record.policy == "fascist":
+                self.fascist_track = record.num_enacted
+        elif event == Event.EXECUTE_ACTION:
+            self._not_hitler_unless_win = record.targ
+        elif event in (Event.PRESIDENT_CLAIM, Event.CHANCELLOR_CLAIM):
+            self.claims[event] = record.hand
+        likelihood = self.likelihoods.get(event)
+        if likelihood is not None:
+            weights = likelihood(self, record)
+            if weights is not None:
+                self.weigh(weights)
+
+    def personal_record(self, event: Event, pid: int, record: NamedTuple):
+        if pid != self.pid:
+            return
+        if event == Event.PERSONAL_ROLE_CALL:
+            # Only known through the board, without one call observe_role yourself
+            if self.board is not None:
+                self.observe_role(pid, self.board.players[pid].role)
+        elif event == Event.ALL_ROLE_CALLS:
+            for seat, role in record.all_roles.items():
+                self.observe_role(seat, role)
+        elif event == Event.INVESTIGATION_RESULT:
+            self.observe_party(record.inv_pid, record.inv_role)
+
+    @property
+    def num_consistent(self) -> int:
+        return int(np.count_nonzero(self.weights))
+
+    def marginals(self) -> np.ndarray:
+        """
+        (num_players, 3) probabilities of every seat having each role of ROLE_NAMES
+        """
+        probs = self.weights @ self.table.one_hot / self.weights.sum()
+        return probs.reshape(-1, len(ROLE_NAMES))
+
+    def p_fascist_team(self) -> np.ndarray:
+        return self.weights @ self.table.fascist_team / self.weights.sum()
+
+    def p_hitler(self) -> np.ndarray:
+        return self.weights @ self.table.hitler / self.weights.sum()
+
+    def sample(self, rng: np.random.Generator, size: int = 1) -> np.ndarray:
+        """
+        (size, num_players) role codes drawn from the posterior
+        """
+        probs = self.weights / self.weights.sum()
+        return self.table.roles[rng.choice(len(probs), size=size, p=probs)]
+
+
+def claim_conflict_likelihood(lie_weight: float = 0.05) -> Likelihood:
+    """
+    Likelihood for PRESIDENT_CLAIM and CHANCELLOR_CLAIM. If the claims of the last
+    government contradict each other, at least one of the two lied, which a liberal
+    would rarely do. Assignments in which both are liberal get lie_weight.
+    """
+
+    def likelihood(tracker: RoleTracker, record: NamedTuple) -> Optional[np.ndarray]:
+        pres_hand = tracker.claims.get(Event.PRESIDENT_CLAIM)
+        chanc_hand = tracker.claims.get(Event.CHANCELLOR_CLAIM)
+        if pres_hand is None or chanc_hand is None or tracker.government is None:
+            return None
+        # The president discards one of the claimed cards and passes on the others
+        drawn = pres_hand.count("fascist")
+        if chanc_hand.count("fascist") in (drawn - 1, drawn):
+            return None
+        pres, chanc = tracker.government
+        team = tracker.table.fascist_team
+        return np.where(team[:, pres] | team[:, chanc], 1.0, lie_weight)
+
+    return likelihood
@@ -0,0 +1,209 @@
+import argparse
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from sh_game.baselines.manager import BaselineManager
+from sh_game.baselines.player import BaselinePlayer
+from sh_game.game import Game
+from sh_game.manager import Manager
+from sh_game.player import Player
+from sh_game.tournament_stats import (
+    GAME_ENDS,
+    TEAMS,
+    SequentialTest,
+    TournamentStats,
+)
+from sh_game.types.int_codes import ROLE_NAMES
+
+# Factories must be picklable (e.g. classes or functools.partial) to reach the workers
+PlayerFactory = Callable[[int], Player]
+ManagerFactory = Callable[[], Manager]
+
+
+@dataclass
+class TournamentResult:
+    """
+    Results of a tournament. The counts live in stats, the properties read them as
+    Counters.
+    """
+
+    stats: TournamentStats = field(default_factory=TournamentStats)
+
+    @property
+    def num_games(self) -> int:
+        return self.stats.num_games
+
+    @property
+    def wins(self) -> Counter:
+        """
+        Winning team ("liberal"/"fascist") -> number of games
+        """
+        return _counter(zip(TEAMS, self.stats.team_wins.sum(axis=0)))
+
+    @property
+    def end_types(self) -> Counter:
+        """
+        GameEnd -> number of games
+        """
+        return _counter(zip(GAME_ENDS, self.stats.end_types.sum(axis=0)))
+
+    @property
+    def rounds(self) -> Counter:
+        """
+        Number of rounds -> number of games, MAX_ROUNDS counts all longer games too
+        """
+        return _counter(enumerate(self.stats.rounds.sum(axis=0)))
+
+    @property
+    def agent_games(self) -> Counter:
+        """
+        (factory index, role) -> number of games
+        """
+        return self._by_agent_role(self.stats.games)
+
+    @property
+    def agent_wins(self) -> Counter:
+        return self._by_agent_role(self.stats.wins)
+
+    @staticmethod
+    def _by_agent_role(counts: np.ndarray) -> Counter:
+        counts = counts.sum(axis=1)
+        return _counter(
+            ((agent, role), counts[agent, code])
+            for agent in range(len(counts))
+            for code, role in enumerate(ROLE_NAMES)
+        )
+
+    def merge(self, other: "TournamentResult"):
+        self.stats.merge(other.stats)
+
+    def add_game(self, game: Game, agent_of: dict[int, int]):
+        self.stats.add_game(game, agent_of)
+
+    def win_rate(self, agent: int, role: Optional[str] = None) -> float:
+        return self.stats.win_rate(agent, role)[0]
+
+
+def _counter(items) -> Counter:
+    return Counter({key: int(num) for key, num in items if num})
+
+
+def shard_seeds(seed: int, num_shards: int) -> List[int]:
+    return [
+        int(child.generate_state(1)[0])
+        for child in np.random.SeedSequence(seed).spawn(num_shards)
+    ]
+
+
+def play_shard(
+    shard_seed: int,
+    num_games: int,
+    player_factories: Sequence[PlayerFactory],
+    seat_counts: Sequence[int],
+    manager_factory: ManagerFactory,
+) -> TournamentResult:
+    rng = random.Random(shard_seed)
+    result = TournamentResult()
+    games: dict[int, Game] = {}
+    agent_of: dict[int, int] = {}
+    for game_idx in range(num_games):
+        num_players = seat_counts[game_idx % len(seat_counts)]
+        if num_players not in games:
+            players = []
+            for pid in range(num_players):
+                agent = pid % len(player_factories)
+                players.append(player_factories[agent](pid))
+                agent_of[id(players[-1])] = agent
+            games[num_players] = Game(
+                manager=manager_factory(), players=players, rng=rng
+            )
+        game = games[num_players]
+        game.run_game()
+        result.add_game(game, agent_of)
+    return result
+
+
+def run_tournament(
+    player_factories: Sequence[PlayerFactory],
+    num_games: int,
+    seat_counts: Sequence[int] = (5, 6, 7, 8, 9, 10),
+    seed: int = 0,
+    max_workers: Optional[int] = None,
+    games_per_shard: int = 100,
+    manager_factory: ManagerFactory = partial(BaselineManager, verbose=False),
+    sequential: Optional[SequentialTest] = None,
+) -> TournamentResult:
+    """
+    Play num_games games spread over a process pool.
+
+    Seats are filled with the player factories in turn. Every shard of games_per_shard
+    games gets its own seed derived from seed, so a tournament is reproducible
+    independent of the number of workers.
+
+    With a sequential test, the tournament stops at the first shard after which the
+    test is settled, see sequential.verdict. Shards are merged in order and only a
+    few run ahead, so the stopping point does not depend on the workers either.
+    """
+    assert all(5 <= n <= 10 for n in seat_counts)
+    shard_sizes = [games_per_shard] * (num_games // games_per_shard)
+    if num_games % games_per_shard:
+        shard_sizes.append(num_games % games_per_shard)
+    shards = list(zip(shard_seeds(seed, len(shard_sizes)), shard_sizes))
+    ahead = 2 * (max_workers or os.cpu_count() or 1)
+    result = TournamentResult()
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    settled = False
+    try:
+        futures = {}
+        for idx in range(len(shards)):
+            for ahead_idx in range(idx, min(idx + ahead, len(shards))):
+                if ahead_idx not in futures:
+                    shard_seed, size = shards[ahead_idx]
+                    futures[ahead_idx] = executor.submit(
+                        play_shard,
+                        shard_seed,
+                        size,
+                        player_factories,
+                        seat_counts,
+                        manager_factory,
+                    )
+            result.merge(futures.pop(idx).result())
+            if sequential is not None and sequential.check(result.stats):
+                settled = True
+                break
+    finally:
+        # Once settled, do not wait for the shards that already run ahead
+        executor.shutdown(wait=not settled, cancel_futures=True)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tournament of baseline players")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seats", type=int, nargs="+", default=[5, 6, 7, 8, 9, 10])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    result = run_tournament(
+        [partial(BaselinePlayer, name="baseline_player")],
+        num_games=args.games,
+        seat_counts=args.seats,
+        seed=args.seed,
+        max_workers=args.workers,
+    )
+    print(f"Games: {result.num_games}")
+    print(f"Wins: {dict(result.wins)}")
+    print(f"Game ends: {dict(result.end_types)}")
+    print(f"Rounds: {dict(sorted(result.rounds.items()))}")
+    print(f"Round stats: {result.stats.length_summary()}")
+    for team in ("liberal", "fascist"):
+        rate, lo, hi = result.stats.team_win_rate(team)
+        print(f"{team} win rate: {rate:.3f} [{lo:.3f}, {hi:.3f}]")
@@ -0,0 +1,281 @@
+import math
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+import numpy as np
+
+from sh_game.types.event_types import Event
+from sh_game.types.game_end_types import GameEnd
+from sh_game.types.int_codes import ROLE_CODES, ROLE_NAMES
+
+if TYPE_CHECKING:
+    from sh_game.game import Game
+
+MIN_PLAYERS = 5
+SEAT_COUNTS = range(MIN_PLAYERS, 11)
+GAME_ENDS = list(GameEnd)
+TEAMS = ("liberal", "fascist")
+# Games with more rounds share the last bucket of the length histogram
+MAX_ROUNDS = 40
+
+
+def wilson_interval(wins: float, n: float, confidence: float = 0.95):
+    """
+    Wilson score interval of a win rate, (nan, nan, nan) without games
+    """
+    if n == 0:
+        return math.nan, math.nan, math.nan
+    z = _z(confidence)
+    rate = float(wins) / float(n)
+    center = (rate + z * z / (2 * n)) / (1 + z * z / n)
+    spread = math.sqrt(rate * (1 - rate) / n + z * z / (4 * n * n))
+    radius = z * spread / (1 + z * z / n)
+    return rate, center - radius, center + radius
+
+
+def _z(confidence: float) -> float:
+    # Inverse of the standard normal cdf at (1 + confidence) / 2, by bisection
+    target = (1 + confidence) / 2
+    lo, hi = 0.0, 10.0
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        if 0.5 * (1 + math.erf(mid / math.sqrt(2))) < target:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+def confidence_sequence_radius(
+    n: int, variance: float, alpha: float = 0.05, t_opt: int = 1000
+) -> float:
+    """
+    Radius of a two-sided asymptotic confidence sequence for a mean (Waudby-Smith et
+    al., time-uniform central limit theory). The interval holds at all n at once, so
+    it can be checked after every game without inflating the error rate. t_opt is
+    the number of games at which the radius is tightest.
+    """
+    if n < 2:
+        return math.inf
+    rho2 = (-2 * math.log(alpha) + math.log(-2 * math.log(alpha) + 1)) / t_opt
+    scale = n * variance * rho2 + 1
+    return math.sqrt(2 * scale / (n * n * rho2) * math.log(math.sqrt(scale) / alpha))
+
+
+class TournamentStats:
+    """
+    Streaming results of a tournament in count arrays, indexed by agent (factory
+    index), seat count (num_players - 5) and role code, so merging shards is adding
+    arrays. Kept per seat count: team wins, GameEnd counts and a histogram of the
+    number of rounds. Kept per pair of agents: sums over the games in which both
+    played of the difference of their scores, the fraction of their seats that won.
+    """
+
+    def __init__(self, num_agents: int = 0):
+        seats, roles = len(SEAT_COUNTS), len(ROLE_NAMES)
+        self.games = np.zeros((num_agents, seats, roles), dtype=np.int64)
+        self.wins = np.zeros((num_agents, seats, roles), dtype=np.int64)
+        self.team_wins = np.zeros((seats, len(TEAMS)), dtype=np.int64)
+        self.end_types = np.zeros((seats, len(GAME_ENDS)), dtype=np.int64)
+        self.rounds = np.zeros((seats, MAX_ROUNDS + 1), dtype=np.int64)
+        self.pair_games = np.zeros((num_agents, num_agents), dtype=np.int64)
+        self.pair_sum = np.zeros((num_agents, num_agents))
+        self.pair_sq = np.zeros((num_agents, num_agents))
+
+    @property
+    def num_agents(self) -> int:
+        return len(self.games)
+
+    @property
+    def num_games(self) -> int:
+        return int(self.team_wins.sum())
+
+    def _grow(self, num_agents: int):
+        grow = num_agents - self.num_agents
+        if grow <= 0:
+            return
+        self.games = np.pad(self.games, ((0, grow), (0, 0), (0, 0)))
+        self.wins = np.pad(self.wins, ((0, grow), (0, 0), (0, 0)))
+        self.pair_games = np.pad(self.pair_games, ((0, grow), (0, grow)))
+        self.pair_sum = np.pad(self.pair_sum, ((0, grow), (0, grow)))
+        self.pair_sq = np.pad(self.pair_sq, ((0, grow), (0, grow)))
+
+    def add_game(self, game: "Game", agent_of: Dict[int, int]):
+        players = game.board.players
+        size = len(players) - MIN_PLAYERS
+        team = 0 if game.game_result == Event.LIBERAL_WIN else 1
+        self.team_wins[size, team] += 1
+        self.end_types[size, GAME_ENDS.index(game.game_end_type)] += 1
+        self.rounds[size, min(game.board.round_number, MAX_ROUNDS)] += 1
+
+        agents = [agent_of[id(player)] for player in players]
+        self._grow(max(agents) + 1)
+        seats = np.zeros(self.num_agents)
+        won = np.zeros(self.num_agents)
+        for agent, player in zip(agents, players):
+            role = ROLE_CODES[player.role]
+            self.games[agent, size, role] += 1
+            seats[agent] += 1
+            if player.party_membership == TEAMS[team]:
+                self.wins[agent, size, role] += 1
+                won[agent] += 1
+        present = np.flatnonzero(seats)
+        scores = won[present] / seats[present]
+        diff = scores[:, None] - scores[None, :]
+        pairs = np.ix_(present, present)
+        self.pair_games[pairs] += 1
+        self.pair_sum[pairs] += diff
+        self.pair_sq[pairs] += diff * diff
+
+    def merge(self, other: "TournamentStats"):
+        self._grow(other.num_agents)
+        n = other.num_agents
+        self.games[:n] += other.games
+        self.wins[:n] += other.wins
+        self.team_wins += other.team_wins
+        self.end_types += other.end_types
+        self.rounds += other.rounds
+        self.pair_games[:n, :n] += other.pair_games
+        self.pair_sum[:n, :n] += other.pair_sum
+        self.pair_sq[:n, :n] += other.pair_sq
+
+    @staticmethod
+    def _sizes(num_players: Optional[int]):
+        return slice(None) if num_players is None else num_players - MIN_PLAYERS
+
+    def win_rate(
+        self,
+        agent: int,
+        role: Optional[str] = None,
+        num_players: Optional[int] = None,
+        confidence: float = 0.95,
+    ) -> Tuple[float, float, float]:
+        """
+        (win rate, lower, upper) of the seats of agent, optionally with one role or
+        seat count. The Wilson interval treats the seats of a game as independent.
+        """
+        if agent >= self.num_agents:
+            return wilson_interval(0, 0)
+        roles = slice(None) if role is None else ROLE_CODES[role]
+        sizes = self._sizes(num_players)
+        wins = self.wins[agent, sizes, roles].sum()
+        return wilson_interval(wins, self.games[agent, sizes, roles].sum(), confidence)
+
+    def team_win_rate(
+        self, team: str, num_players: Optional[int] = None, confidence: float = 0.95
+    ) -> Tuple[float, float, float]:
+        team_wins = self.team_wins[self._sizes(num_players)]
+        wins = team_wins[..., TEAMS.index(team)].sum()
+        return wilson_interval(wins, team_wins.sum(), confidence)
+
+    def end_type_distribution(
+        self, num_players: Optional[int] = None
+    ) -> Dict[GameEnd, float]:
+        counts = self.end_types[self._sizes(num_players)]
+        if counts.ndim > 1:
+            counts = counts.sum(axis=0)
+        total = counts.sum()
+        return {
+            end: counts[i] / total if total else math.nan
+            for i, end in enumerate(GAME_ENDS)
+        }
+
+    def length_summary(self, num_players: Optional[int] = None) -> Dict[str, float]:
+        """
+        Mean, standard deviation and quantiles of the number of rounds per game
+        """
+        counts = self.rounds[self._sizes(num_players)]
+        if counts.ndim > 1:
+            counts = counts.sum(axis=0)
+        total = counts.sum()
+        if not total:
+            return {"games": 0}
+        rounds = np.arange(len(counts))
+        mean = counts @ rounds / total
+        cumulative = np.cumsum(counts)
+
+        def quantile(q: float) -> int:
+            return int(np.searchsorted(cumulative, q * total))
+
+        return {
+            "games": int(total),
+            "mean": float(mean),
+            "std": float(np.sqrt(counts @ (rounds - mean) ** 2 / total)),
+            "p10": quantile(0.1),
+            "p50": quantile(0.5),
+            "p90": quantile(0.9),
+            "max": int(np.flatnonzero(counts)[-1]),
+        }
+
+    def score_difference(
+        self, agent_a: int, agent_b: int, alpha: float = 0.05, t_opt: int = 1000
+    ) -> Tuple[float, float, int]:
+        """
+        Mean score of agent_a minus that of agent_b over the games both played, the
+        radius of its confidence sequence, and the number of games
+        """
+        if max(agent_a, agent_b) >= self.num_agents:
+            return math.nan, math.inf, 0
+        n = int(self.pair_games[agent_a, agent_b])
+        if not n:
+            return math.nan, math.inf, 0
+        mean = self.pair_sum[agent_a, agent_b] / n
+        variance = max(self.pair_sq[agent_a, agent_b] / n - mean * mean, 0.0)
+        return mean, confidence_sequence_radius(n, variance, alpha, t_opt), n
+
+    def summary(self) -> dict:
+        return {
+            "games": self.num_games,
+            "team_win_rate": {team: self.team_win_rate(team) for team in TEAMS},
+            "agents": {
+                agent: {
+                    role: self.win_rate(agent, role) for role in (None, *ROLE_NAMES)
+                }
+                for agent in range(self.num_agents)
+            },
+            "end_types": {
+                end.value: p for end, p in self.end_type_distribution().items()
+            },
+            "rounds": self.length_summary(),
+        }
+
+
+class SequentialTest:
+    """
+    Stopping rule for a tournament between agent_a and agent_b, based on the
+    confidence sequence of their score difference. It is settled once the sequence
+    excludes 0 (verdict "a" or "b", the better agent) or, with margin > 0, once it
+    lies within +-margin ("equal"). min_games guards the asymptotic interval against
+    stopping on very few games. The error rate stays below alpha however often the
+    rule is checked.
+    """
+
+    def __init__(
+        self,
+        agent_a: int = 0,
+        agent_b: int = 1,
+        alpha: float = 0.05,
+        margin: float = 0.0,
+        min_games: int = 200,
+        t_opt: int = 1000,
+    ):
+        self.agent_a = agent_a
+        self.agent_b = agent_b
+        self.alpha = alpha
+        self.margin = margin
+        self.min_games = min_games
+        self.t_opt = t_opt
+        self.verdict: Optional[str] = None
+
+    def check(self, stats: TournamentStats) -> bool:
+        mean, radius, n = stats.score_difference(
+            self.agent_a, self.agent_b, self.alpha, self.t_opt
+        )
+        if n < self.min_games:
+            return False
+        if mean - radius > 0:
+            self.verdict = "a"
+        elif mean + radius < 0:
+            self.verdict = "b"
+        elif abs(mean) + radius < self.margin:
+            self.verdict = "equal"
+        return self.verdict is not None
@@ -0,0 +1,13 @@
+# Small integer codes for roles and policy cards used by the array based engines
+
+LIBERAL = 0
+FASCIST = 1
+HITLER = 2
+
+ROLE_NAMES = ("liberal", "fascist", "hitler")
+ROLE_CODES = {name: code for code, name in enumerate(ROLE_NAMES)}
+
+CARD_NAMES = ("liberal", "fascist")
+CARD_CODES = {name: code for code, name in enumerate(CARD_NAMES)}
+
+NO_SEAT = -1
@@ -1,29 +1,54 @@
 from dataclasses import dataclass
-from typing import Literal, NamedTuple, Optional
+from types import MappingProxyType
+from typing import Literal, Mapping, NamedTuple, Optional
 
-from sh_game.player import Player
 from sh_game.types.event_types import Event
 from sh_game.types.game_end_types import GameEnd
 
 YN = Literal["yes", "no"]
 JN = Literal["ja", "nein"]
 TEAM = Literal["fascist", "liberal"]
+# Seats are referenced by pid, so that records are cheap to store and serialize
+PID = int
 
 
+def _read_only(name: str, fields: list, mappings: tuple) -> type:
+    """
+    NamedTuple that stores the fields named in mappings as read-only views of a
+    copy, so no recipient of a shared record can change what the others see
+    """
+    base = NamedTuple(name, fields)
+    mappings = [base._fields.index(field) for field in mappings]
+
+    def __new__(cls, *args, **kwargs):
+        values = list(base.__new__(cls, *args, **kwargs))
+        for idx in mappings:
+            if values[idx] is not None:
+                values[idx] = MappingProxyType(dict(values[idx]))
+        return tuple.__new__(cls, values)
+
+    return type(name, (base,), {"__slots__": (), "__new__": __new__})
+
+
+# The Game builds one record per event and hands the same object to all recipients
 KWARGS_CLASSES = {
     Event.PERSONAL_ROLE_CALL: NamedTuple("PersonalRoleCall", []),
-    Event.ALL_ROLE_CALLS: NamedTuple(
-        "AllRoleCalls", [("all_roles", dict[Player, str])]
+    Event.ALL_ROLE_CALLS: _read_only(
+        "AllRoleCalls", [("all_roles", Mapping[PID, str])], ("all_roles",)
     ),
     Event.PERSONAL_VOTE: NamedTuple("PersonalVote", [("vote", JN)]),
-    Event.DRAW: NamedTuple("Draw", [("hand", list[TEAM])]),
+    Event.DRAW: NamedTuple("Draw", [("hand", tuple[TEAM, ...])]),
     Event.DISCARD: NamedTuple("Discard", [("dropped_card", TEAM)]),
-    Event.GET_CARD: NamedTuple("GetCard", [("hand", list[TEAM]), ("pres", Player)]),
+    Event.GET_CARD: NamedTuple("GetCard", [("hand", tuple[TEAM, ...]), ("pres", PID)]),
     Event.PLAY_CARD: NamedTuple("PlayCard", [("card", TEAM)]),
-    Event.PEEK_PERSONAL: NamedTuple("PeekPersonal", [("peek", list[TEAM])]),
-    Event.NOMINATION: NamedTuple("Nomination", [("pres", Player), ("chanc", Player)]),
-    Event.VOTES: NamedTuple("Votes", [("votes", dict[Player, JN])]),
-    Event.MESSAGE: NamedTuple("Message", [("player", Player), ("message", str)]),
+    Event.PEEK_PERSONAL: NamedTuple("PeekPersonal", [("peek", tuple[TEAM, ...])]),
+    Event.NOMINATION: NamedTuple("Nomination", [("pres", PID), ("chanc", PID)]),
+    Event.VOTES: _read_only("Votes", [("votes", Mapping[PID, JN])], ("votes",)),
+    Event.MESSAGE: _read_only(
+        "Message",
+        [("player", PID), ("message", str), ("hint", Optional[Mapping])],
+        ("hint",),
+    ),
     Event.ENACTED: NamedTuple(
         "Enacted", [("policy", TEAM), ("num_enacted", int), ("maximum", int)]
     ),
@@ -31,39 +56,39 @@ KWARGS_CLASSES = {
         "ElectionFail", [("num_fails", int), ("max_fails", int)]
     ),
     Event.PRESIDENT_CLAIM: NamedTuple(
-        "PresidentClaim", [("hand", list[TEAM]), ("player", Player)]
+        "PresidentClaim", [("hand", tuple[TEAM, ...]), ("player", PID)]
     ),
     Event.CHANCELLOR_CLAIM: NamedTuple(
-        "ChancellorClaim", [("hand", list[TEAM]), ("player", Player)]
+        "ChancellorClaim", [("hand", tuple[TEAM, ...]), ("player", PID)]
     ),
     Event.INVESTIGATION_MESSAGE: NamedTuple("InvestigationMessage", []),
     Event.INVESTIGATION_ACTION: NamedTuple(
-        "InvestigationAction", [("pres", Player), ("inved", Player)]
+        "InvestigationAction", [("pres", PID), ("inved", PID)]
     ),
     Event.INVESTIGATION_CLAIM: NamedTuple(
-        "InvestigationClaim", [("pres", Player), ("inved", Player), ("role", TEAM)]
+        "InvestigationClaim", [("pres", PID), ("inved", PID), ("role", TEAM)]
     ),
     Event.INVESTIGATION_RESULT: NamedTuple(
         "InvestigationResult", [("inv_pid", int), ("inv_role", TEAM)]
     ),
     Event.SPECIAL_ELECT_MESSAGE: NamedTuple("SpecialElectMessage", []),
     Event.SPECIAL_ELECT_ACTION: NamedTuple(
-        "SpecialElectAction", [("old_pres", Player), ("new_pres", Player)]
+        "SpecialElectAction", [("old_pres", PID), ("new_pres", PID)]
     ),
     Event.CHAOS_POLICY: NamedTuple("ChaosPolicy", []),
     Event.CHANCELLOR_VETO: NamedTuple(
-        "ChancellorVeto", [("veto", bool), ("player", Player)]
+        "ChancellorVeto", [("veto", bool), ("player", PID)]
     ),
     Event.PRESIDENT_VETO: NamedTuple(
-        "PresidentVeto", [("veto", bool), ("player", Player)]
+        "PresidentVeto", [("veto", bool), ("player", PID)]
     ),
     Event.PEEK_MESSAGE: NamedTuple("PeekMessage", []),
     Event.PEEK_CLAIM: NamedTuple(
-        "PeekClaim", [("hand", list[str]), ("player", Player)]
+        "PeekClaim", [("hand", tuple[TEAM, ...]), ("player", PID)]
     ),
     Event.EXECUTE_MESSAGE: NamedTuple("ExecuteMessage", []),
     Event.EXECUTE_ACTION: NamedTuple(
-        "ExecuteAction", [("pres", Player), ("targ", Player)]
+        "ExecuteAction", [("pres", PID), ("targ", PID)]
     ),
     Event.DECK_SHUFFLE: NamedTuple(
         "DeckShuffle", [("num_lib", int), ("num_fasc", int)]
@@ -75,37 +100,45 @@ KWARGS_CLASSES = {
     ),
     Event.FASCIST_WIN: NamedTuple("FascistWin", [("how", GameEnd)]),
     Event.LIBERAL_WIN: NamedTuple("LiberalWin", [("how", GameEnd)]),
+    # A decision of player (NO_SEAT for the manager) missed its limit in seconds
+    Event.TIMEOUT: NamedTuple(
+        "Timeout", [("player", PID), ("decision", Event), ("limit", float)]
+    ),
 }
 
 
 @dataclass
 class KwargsDc:
-    all_roles: Optional[dict[Player, str]]
+    all_roles: Optional[Mapping[PID, str]]
     vote: Optional[JN]
-    hand: Optional[list[str]]
+    hand: Optional[tuple[TEAM, ...]]
     dropped_card: Optional[str]
-    pres: Optional[Player]
-    chanc: Optional[Player]
+    pres: Optional[PID]
+    chanc: Optional[PID]
     card: Optional[str]
-    peek: Optional[str]
-    votes: Optional[dict[Player, JN]]
-    player: Optional[Player]
+    peek: Optional[tuple[TEAM, ...]]
+    votes: Optional[Mapping[PID, JN]]
+    player: Optional[PID]
     message: Optional[str]
     policy: Optional[str]
     num_enacted: Optional[int]
     maximum: Optional[int]
     num_fails: Optional[int]
     max_fails: Optional[int]
-    inved: Optional[Player]
+    inved: Optional[PID]
     inv_pid: Optional[int]
     inv_role: Optional[str]
-    old_pres: Optional[Player]
-    new_pres: Optional[Player]
+    old_pres: Optional[PID]
+    new_pres: Optional[PID]
     veto: Optional[bool]
-    targ: Optional[Player]
+    targ: Optional[PID]
     num_lib: Optional[int]
     num_fasc: Optional[int]
     num_players: Optional[int]
     disable_rebalance: Optional[YN]
     remake: Optional[YN]
     how: Optional[GameEnd]
+    hint: Optional[Mapping]
+    role: Optional[TEAM]
+    decision: Optional[Event]
+    limit: Optional[float]
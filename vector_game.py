@@ -0,0 +1,358 @@
+from typing import List, Optional, Union
+
+import numpy as np
+
+from sh_game.batch_player import BatchDecision, BatchPlayer
+from sh_game.game_settings import GameSettings
+from sh_game.types.event_types import Event
+from sh_game.types.game_end_types import GameEnd
+from sh_game.types.int_codes import FASCIST, HITLER, LIBERAL
+
+NO_WINNER = -1
+GAME_ENDS: List[GameEnd] = list(GameEnd)
+END_CODES = {end: i for i, end in enumerate(GAME_ENDS)}
+
+POWER_EVENTS = {
+    None: None,
+    "inv": Event.INVESTIGATION_ACTION,
+    "peek": Event.PEEK_MESSAGE,
+    "execute": Event.EXECUTE_ACTION,
+    "special_elect": Event.SPECIAL_ELECT_ACTION,
+}
+
+
+class VectorGame:
+    """
+    Plays num_games games with the same settings in lockstep.
+
+    The rules follow Game/Board without the chat phases: claims and messages have no
+    effect on the state of the game and are therefore left out. Seats are shuffled per
+    game via the role deal, seat 0 is the first president like in Board.setup_new_game.
+    """
+
+    PHASES = (
+        "nomination",
+        "voting",
+        "legislation",
+        "veto_and_enact",
+        "presidential_power",
+        "next_president",
+    )
+
+    def __init__(
+        self,
+        settings: GameSettings,
+        num_games: int,
+        players: Union[BatchPlayer, List[BatchPlayer]],
+        rng: Optional[np.random.Generator] = None,
+    ):
+        self.settings = settings
+        self.num_games = num_games
+        self.num_players = settings.num_players
+        if isinstance(players, BatchPlayer):
+            self.seat_players = None
+            self.player = players
+        else:
+            assert len(players) == self.num_players
+            self.seat_players = players
+            self.player = None
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.setup_new_games()
+
+    def setup_new_games(self):
+        n, p = self.num_games, self.num_players
+        deck_size = self.settings.num_liberal_cards + self.settings.num_fascist_cards
+        self.deck_size = deck_size
+        self.deck = np.empty((n, deck_size), dtype=np.int8)
+        self.deck_pos = np.zeros(n, dtype=np.int16)
+        self.deck_len = np.zeros(n, dtype=np.int16)
+        self.deck_lib = np.zeros(n, dtype=np.int16)
+        self.deck_fasc = np.zeros(n, dtype=np.int16)
+        self.discard_lib = np.full(n, self.settings.num_liberal_cards, dtype=np.int16)
+        self.discard_fasc = np.full(n, self.settings.num_fascist_cards, dtype=np.int16)
+        self.num_shuffles = np.full(n, -1, dtype=np.int16)
+        # The initial deck is a "reshuffle" of all cards from an empty deck
+        self._reshuffle(np.arange(n))
+
+        roles = (
+            [LIBERAL] * self.settings.num_liberals
+            + [FASCIST] * (self.settings.num_fascists - 1)
+            + [HITLER]
+        )
+        assert len(roles) == p
+        self.roles = self.rng.permuted(
+            np.tile(np.array(roles, dtype=np.int8), (n, 1)), axis=1
+        )
+        self.hitler = np.argmax(self.roles == HITLER, axis=1)
+
+        self.liberal_track = np.zeros(n, dtype=np.int8)
+        self.fascist_track = np.full(n, self.settings.fascist_pre_enact, dtype=np.int8)
+        self.failed_election_tracker = np.zeros(n, dtype=np.int8)
+        self.alive = np.ones((n, p), dtype=bool)
+        self.term_blocked = np.zeros((n, p), dtype=bool)
+        self.president = np.zeros(n, dtype=np.int8)
+        self.chancellor = np.full(n, -1, dtype=np.int8)
+        self.special_elect_return_president = np.full(n, -1, dtype=np.int8)
+        self.special_elect_choice = np.full(n, -1, dtype=np.int8)
+        self.round_number = np.zeros(n, dtype=np.int16)
+
+        self.winner = np.full(n, NO_WINNER, dtype=np.int8)
+        self.end_type = np.full(n, -1, dtype=np.int8)
+
+        # Per round scratch state
+        self.vote_success = np.zeros(n, dtype=bool)
+        self.enact_card = np.full(n, -1, dtype=np.int8)
+        self.power = np.zeros(n, dtype=np.int8)
+        self.phase_idx = 0
+
+    @property
+    def active(self) -> np.ndarray:
+        return self.winner == NO_WINNER
+
+    @property
+    def done(self) -> bool:
+        return not self.active.any()
+
+    @property
+    def can_veto(self) -> np.ndarray:
+        return self.settings.fascist_track_length - self.fascist_track == 1
+
+    def run(self):
+        while not self.done:
+            self.step()
+        return self.winner, self.end_type
+
+    def step(self):
+        getattr(self, "_" + self.PHASES[self.phase_idx])()
+        self.phase_idx = (self.phase_idx + 1) % len(self.PHASES)
+
+    def _decide(
+        self,
+        event: Event,
+        games: np.ndarray,
+        seats: np.ndarray,
+        legal: Optional[np.ndarray] = None,
+        hands: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        if not len(games):
+            return np.empty(0, dtype=np.int8)
+        if self.seat_players is None:
+            return np.asarray(
+                self.player.act(BatchDecision(event, games, seats, legal, hands), self)
+            )
+        out = None
+        for seat in np.unique(seats):
+            rows = np.flatnonzero(seats == seat)
+            decision = BatchDecision(
+                event,
+                games[rows],
+                seats[rows],
+                None if legal is None else legal[rows],
+                None if hands is None else hands[rows],
+            )
+            acts = np.asarray(self.seat_players[seat].act(decision, self))
+            if out is None:
+                out = np.empty(len(games), dtype=acts.dtype)
+            out[rows] = acts
+        return out
+
+    def _check_target(self, games, legal, targets):
+        assert legal[np.arange(len(games)), targets].all(), "Illegal target chosen"
+
+    def _reshuffle(self, games: np.ndarray):
+        # The discarded policies and the remaining policies are shuffled together
+        new_lib = self.deck_lib[games] + self.discard_lib[games]
+        total = new_lib + self.deck_fasc[games] + self.discard_fasc[games]
+        cols = np.arange(self.deck_size)
+        base = np.where(
+            cols < new_lib[:, None],
+            LIBERAL,
+            np.where(cols < total[:, None], FASCIST, -1),
+        ).astype(np.int8)
+        keys = self.rng.random((len(games), self.deck_size))
+        keys[cols >= total[:, None]] = 2.0
+        self.deck[games] = np.take_along_axis(base, np.argsort(keys, axis=1), axis=1)
+        self.deck_pos[games] = 0
+        self.deck_len[games] = total
+        self.deck_lib[games] = new_lib
+        self.deck_fasc[games] = total - new_lib
+        self.discard_lib[games] = 0
+        self.discard_fasc[games] = 0
+        self.num_shuffles[games] += 1
+
+    def peek_policy(self, games: np.ndarray, num: int) -> np.ndarray:
+        short = games[self.deck_len[games] - self.deck_pos[games] < num]
+        if len(short):
+            self._reshuffle(short)
+        cols = self.deck_pos[games][:, None] + np.arange(num)
+        return self.deck[games[:, None], cols]
+
+    def draw_policy(self, games: np.ndarray, num: int) -> np.ndarray:
+        drawn = self.peek_policy(games, num)
+        num_fasc = drawn.sum(axis=1, dtype=np.int16)
+        self.deck_pos[games] += num
+        self.deck_fasc[games] -= num_fasc
+        self.deck_lib[games] -= num - num_fasc
+        return drawn
+
+    def _end(self, games: np.ndarray, winner: int, how: GameEnd):
+        self.winner[games] = winner
+        self.end_type[games] = END_CODES[how]
+
+    def _enact(self, games: np.ndarray, cards: np.ndarray):
+        lib = games[cards == LIBERAL]
+        fasc = games[cards == FASCIST]
+        self.liberal_track[lib] += 1
+        self.fascist_track[fasc] += 1
+        self._end(
+            lib[self.liberal_track[lib] == self.settings.liberal_track_length],
+            LIBERAL,
+            GameEnd.LIBERAL_CARDS,
+        )
+        self._end(
+            fasc[self.fascist_track[fasc] == self.settings.fascist_track_length],
+            FASCIST,
+            GameEnd.FASCIST_CARDS,
+        )
+
+    def _fail_election(self, games: np.ndarray):
+        self.failed_election_tracker[games] += 1
+        chaos = games[
+            self.failed_election_tracker[games] == self.settings.election_tracker_size
+        ]
+        self.failed_election_tracker[chaos] = 0
+        self.term_blocked[chaos] = False
+        if len(chaos):
+            self._enact(chaos, self.draw_policy(chaos, 1)[:, 0])
+
+    def _nomination(self):
+        games = np.flatnonzero(self.active)
+        pres = self.president[games]
+        legal = self.alive[games] & ~self.term_blocked[games]
+        legal[np.arange(len(games)), pres] = False
+        chanc = self._decide(Event.NOMINATION, games, pres, legal=legal)
+        self._check_target(games, legal, chanc)
+        self.chancellor[games] = chanc
+
+    def _voting(self):
+        games = np.flatnonzero(self.active)
+        ja = np.zeros(len(games), dtype=np.int16)
+        nein = np.zeros(len(games), dtype=np.int16)
+        for seat in range(self.num_players):
+            rows = np.flatnonzero(self.alive[games, seat])
+            if not len(rows):
+                continue
+            votes = self._decide(
+                Event.PERSONAL_VOTE,
+                games[rows],
+                np.full(len(rows), seat, dtype=np.int8),
+            ).astype(bool)
+            ja[rows] += votes
+            nein[rows] += ~votes
+        success = ja > nein
+        self.vote_success[:] = False
+        self.vote_success[games[success]] = True
+        self._fail_election(games[~success])
+
+    def _legislation(self):
+        self.enact_card[:] = -1
+        games = np.flatnonzero(self.active & self.vote_success)
+        chanc = self.chancellor[games]
+        hitler_chanc = (self.roles[games, chanc] == HITLER) & (
+            self.fascist_track[games] >= 3
+        )
+        self._end(games[hitler_chanc], FASCIST, GameEnd.HITLER_CHANCELLOR)
+        games = games[~hitler_chanc]
+        if not len(games):
+            return
+        pres = self.president[games]
+        chanc = self.chancellor[games]
+
+        self.failed_election_tracker[games] = 0
+        self.term_blocked[games] = False
+        self.term_blocked[games, chanc] = True
+        big = self.alive[games].sum(axis=1) > 5
+        self.term_blocked[games[big], pres[big]] = True
+
+        rows = np.arange(len(games))
+        hand = self.draw_policy(games, 3)
+        discard = self._decide(Event.DISCARD, games, pres, hands=hand)
+        self._discard(games, hand[rows, discard])
+        take = hand[rows[:, None], (discard[:, None] + np.array([1, 2])) % 3]
+        enact_idx = self._decide(Event.PLAY_CARD, games, chanc, hands=take)
+        self._discard(games, take[rows, 1 - enact_idx])
+        self.enact_card[games] = take[rows, enact_idx]
+
+    def _discard(self, games: np.ndarray, cards: np.ndarray):
+        self.discard_fasc[games] += cards
+        self.discard_lib[games] += 1 - cards
+
+    def _veto_and_enact(self):
+        self.power[:] = 0
+        games = np.flatnonzero(self.enact_card >= 0)
+        if not len(games):
+            return
+        veto_games = games[self.can_veto[games]]
+        if len(veto_games):
+            chanc_veto = self._decide(
+                Event.CHANCELLOR_VETO, veto_games, self.chancellor[veto_games]
+            ).astype(bool)
+            asked = veto_games[chanc_veto]
+            pres_veto = self._decide(
+                Event.PRESIDENT_VETO, asked, self.president[asked]
+            ).astype(bool)
+            vetoed = asked[pres_veto]
+            self._discard(vetoed, self.enact_card[vetoed])
+            self.enact_card[vetoed] = -1
+            self._fail_election(vetoed)
+            games = games[self.enact_card[games] >= 0]
+
+        cards = self.enact_card[games]
+        self._enact(games, cards)
+        games = games[(cards == FASCIST) & self.active[games]]
+        track = self.settings.fascist_track
+        powers = np.array(
+            [0] + [list(POWER_EVENTS).index(p) for p in track], dtype=np.int8
+        )
+        self.power[games] = powers[self.fascist_track[games]]
+
+    def _presidential_power(self):
+        power_names = list(POWER_EVENTS)
+        for code in np.unique(self.power[self.power > 0]):
+            event = POWER_EVENTS[power_names[code]]
+            games = np.flatnonzero(self.power == code)
+            if event == Event.PEEK_MESSAGE:
+                # Only information for the president, but peeking may reshuffle the deck
+                self.peek_policy(games, 3)
+                continue
+            pres = self.president[games]
+            legal = self.alive[games].copy()
+            legal[np.arange(len(games)), pres] = False
+            targets = self._decide(event, games, pres, legal=legal)
+            self._check_target(games, legal, targets)
+            if event == Event.EXECUTE_ACTION:
+                self.alive[games, targets] = False
+                killed_hitler = self.roles[games, targets] == HITLER
+                self._end(games[killed_hitler], LIBERAL, GameEnd.HITLER_DEAD)
+            elif event == Event.SPECIAL_ELECT_ACTION:
+                self.special_elect_choice[games] = targets
+
+    def _next_president(self):
+        games = np.flatnonzero(self.active)
+        choice = self.special_elect_choice[games]
+        ret = self.special_elect_return_president[games]
+        start = np.where(ret >= 0, ret, self.president[games])
+
+        # Walk to the next living seat after start
+        offsets = np.arange(1, self.num_players + 1)
+        cand = (start[:, None] + offsets) % self.num_players
+        alive = self.alive[games[:, None], cand]
+        next_pres = cand[np.arange(len(games)), np.argmax(alive, axis=1)]
+
+        special = choice >= 0
+        self.special_elect_return_president[games] = np.where(
+            special, self.president[games], -1
+        )
+        self.president[games] = np.where(special, choice, next_pres)
+        self.special_elect_choice[games] = -1
+        self.round_number[games] += 1